@@ -2,7 +2,6 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .constants.config import settings
-from .db.database import Base, engine
 from .routers.audio_router import router as audio_router
 from .routers.cv_router import router as cv_router
 from .routers.generation_router import router as generation_router
@@ -11,6 +10,7 @@ from .routers.interview_session_router import (
     router as interview_session_router,
 )
 from .routers.jd_router import router as jd_router
+from .routers.metrics_router import router as metrics_router
 from .routers.question_router import router as question_router
 from .routers.s3_router import router as s3_router
 from .routers.text_router import router as text_router
@@ -18,9 +18,13 @@ from .routers.video_router import router as video_router
 from .routers.answer_router import router as answer_router
 from .routers.user_router import router as user_router
 from .routers.auth_router import router as auth_router
-
-Base.metadata.create_all(bind=engine)
-
+from .services.question_generation import (
+    fail_interrupted_question_generations,
+    fail_stale_question_generations,
+)
+from .utils.job_queue import start_job_queue, stop_job_queue
+from .utils.ml_client import close_ml_client, start_ml_client
+from .utils.serialization import JSONResponse
 
 PREFIX = f"/api/{settings.API_VERSION}/studio"
 
@@ -28,9 +32,24 @@ app = FastAPI(
     openapi_url=f"{PREFIX}/openapi.json",
     docs_url=f"{PREFIX}/docs",
     redoc_url=f"{PREFIX}/redoc",
+    default_response_class=JSONResponse,
 )
 
 
+@app.on_event("startup")
+async def startup():
+    await start_ml_client()
+    await fail_stale_question_generations()
+    await start_job_queue()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    dropped_jobs = await stop_job_queue()
+    await fail_interrupted_question_generations(dropped_jobs)
+    await close_ml_client()
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -61,3 +80,6 @@ app.include_router(
 )
 app.include_router(user_router, tags=["User"], prefix=f"{PREFIX}/user")
 app.include_router(auth_router, tags=["Auth"], prefix=f"{PREFIX}/auth")
+app.include_router(
+    metrics_router, tags=["Metrics"], prefix=f"{PREFIX}/metrics"
+)
@@ -1,4 +1,6 @@
-from pydantic import BaseSettings
+from typing import Optional
+
+from pydantic import BaseSettings, validator
 
 
 class Settings(BaseSettings):
@@ -11,6 +13,118 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_HOSTNAME: str
+    ACCESS_KEY: str
+    SECRET_KEY: str
+
+    # S3 client, an endpoint URL points it to a S3 compatible store
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_MAX_POOL_CONNECTIONS: int = 20
+    # Multipart upload part size in bytes (at least 5MB) and parallel parts
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
+    # Size in bytes of the chunks streamed from S3 to the client
+    S3_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Validity in seconds of the presigned URLs given to the clients
+    S3_PRESIGNED_URL_EXPIRATION: int = 3600
+
+    # Local cache of the transcoded videos, size cap in bytes. The converted
+    # videos are also written back to S3 under the prefix when it is set
+    TRANSCODE_CACHE_DIR: str = "/var/static/transcode"
+    TRANSCODE_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+    TRANSCODE_CACHE_S3_PREFIX: Optional[str] = None
+
+    # Local cache of the avatar videos prefetched during an interview, size
+    # cap in bytes. The videos of the selected question and of the next
+    # likely questions are prefetched, 0 disables the prefetching
+    VIDEO_CACHE_DIR: str = "/var/static/video_cache"
+    VIDEO_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    VIDEO_PREFETCH_COUNT: int = 3
+    VIDEO_PREFETCH_CONCURRENCY: int = 2
+
+    # ffmpeg processes running at the same time per worker, and the requests
+    # which may wait for one before the service answers 503
+    FFMPEG_MAX_PROCESSES: int = 2
+    FFMPEG_MAX_WAITING: int = 8
+
+    # HLS packaging of the generated videos. The players read the playlists
+    # and segments from HLS_BASE_URL, a public URL of the bucket (e.g. a CDN
+    # in front of it) since a private bucket refuses unsigned requests. It is
+    # required while the packaging is enabled
+    HLS_PACKAGING_ENABLED: bool = True
+    HLS_PACKAGING_CONCURRENCY: int = 1
+    HLS_BASE_URL: Optional[str] = None
+
+    # Page size of the list endpoints, default and maximum
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+
+    # Ids accepted by one bulk delete request
+    BULK_DELETE_MAX_IDS: int = 500
+
+    # Database engine and connection pool, sized per gunicorn worker
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # ML proxy URLs, the ML calls are mocked when an URL is not set
+    TALKING_HEAD_GENERATION_URL: Optional[str] = None
+    TALKING_HEAD_GENERATION_WITH_TEXT_URL: Optional[str] = None
+    CV_EXTRACTING_URL: Optional[str] = None
+    QUESTION_GENERATION_URL: Optional[str] = None
+    QUESTION_SELECTION_URL: Optional[str] = None
+    ANSWER_ANALYSIS_URL: Optional[str] = None
+
+    # Shared ML client, timeouts are in seconds
+    ML_CLIENT_MAX_CONNECTIONS: int = 100
+    ML_CLIENT_MAX_CONNECTIONS_PER_HOST: int = 20
+    ML_CLIENT_KEEPALIVE_TIMEOUT: float = 30
+    ML_CLIENT_TIMEOUT: float = 300
+    ML_CLIENT_CONNECT_TIMEOUT: float = 10
+
+    # Deadline of one ML call per endpoint, in seconds
+    ML_TALKING_HEAD_DEADLINE: float = 60
+    ML_CV_EXTRACTING_DEADLINE: float = 60
+    ML_QUESTION_GENERATION_DEADLINE: float = 120
+    ML_QUESTION_SELECTION_DEADLINE: float = 5
+    ML_ANSWER_ANALYSIS_DEADLINE: float = 60
+
+    # Retries of the idempotent ML calls, backoff in seconds
+    ML_RETRY_ATTEMPTS: int = 3
+    ML_RETRY_BACKOFF_BASE: float = 0.2
+    ML_RETRY_BACKOFF_MAX: float = 5
+
+    # Circuit breaker of each ML endpoint, reset timeout in seconds
+    ML_BREAKER_FAILURE_RATE: float = 0.5
+    ML_BREAKER_WINDOW_SIZE: int = 20
+    ML_BREAKER_RESET_TIMEOUT: float = 30
+
+    # Maximum number of avatar generations sent to ML at the same time
+    AVATAR_GENERATION_CONCURRENCY: int = 10
+
+    # Interview sessions whose question selection state is kept in memory
+    QUESTION_SELECTION_CACHE_SESSIONS: int = 1000
+
+    # Seconds the ML question selection may take, including its retries,
+    # before the next question is selected locally
+    QUESTION_SELECTION_FALLBACK_DEADLINE: float = 2
+
+    # Background workers running the question generation jobs. Sessions
+    # still pending or processing JOB_STALE_AFTER seconds after they were
+    # created are failed at startup, their worker stopped without shutdown
+    JOB_QUEUE_WORKERS: int = 2
+    JOB_QUEUE_MAX_SIZE: int = 100
+    JOB_STALE_AFTER: int = 3600
+
+    @validator("HLS_BASE_URL", always=True)
+    def hls_base_url_required(cls, value, values):
+        if values.get("HLS_PACKAGING_ENABLED") and not value:
+            raise ValueError(
+                "HLS_BASE_URL is required while HLS_PACKAGING_ENABLED is set"
+            )
+        return value
 
     # This block of codes will be used when user run the server locally (not use Docker)
     class Config:
@@ -1,47 +1,66 @@
-from sqlalchemy.orm import Session
+import uuid
+from typing import Optional
 
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.pagination import paginate
 from ..models.answer_model import Answer
 
 
-async def create_answer(answer: Answer, db: Session):
+async def create_answer(answer: Answer, db: AsyncSession):
     db.add(answer)
-    db.commit()
-    db.refresh(answer)
+    await db.commit()
+    await db.refresh(answer)
     return answer
 
 
-async def read_answer(answer_id: str, db: Session):
-    answer = db.query(Answer).filter(Answer.id == answer_id).first()
+async def read_answer(answer_id: str, db: AsyncSession):
+    result = await db.execute(select(Answer).filter(Answer.id == answer_id))
+    answer = result.scalars().first()
     return answer
 
 
-async def read_answer_by_question_id(question_id: str, db: Session):
-    answer = db.query(Answer).filter(Answer.question_id == question_id).first()
+async def read_answer_by_question_id(question_id: str, db: AsyncSession):
+    result = await db.execute(
+        select(Answer).filter(Answer.question_id == question_id)
+    )
+    answer = result.scalars().first()
     return answer
 
 
-def update_answer(answer: dict, db: Session):
-    db_answer = db.query(Answer).filter(Answer.id == answer["id"]).first()
+async def update_answer(answer: dict, db: AsyncSession):
+    result = await db.execute(select(Answer).filter(Answer.id == answer["id"]))
+    db_answer = result.scalars().first()
     if not db_answer:
         return None
     for key, value in answer.items():
         if value is not None:
             setattr(db_answer, key, value)
     db.add(db_answer)
-    db.commit()
-    db.refresh(db_answer)
+    await db.commit()
+    await db.refresh(db_answer)
     return db_answer
 
 
-def delete_answer(answer_id: str, db: Session):
-    db_answer = db.query(Answer).filter(Answer.id == answer_id).first()
-    if not db_answer:
-        return False
-    db.delete(db_answer)
-    db.commit()
-    return True
+async def delete_answer(answer_id: str, db: AsyncSession):
+    result = await db.execute(
+        delete(Answer).where(Answer.id == answer_id).returning(Answer.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
+
+
+async def bulk_delete_answers(answer_ids: list[str], db: AsyncSession):
+    """Delete the answers in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(Answer).where(Answer.id.in_(answer_ids)).returning(Answer.id)
+    )
+    await db.commit()
+    return result.scalars().all()
 
 
-def get_all_answers(db: Session):
-    answers = db.query(Answer).all()
-    return answers
+async def get_answers_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Answer), Answer.id, limit, after, db)
@@ -1,77 +1,93 @@
-import re
+import uuid
+from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..crud.file_name_counter_crud import allocate_file_name
+from ..crud.pagination import paginate
 from ..models.audio_model import Audio
 from ..schemas.audio_schema import AudioUpdate
 
 
-def create_audio(audio: Audio, db: Session):
+async def create_audio(audio: Audio, db: AsyncSession):
     # If there is a same name, will add one number behind to differentiating
-    if db.query(Audio).filter(Audio.file_name == audio.file_name).first():
-        same_name_audios = (
-            db.query(Audio)
-            .filter(Audio.file_name.op("~")(rf"{audio.file_name} \(\d+\)"))
-            .all()
-        )
-        max_cnt = 0
-        digit_pattern = r"\((\d+)\)"
-        for v in same_name_audios:
-            max_cnt = max(max_cnt, int(re.search(digit_pattern, v.file_name).group(1)))
-        audio.file_name += f" ({max_cnt+1})"
+    audio.file_name = await allocate_file_name(
+        "audio", audio.user_id, audio.file_name, db
+    )
     db.add(audio)
-    db.commit()
-    db.refresh(audio)
+    await db.commit()
+    await db.refresh(audio)
     return audio
 
 
-def read_audio(audio_id: str, db: Session):
-    audio = db.query(Audio).filter(Audio.id == audio_id).first()
+async def read_audio(audio_id: str, db: AsyncSession):
+    result = await db.execute(select(Audio).filter(Audio.id == audio_id))
+    audio = result.scalars().first()
     return audio
 
 
-def update_audio(audio_id: str, audio: AudioUpdate, db: Session):
-    db_audio = db.query(Audio).filter(Audio.id == audio_id).first()
+async def update_audio(audio_id: str, audio: AudioUpdate, db: AsyncSession):
+    result = await db.execute(select(Audio).filter(Audio.id == audio_id))
+    db_audio = result.scalars().first()
     if not db_audio:
         return None
     update_data = audio.dict(exclude_unset=True)
     for key, value in update_data.items():
         if key == "file_name":
-            if db.query(Audio).filter(Audio.file_name == value).first():
-                same_name_audios = (
-                    db.query(Audio)
-                    .filter(Audio.file_name.op("~")(rf"{value} \(\d+\)"))
-                    .all()
-                )
-                max_cnt = 0
-                digit_pattern = r"\((\d+)\)"
-                for v in same_name_audios:
-                    max_cnt = max(
-                        max_cnt,
-                        int(re.search(digit_pattern, v.file_name).group(1)),
-                    )
-                value += f" ({max_cnt+1})"
+            value = await allocate_file_name(
+                "audio", db_audio.user_id, value, db
+            )
         setattr(db_audio, key, value)
     db.add(db_audio)
-    db.commit()
-    db.refresh(db_audio)
+    await db.commit()
+    await db.refresh(db_audio)
     return db_audio
 
 
-def delete_audio(audio_id: str, db: Session):
-    db_audio = db.query(Audio).filter(Audio.id == audio_id).first()
-    if not db_audio:
-        return False
-    db.delete(db_audio)
-    db.commit()
-    return True
+async def delete_audio(audio_id: str, db: AsyncSession):
+    """Delete the audio, returns its id and extension, None when unknown"""
+    result = await db.execute(
+        delete(Audio)
+        .where(Audio.id == audio_id)
+        .returning(Audio.id, Audio.extension)
+    )
+    await db.commit()
+    return result.first()
+
+
+async def bulk_delete_audios(audio_ids: list[str], db: AsyncSession):
+    """Delete the audios in one statement, returns the ids and extensions
+    of the deleted ones"""
+    result = await db.execute(
+        delete(Audio)
+        .where(Audio.id.in_(audio_ids))
+        .returning(Audio.id, Audio.extension)
+    )
+    await db.commit()
+    return result.all()
 
 
-def get_all_audios(db: Session):
-    audios = db.query(Audio).filter(Audio.file_name.contains("")).all()
-    return audios
+async def get_audios_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Audio), Audio.id, limit, after, db)
 
 
-def get_all_audios_by_user(user_id: str, db: Session):
-    audios = db.query(Audio).filter(Audio.user_id == user_id).all()
-    return audios
+async def get_audios_page_by_user(
+    user_id: str, limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(Audio).filter(Audio.user_id == user_id)
+    return await paginate(query, Audio.id, limit, after, db)
+
+
+async def get_audio_by_content_hash(
+    user_id: str, content_hash: str, db: AsyncSession
+):
+    result = await db.execute(
+        select(Audio).filter(
+            Audio.user_id == user_id, Audio.content_hash == content_hash
+        )
+    )
+    audio = result.scalars().first()
+    return audio
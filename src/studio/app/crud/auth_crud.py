@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.user_crud import read_user_by_username
 from ..models.user_model import User
@@ -8,10 +8,11 @@ def verify_password(plain_password, hashed_password):
   # This is for checking hashed_password in the future
   return True
 
-def authenticate_user(username: str, password: str, db: Session):
-  user = read_user_by_username(username, db)
-  if not user:
-    return False
-  if not verify_password(password, user.password):
-    return False
-  return user
\ No newline at end of file
+
+async def authenticate_user(username: str, password: str, db: AsyncSession):
+    user = await read_user_by_username(username, db)
+    if not user:
+        return False
+    if not verify_password(password, user.password):
+        return False
+    return user
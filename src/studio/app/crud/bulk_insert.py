@@ -0,0 +1,29 @@
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# asyncpg sends at most 32767 bind parameters with a statement
+MAX_BIND_PARAMETERS = 32767
+
+
+def chunk_size(model) -> int:
+    """Rows of the model fitting into the bind parameters of one statement,
+    every column counts since the defaults are bound for each row too"""
+    return max(MAX_BIND_PARAMETERS // len(model.__table__.columns), 1)
+
+
+async def insert_rows(
+    model, rows: list[dict], db: AsyncSession, returning=None
+):
+    """Insert the rows with multi-row INSERTs of chunk_size rows, in the
+    transaction of the session which the caller commits. Returns the
+    returning column of the inserted rows, in order, when it is given."""
+    size = chunk_size(model)
+    returned = []
+    for start in range(0, len(rows), size):
+        statement = insert(model).values(rows[start : start + size])
+        if returning is None:
+            await db.execute(statement)
+            continue
+        result = await db.execute(statement.returning(returning))
+        returned += result.scalars().all()
+    return returned
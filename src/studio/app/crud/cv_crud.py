@@ -1,47 +1,65 @@
-from sqlalchemy.orm import Session
+import uuid
+from typing import Optional
 
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.pagination import paginate
 from ..models.cv_model import CV
 
 
-async def create_cv(cv: CV, db: Session):
+async def create_cv(cv: CV, db: AsyncSession):
     db.add(cv)
-    db.commit()
-    db.refresh(cv)
+    await db.commit()
+    await db.refresh(cv)
     return cv
 
 
-async def read_cv(cv_id: str, db: Session):
-    cv = db.query(CV).filter(CV.id == cv_id).first()
+async def read_cv(cv_id: str, db: AsyncSession):
+    result = await db.execute(select(CV).filter(CV.id == cv_id))
+    cv = result.scalars().first()
     return cv
 
 
-def update_cv(cv: dict, db: Session):
-    db_cv = db.query(CV).filter(CV.id == cv["cv_id"]).first()
+async def update_cv(cv: dict, db: AsyncSession):
+    result = await db.execute(select(CV).filter(CV.id == cv["cv_id"]))
+    db_cv = result.scalars().first()
     if not db_cv:
         return None
     for key, value in cv.items():
         if value is not None:
             setattr(db_cv, key, value)
     db.add(db_cv)
-    db.commit()
-    db.refresh(db_cv)
+    await db.commit()
+    await db.refresh(db_cv)
     return db_cv
 
 
-def delete_cv(cv_id: str, db: Session):
-    db_cv = db.query(CV).filter(CV.id == cv_id).first()
-    if not db_cv:
-        return False
-    db.delete(db_cv)
-    db.commit()
-    return True
+async def delete_cv(cv_id: str, db: AsyncSession):
+    result = await db.execute(
+        delete(CV).where(CV.id == cv_id).returning(CV.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
+
+
+async def bulk_delete_cvs(cv_ids: list[str], db: AsyncSession):
+    """Delete the cvs in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(CV).where(CV.id.in_(cv_ids)).returning(CV.id)
+    )
+    await db.commit()
+    return result.scalars().all()
 
 
-def get_all_cvs(db: Session):
-    cvs = db.query(CV).all()
-    return cvs
+async def get_cvs_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(CV), CV.id, limit, after, db)
 
 
-def get_all_cvs_by_user(user_id: str, db: Session):
-    cvs = db.query(CV).filter(CV.user_id == user_id).all()
-    return cvs
+async def get_cvs_page_by_user(
+    user_id: str, limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(CV).filter(CV.user_id == user_id)
+    return await paginate(query, CV.id, limit, after, db)
@@ -0,0 +1,49 @@
+import re
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.file_name_counter_model import FileNameCounter
+
+# The " (n)" suffix of an allocated name, the counters are kept by the name
+# without it, the way the migration seeded them
+SUFFIX = re.compile(r" \((\d+)\)$")
+
+
+async def allocate_file_name(
+    asset_type: str, user_id: str, file_name: str, db: AsyncSession
+):
+    """Return the file name, suffixed with " (n)" when the user already named
+    assets of the type with it. Names are counted without their suffix, so
+    "photo (1)" and "photo" never get the same name, and a suffixed name is
+    kept when it is above the suffixes given so far. The counter is
+    incremented with a single upsert, so concurrent uploads of the same name
+    get distinct suffixes. The caller commits together with the asset."""
+    match = SUFFIX.search(file_name)
+    suffix = int(match.group(1)) if match else 0
+    base_name = file_name[: match.start()] if match else file_name
+    statement = insert(FileNameCounter).values(
+        asset_type=asset_type,
+        user_id=user_id,
+        file_name=base_name,
+        count=suffix,
+    )
+    result = await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[
+                FileNameCounter.asset_type,
+                FileNameCounter.user_id,
+                FileNameCounter.file_name,
+            ],
+            set_={
+                "count": func.greatest(
+                    FileNameCounter.count + 1, statement.excluded.count
+                )
+            },
+        ).returning(FileNameCounter.count)
+    )
+    count = result.scalar_one()
+    if count == 0:
+        return base_name
+    return f"{base_name} ({count})"
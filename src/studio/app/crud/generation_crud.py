@@ -1,16 +1,21 @@
+import uuid
 from typing import Optional
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
 
+from sqlalchemy import and_, bindparam, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.bulk_insert import insert_rows
+from ..crud.pagination import paginate, select_fields
 from ..models.generation_model import Generation
 
 
-async def create_generation(generation: Generation, db: Session, generation_data: dict):
-    db_generation = db.query(Generation).filter(Generation.id == generation.id).first()
+async def create_generation(generation: Generation, db: AsyncSession, generation_data: dict):
+    result = await db.execute(select(Generation).filter(Generation.id == generation.id))
+    db_generation = result.scalars().first()
     if not db_generation:
         db.add(generation)
-        db.commit()
-        db.refresh(generation)
+        await db.commit()
+        await db.refresh(generation)
         return generation
 
     for key, value in generation_data.items():
@@ -18,20 +23,46 @@ async def create_generation(generation: Generation, db: Session, generation_data
             continue
         setattr(db_generation, key, value)
     db.add(db_generation)
-    db.commit()
-    db.refresh(db_generation)
+    await db.commit()
+    await db.refresh(db_generation)
     return db_generation
 
 
-async def read_generation(generation_id: str, db: Session):
-    generation = db.query(Generation).filter(Generation.id == generation_id).first()
+async def bulk_create_generations(generations: list[dict], db: AsyncSession):
+    """Insert all generations with multi-row INSERT ... RETURNING statements
+    in one transaction"""
+    if not generations:
+        return []
+    ids = await insert_rows(
+        Generation, generations, db, returning=Generation.id
+    )
+    await db.commit()
+    return ids
+
+
+async def read_generation(generation_id: str, db: AsyncSession):
+    result = await db.execute(select(Generation).filter(Generation.id == generation_id))
+    generation = result.scalars().first()
     return generation
 
 
-async def update_generation(generation: dict, db: Session):
-    db_generation = (
-        db.query(Generation).filter(Generation.id == generation["id"]).first()
+async def get_generation_locations(
+    generation_ids: list[str], db: AsyncSession
+):
+    """S3 bucket and path of the generations, only the columns are read"""
+    result = await db.execute(
+        select(Generation.bucket_s3, Generation.path_s3).filter(
+            Generation.id.in_(generation_ids)
+        )
     )
+    return result.all()
+
+
+async def update_generation(generation: dict, db: AsyncSession):
+    result = await db.execute(
+        select(Generation).filter(Generation.id == generation["id"])
+    )
+    db_generation = result.scalars().first()
     if not db_generation:
         return None
     update_data = generation
@@ -40,15 +71,39 @@ async def update_generation(generation: dict, db: Session):
             continue
         setattr(db_generation, key, value)
     db.add(db_generation)
-    db.commit()
-    db.refresh(db_generation)
+    await db.commit()
+    await db.refresh(db_generation)
     return db_generation
 
 
-async def update_type_generation(generation: dict, db: Session):
-    db_generation = (
-        db.query(Generation).filter(Generation.id == generation["id"]).first()
+async def bulk_update_generations(generations: list[dict], db: AsyncSession):
+    """Update the S3 location of many generations in one executemany"""
+    if not generations:
+        return
+    generation_table = Generation.__table__
+    await db.execute(
+        update(generation_table)
+        .where(generation_table.c.id == bindparam("generation_id"))
+        .values(
+            bucket_s3=bindparam("bucket_s3"), path_s3=bindparam("path_s3")
+        ),
+        [
+            {
+                "generation_id": generation["id"],
+                "bucket_s3": generation["bucket_s3"],
+                "path_s3": generation["path_s3"],
+            }
+            for generation in generations
+        ],
     )
+    await db.commit()
+
+
+async def update_type_generation(generation: dict, db: AsyncSession):
+    result = await db.execute(
+        select(Generation).filter(Generation.id == generation["id"])
+    )
+    db_generation = result.scalars().first()
     if not db_generation:
         return None
     update_data = generation
@@ -57,46 +112,85 @@ async def update_type_generation(generation: dict, db: Session):
         if base_avatar:
             setattr(base_avatar[0], "type", "generated")
             db.add(base_avatar[0])
-            db.commit()
-            db.refresh(base_avatar[0])
+            await db.commit()
+            await db.refresh(base_avatar[0])
     for key, value in update_data.items():
         if not value:
             continue
         setattr(db_generation, key, value)
     db.add(db_generation)
-    db.commit()
-    db.refresh(db_generation)
+    await db.commit()
+    await db.refresh(db_generation)
     return db_generation
 
 
-async def delete_generation(generation_id: str, db: Session):
-    db_generation = db.query(Generation).filter(Generation.id == generation_id).first()
-    if not db_generation:
-        return False
-    db.delete(db_generation)
-    db.commit()
-    return True
+async def delete_generation(generation_id: str, db: AsyncSession):
+    result = await db.execute(
+        delete(Generation)
+        .where(Generation.id == generation_id)
+        .returning(Generation.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
 
 
-async def get_all_generations(db: Session):
-    generations = db.query(Generation).all()
-    return generations
+async def bulk_delete_generations(generation_ids: list[str], db: AsyncSession):
+    """Delete the generations in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(Generation)
+        .where(Generation.id.in_(generation_ids))
+        .returning(Generation.id)
+    )
+    await db.commit()
+    return result.scalars().all()
+
+
+async def get_generations_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Generation), Generation.id, limit, after, db)
 
 
-async def get_all_base_generations(db: Session):
-    generations = db.query(Generation).filter(Generation.type == "base").all()
+async def get_base_generations_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(Generation).filter(Generation.type == "base")
+    return await paginate(query, Generation.id, limit, after, db)
+
+
+async def get_all_base_generations(db: AsyncSession):
+    result = await db.execute(select(Generation).filter(Generation.type == "base"))
+    generations = result.scalars().all()
     return generations
 
 
-async def get_all_generations_by_user(user_id: str, db: Session, type: Optional[str] = None):
-    generations = db.query(Generation).filter(Generation.user_id == user_id, Generation.type == type if type is not None else True).all()
+async def get_all_generations_by_user(user_id: str, db: AsyncSession, type: Optional[str] = None):
+    result = await db.execute(select(Generation).filter(Generation.user_id == user_id, Generation.type == type if type is not None else True))
+    generations = result.scalars().all()
     return generations
 
 
-async def check_video_type_exist(user_id: str, type: str, db: Session):
-    generations = (
-        db.query(Generation)
-        .filter(and_(Generation.user_id == user_id, Generation.type == type))
-        .all()
+async def get_generations_page_by_user(
+    user_id: str,
+    type: Optional[str],
+    limit: int,
+    after: Optional[uuid.UUID],
+    db: AsyncSession,
+    fields: Optional[list[str]] = None,
+):
+    query = select_fields(Generation, fields).filter(
+        Generation.user_id == user_id
+    )
+    if type is not None:
+        query = query.filter(Generation.type == type)
+    return await paginate(query, Generation.id, limit, after, db)
+
+
+async def check_video_type_exist(user_id: str, type: str, db: AsyncSession):
+    result = await db.execute(
+        select(Generation).filter(
+            and_(Generation.user_id == user_id, Generation.type == type)
+        )
     )
+    generations = result.scalars().all()
     return generations
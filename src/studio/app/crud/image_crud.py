@@ -1,78 +1,93 @@
-import re
+import uuid
+from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..crud.file_name_counter_crud import allocate_file_name
+from ..crud.pagination import paginate
 from ..models.image_model import Image
 from ..schemas.image_schema import ImageUpdate
 
 
-def create_image(image: Image, db: Session):
+async def create_image(image: Image, db: AsyncSession):
     # If there is a same name, will add one number behind to differentiating
-    if db.query(Image).filter(Image.file_name == image.file_name).first():
-        same_name_images = (
-            db.query(Image)
-            .filter(Image.file_name.op("~")(rf"{image.file_name} \(\d+\)"))
-            .all()
-        )
-        max_cnt = 0
-        digit_pattern = r"\((\d+)\)"
-        for v in same_name_images:
-            max_cnt = max(max_cnt, int(re.search(digit_pattern, v.file_name).group(1)))
-        image.file_name += f" ({max_cnt+1})"
-
+    image.file_name = await allocate_file_name(
+        "image", image.user_id, image.file_name, db
+    )
     db.add(image)
-    db.commit()
-    db.refresh(image)
+    await db.commit()
+    await db.refresh(image)
     return image
 
 
-def read_image(image_id: str, db: Session):
-    image = db.query(Image).filter(Image.id == image_id).first()
+async def read_image(image_id: str, db: AsyncSession):
+    result = await db.execute(select(Image).filter(Image.id == image_id))
+    image = result.scalars().first()
     return image
 
 
-def update_image(image_id: str, image: ImageUpdate, db: Session):
-    db_image = db.query(Image).filter(Image.id == image_id).first()
+async def update_image(image_id: str, image: ImageUpdate, db: AsyncSession):
+    result = await db.execute(select(Image).filter(Image.id == image_id))
+    db_image = result.scalars().first()
     if not db_image:
         return None
     update_data = image.dict(exclude_unset=True)
     for key, value in update_data.items():
         if key == "file_name":
-            if db.query(Image).filter(Image.file_name == value).first():
-                same_name_images = (
-                    db.query(Image)
-                    .filter(Image.file_name.op("~")(rf"{value} \(\d+\)"))
-                    .all()
-                )
-                max_cnt = 0
-                digit_pattern = r"\((\d+)\)"
-                for v in same_name_images:
-                    max_cnt = max(
-                        max_cnt,
-                        int(re.search(digit_pattern, v.file_name).group(1)),
-                    )
-                value += f" ({max_cnt+1})"
+            value = await allocate_file_name(
+                "image", db_image.user_id, value, db
+            )
         setattr(db_image, key, value)
     db.add(db_image)
-    db.commit()
-    db.refresh(db_image)
+    await db.commit()
+    await db.refresh(db_image)
     return db_image
 
 
-def delete_image(image_id: str, db: Session):
-    db_image = db.query(Image).filter(Image.id == image_id).first()
-    if not db_image:
-        return False
-    db.delete(db_image)
-    db.commit()
-    return True
+async def delete_image(image_id: str, db: AsyncSession):
+    """Delete the image, returns its id and extension, None when unknown"""
+    result = await db.execute(
+        delete(Image)
+        .where(Image.id == image_id)
+        .returning(Image.id, Image.extension)
+    )
+    await db.commit()
+    return result.first()
+
+
+async def bulk_delete_images(image_ids: list[str], db: AsyncSession):
+    """Delete the images in one statement, returns the ids and extensions
+    of the deleted ones"""
+    result = await db.execute(
+        delete(Image)
+        .where(Image.id.in_(image_ids))
+        .returning(Image.id, Image.extension)
+    )
+    await db.commit()
+    return result.all()
 
 
-def get_all_images(db: Session):
-    images = db.query(Image).filter(Image.file_name.contains("")).all()
-    return images
+async def get_images_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Image), Image.id, limit, after, db)
 
 
-def get_all_images_by_user(user_id: str, db: Session):
-    images = db.query(Image).filter(Image.user_id == user_id).all()
-    return images
+async def get_images_page_by_user(
+    user_id: str, limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(Image).filter(Image.user_id == user_id)
+    return await paginate(query, Image.id, limit, after, db)
+
+
+async def get_image_by_content_hash(
+    user_id: str, content_hash: str, db: AsyncSession
+):
+    result = await db.execute(
+        select(Image).filter(
+            Image.user_id == user_id, Image.content_hash == content_hash
+        )
+    )
+    image = result.scalars().first()
+    return image
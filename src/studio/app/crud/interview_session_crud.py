@@ -1,70 +1,115 @@
+import datetime
+import uuid
 from typing import Optional
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
 
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.pagination import paginate
 from ..models.interview_session_model import Interview_session
 
 
-async def create_interview_session(interview_session: Interview_session, db: Session):
+async def create_interview_session(interview_session: Interview_session, db: AsyncSession):
     db.add(interview_session)
-    db.commit()
-    db.refresh(interview_session)
+    await db.commit()
+    await db.refresh(interview_session)
     return interview_session
 
 
-async def read_interview_session(interview_session_id: str, db: Session):
-    interview_session = (
-        db.query(Interview_session)
-        .filter(Interview_session.id == interview_session_id)
-        .first()
+async def read_interview_session(interview_session_id: str, db: AsyncSession):
+    result = await db.execute(
+        select(Interview_session).filter(
+            Interview_session.id == interview_session_id
+        )
     )
+    interview_session = result.scalars().first()
     return interview_session
 
 
-def update_interview_session(interview_session: dict, db: Session):
-    db_interview_session = (
-        db.query(Interview_session)
-        .filter(Interview_session.id == interview_session["id"])
-        .first()
+async def update_interview_session(interview_session: dict, db: AsyncSession):
+    result = await db.execute(
+        select(Interview_session).filter(
+            Interview_session.id == interview_session["id"]
+        )
     )
+    db_interview_session = result.scalars().first()
     if not db_interview_session:
         return None
     for key, value in interview_session.items():
         if value is not None:
             setattr(db_interview_session, key, value)
     db.add(db_interview_session)
-    db.commit()
-    db.refresh(db_interview_session)
+    await db.commit()
+    await db.refresh(db_interview_session)
     return db_interview_session
 
 
-def delete_interview_session(interview_session_id: str, db: Session):
-    db_interview_session = (
-        db.query(Interview_session)
-        .filter(Interview_session.id == interview_session_id)
-        .first()
+async def fail_unfinished_interview_sessions(
+    db: AsyncSession,
+    interview_session_ids: Optional[list[str]] = None,
+    created_before: Optional[datetime.datetime] = None,
+):
+    """Mark the given sessions, or those created before the time, failed
+    when their question generation is still pending or processing. Returns
+    the failed ids"""
+    query = update(Interview_session).where(
+        Interview_session.status.in_(["pending", "processing"])
     )
-    if not db_interview_session:
-        return False
-    db.delete(db_interview_session)
-    db.commit()
-    return True
+    if interview_session_ids is not None:
+        query = query.where(Interview_session.id.in_(interview_session_ids))
+    if created_before is not None:
+        query = query.where(Interview_session.created_at < created_before)
+    result = await db.execute(
+        query.values(status="failed").returning(Interview_session.id)
+    )
+    await db.commit()
+    return result.scalars().all()
+
+
+async def delete_interview_session(
+    interview_session_id: str, db: AsyncSession
+):
+    result = await db.execute(
+        delete(Interview_session)
+        .where(Interview_session.id == interview_session_id)
+        .returning(Interview_session.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
+
+
+async def bulk_delete_interview_sessions(
+    interview_session_ids: list[str], db: AsyncSession
+):
+    """Delete the sessions in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(Interview_session)
+        .where(Interview_session.id.in_(interview_session_ids))
+        .returning(Interview_session.id)
+    )
+    await db.commit()
+    return result.scalars().all()
 
 
-def get_all_interview_sessions(db: Session):
-    interview_sessions = db.query(Interview_session).all()
-    return interview_sessions
+async def get_interview_sessions_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(
+        select(Interview_session), Interview_session.id, limit, after, db
+    )
 
 
-def get_all_interview_sessions_by_cv_and_jd(cv_id: str, jd_id: str, db: Session):
-    interview_sessions = (
-        db.query(Interview_session)
-        .filter(
-            and_(
-                Interview_session.cv_id == cv_id,
-                Interview_session.jd_id == jd_id,
-            )
+async def get_interview_sessions_page_by_cv_and_jd(
+    cv_id: str,
+    jd_id: str,
+    limit: int,
+    after: Optional[uuid.UUID],
+    db: AsyncSession,
+):
+    query = select(Interview_session).filter(
+        and_(
+            Interview_session.cv_id == cv_id,
+            Interview_session.jd_id == jd_id,
         )
-        .all()
     )
-    return interview_sessions
+    return await paginate(query, Interview_session.id, limit, after, db)
@@ -1,47 +1,65 @@
-from sqlalchemy.orm import Session
+import uuid
+from typing import Optional
 
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.pagination import paginate
 from ..models.jd_model import JD
 
 
-async def create_jd(jd: JD, db: Session):
+async def create_jd(jd: JD, db: AsyncSession):
     db.add(jd)
-    db.commit()
-    db.refresh(jd)
+    await db.commit()
+    await db.refresh(jd)
     return jd
 
 
-async def read_jd(jd_id: str, db: Session):
-    jd = db.query(JD).filter(JD.id == jd_id).first()
+async def read_jd(jd_id: str, db: AsyncSession):
+    result = await db.execute(select(JD).filter(JD.id == jd_id))
+    jd = result.scalars().first()
     return jd
 
 
-def update_jd(jd: dict, db: Session):
-    db_jd = db.query(JD).filter(JD.id == jd["id"]).first()
+async def update_jd(jd: dict, db: AsyncSession):
+    result = await db.execute(select(JD).filter(JD.id == jd["id"]))
+    db_jd = result.scalars().first()
     if not db_jd:
         return None
     for key, value in jd.items():
         if value is not None:
             setattr(db_jd, key, value)
     db.add(db_jd)
-    db.commit()
-    db.refresh(db_jd)
+    await db.commit()
+    await db.refresh(db_jd)
     return db_jd
 
 
-def delete_jd(jd_id: str, db: Session):
-    db_jd = db.query(JD).filter(JD.id == jd_id).first()
-    if not db_jd:
-        return False
-    db.delete(db_jd)
-    db.commit()
-    return True
+async def delete_jd(jd_id: str, db: AsyncSession):
+    result = await db.execute(
+        delete(JD).where(JD.id == jd_id).returning(JD.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
+
+
+async def bulk_delete_jds(jd_ids: list[str], db: AsyncSession):
+    """Delete the jds in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(JD).where(JD.id.in_(jd_ids)).returning(JD.id)
+    )
+    await db.commit()
+    return result.scalars().all()
 
 
-def get_all_jds(db: Session):
-    jds = db.query(JD).all()
-    return jds
+async def get_jds_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(JD), JD.id, limit, after, db)
 
 
-def get_all_jds_by_title(title: str, db: Session):
-    jds = db.query(JD).filter(JD.title == title).all()
-    return jds
+async def get_jds_page_by_title(
+    title: str, limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(JD).filter(JD.title == title)
+    return await paginate(query, JD.id, limit, after, db)
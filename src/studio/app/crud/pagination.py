@@ -0,0 +1,57 @@
+import base64
+import uuid
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(key: uuid.UUID) -> str:
+    """Opaque cursor pointing after the row with the key"""
+    return base64.urlsafe_b64encode(key.bytes).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    """Key of the row a cursor points after, raises ValueError when the
+    cursor was not made by encode_cursor"""
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + "=="))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def select_fields(model, fields: Optional[list[str]] = None) -> Select:
+    """Select the whole entities, or only the columns of the fields so that
+    no ORM objects are built for the rows"""
+    if not fields:
+        return select(model)
+    return select(*[getattr(model, field) for field in fields])
+
+
+async def paginate(
+    query: Select,
+    key,
+    limit: int,
+    after: Optional[uuid.UUID],
+    db: AsyncSession,
+):
+    """Run the query for one page of at most limit rows ordered by the key
+    column, starting after the key of the previous page. The page is sought
+    through the index of the key instead of an offset, so its cost does not
+    depend on how deep into the table it is."""
+    if after is not None:
+        query = query.filter(key > after)
+    result = await db.execute(query.order_by(key).limit(limit + 1))
+    # Entities come back as ORM objects, selected columns as plain rows
+    if isinstance(query.column_descriptions[0]["expr"], type):
+        rows = result.scalars().all()
+    else:
+        rows = result.all()
+
+    # The extra row tells whether there is a next page
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key.key))
+    return {"items": rows, "next_cursor": next_cursor}
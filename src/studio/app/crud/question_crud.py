@@ -1,84 +1,160 @@
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+import uuid
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.question_model import Question
 from ..models.generation_model import Generation
-from ..crud.generation_crud import get_all_generations_by_user
+from ..models.text_model import Text
+from ..crud.bulk_insert import insert_rows
+from ..crud.pagination import paginate, select_fields
 
 
-async def create_question(question: Question, db: Session):
+async def create_question(question: Question, db: AsyncSession):
     db.add(question)
-    db.commit()
-    db.refresh(question)
+    await db.commit()
+    await db.refresh(question)
     return question
 
 
-async def read_question(question_id: str, db: Session):
-    question = db.query(Question).filter(Question.id == question_id).first()
+async def bulk_create_questions_with_texts(
+    questions: list[dict], db: AsyncSession
+):
+    """Insert the questions and their ground truth texts in one transaction.
+    Each question dict carries its ground truths under "ground_truths"."""
+    if not questions:
+        return []
+    question_rows = []
+    text_rows = []
+    for question in questions:
+        question_row = {
+            key: value
+            for key, value in question.items()
+            if key != "ground_truths"
+        }
+        question_row.setdefault("id", uuid.uuid4())
+        question_rows.append(question_row)
+        text_rows += [
+            {"parent_id": question_row["id"], "text": ground_truth}
+            for ground_truth in question.get("ground_truths", [])
+        ]
+
+    question_ids = await insert_rows(
+        Question, question_rows, db, returning=Question.id
+    )
+    await insert_rows(Text, text_rows, db)
+    await db.commit()
+    return question_ids
+
+
+async def read_question(question_id: str, db: AsyncSession):
+    result = await db.execute(
+        select(Question).filter(Question.id == question_id)
+    )
+    question = result.scalars().first()
     return question
 
 
-def update_question(question: dict, db: Session):
-    db_question = (
-        db.query(Question).filter(Question.id == question["id"]).first()
+async def update_question(question: dict, db: AsyncSession):
+    result = await db.execute(
+        select(Question).filter(Question.id == question["id"])
     )
+    db_question = result.scalars().first()
     if not db_question:
         return None
     for key, value in question.items():
         if value is not None:
             setattr(db_question, key, value)
     db.add(db_question)
-    db.commit()
-    db.refresh(db_question)
+    await db.commit()
+    await db.refresh(db_question)
     return db_question
 
 
-def delete_question(question_id: str, db: Session):
-    db_question = db.query(Question).filter(Question.id == question_id).first()
-    if not db_question:
-        return False
-    db.delete(db_question)
-    db.commit()
-    return True
+async def mark_question_used(
+    question_id: str, is_answered: bool, db: AsyncSession
+) -> bool:
+    """Mark the question as asked in one UPDATE, False when it does not
+    exist"""
+    result = await db.execute(
+        update(Question)
+        .where(Question.id == question_id)
+        .values(is_used=True, is_answered=is_answered)
+        .returning(Question.id)
+    )
+    await db.commit()
+    return result.scalar() is not None
 
 
-def get_all_questions(db: Session):
-    questions = db.query(Question).all()
-    return questions
+async def is_question_unused(question_id: str, db: AsyncSession) -> bool:
+    """Whether the question exists and was not asked yet"""
+    result = await db.execute(
+        select(Question.id).where(
+            Question.id == question_id, Question.is_used.isnot(True)
+        )
+    )
+    return result.scalar() is not None
 
 
-def get_all_questions_by_interview_session_id(
-    interview_session_id: str, db: Session
-):
-    questions = (
-        db.query(Question)
-        .filter(Question.interview_session_id == interview_session_id)
-        .all()
+async def delete_question(question_id: str, db: AsyncSession):
+    """Delete the question, returns the id of its interview session or None
+    when the question does not exist"""
+    result = await db.execute(
+        delete(Question)
+        .where(Question.id == question_id)
+        .returning(Question.interview_session_id)
     )
-    return questions
+    await db.commit()
+    return result.scalar_one_or_none()
 
 
-async def get_all_questions_by_interviewer_id_and_interview_session_id(
-    interviewer_id: str, interview_session_id: str, db: Session
-):
-    questions = (
-        db.query(Question)
-        .filter(Question.interview_session_id == interview_session_id)
-        .all()
+async def bulk_delete_questions(question_ids: list[str], db: AsyncSession):
+    """Delete the questions in one statement, returns the deleted ids with
+    the ids of their interview sessions"""
+    result = await db.execute(
+        delete(Question)
+        .where(Question.id.in_(question_ids))
+        .returning(Question.id, Question.interview_session_id)
     )
+    await db.commit()
+    return result.all()
+
+
+async def get_questions_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Question), Question.id, limit, after, db)
 
-    generations_by_user = await get_all_generations_by_user(
-        interviewer_id, db, "generated"
-    )
 
-    generation_ids_by_user = [
-        generation.id for generation in generations_by_user
-    ]
+async def get_questions_page_by_interview_session_id(
+    interview_session_id: str,
+    limit: int,
+    after: Optional[uuid.UUID],
+    db: AsyncSession,
+    fields: Optional[list[str]] = None,
+):
+    query = select_fields(Question, fields).filter(
+        Question.interview_session_id == interview_session_id
+    )
+    return await paginate(query, Question.id, limit, after, db)
 
-    questions_by_interviewer_id = [
-        question
-        for question in questions
-        if question.avatar_generation_id in generation_ids_by_user
-    ]
 
-    return questions_by_interviewer_id
+async def get_all_questions_by_interviewer_id_and_interview_session_id(
+    interviewer_id: str, interview_session_id: str, db: AsyncSession
+):
+    """Questions of the session asked by avatar videos the interviewer
+    generated, joined in the database instead of matched in Python. They
+    are ordered by id so that the question bank built from them is the same
+    every time"""
+    result = await db.execute(
+        select(Question)
+        .join(Generation, Question.avatar_generation_id == Generation.id)
+        .filter(
+            Question.interview_session_id == interview_session_id,
+            Generation.user_id == interviewer_id,
+            Generation.type == "generated",
+        )
+        .order_by(Question.id)
+    )
+    return result.scalars().all()
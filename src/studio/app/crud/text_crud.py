@@ -1,47 +1,82 @@
-from sqlalchemy.orm import Session
+import uuid
+from typing import Optional
 
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.bulk_insert import insert_rows
+from ..crud.pagination import paginate
 from ..models.text_model import Text
 
 
-async def create_text(text: Text, db: Session):
+async def create_text(text: Text, db: AsyncSession):
     db.add(text)
-    db.commit()
-    db.refresh(text)
+    await db.commit()
+    await db.refresh(text)
     return text
 
 
-async def read_text(text_id: str, db: Session):
-    text = db.query(Text).filter(Text.id == text_id).first()
+async def bulk_create_texts(texts: list[dict], db: AsyncSession):
+    """Insert all texts with multi-row INSERT ... RETURNING statements in one
+    transaction"""
+    if not texts:
+        return []
+    ids = await insert_rows(Text, texts, db, returning=Text.id)
+    await db.commit()
+    return ids
+
+
+async def read_text(text_id: str, db: AsyncSession):
+    result = await db.execute(select(Text).filter(Text.id == text_id))
+    text = result.scalars().first()
     return text
 
 
-def update_text(text: dict, db: Session):
-    db_text = db.query(Text).filter(Text.id == text["id"]).first()
+async def update_text(text: dict, db: AsyncSession):
+    result = await db.execute(select(Text).filter(Text.id == text["id"]))
+    db_text = result.scalars().first()
     if not db_text:
         return None
     for key, value in text.items():
         if value is not None:
             setattr(db_text, key, value)
     db.add(db_text)
-    db.commit()
-    db.refresh(db_text)
+    await db.commit()
+    await db.refresh(db_text)
     return db_text
 
 
-def delete_text(text_id: str, db: Session):
-    db_text = db.query(Text).filter(Text.id == text_id).first()
-    if not db_text:
-        return False
-    db.delete(db_text)
-    db.commit()
-    return True
+async def delete_text(text_id: str, db: AsyncSession):
+    result = await db.execute(
+        delete(Text).where(Text.id == text_id).returning(Text.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
 
 
-def get_all_texts(db: Session):
-    texts = db.query(Text).all()
-    return texts
+async def bulk_delete_texts(text_ids: list[str], db: AsyncSession):
+    """Delete the texts in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(Text).where(Text.id.in_(text_ids)).returning(Text.id)
+    )
+    await db.commit()
+    return result.scalars().all()
 
 
-def get_all_texts_by_parent_id(parent_id: str, db: Session):
-    texts = db.query(Text).filter(Text.parent_id == parent_id).all()
+async def get_texts_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Text), Text.id, limit, after, db)
+
+
+async def get_all_texts_by_parent_id(parent_id: str, db: AsyncSession):
+    result = await db.execute(select(Text).filter(Text.parent_id == parent_id))
+    texts = result.scalars().all()
     return texts
+
+
+async def get_texts_page_by_parent_id(
+    parent_id: str, limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(Text).filter(Text.parent_id == parent_id)
+    return await paginate(query, Text.id, limit, after, db)
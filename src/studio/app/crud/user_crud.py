@@ -1,38 +1,61 @@
+import uuid
 from typing import Optional
-from sqlalchemy.orm import Session
 
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.pagination import paginate
 from ..models.user_model import User
 from ..schemas.user_schema import UserBaseSchema
 
 
-def create_user(user: User, db: Session):
-    if db.query(User).filter(User.username == user.username).first():
+async def create_user(user: User, db: AsyncSession):
+    result = await db.execute(select(User).filter(User.username == user.username))
+    if result.scalars().first():
         pass
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
-def read_user(user_id: str, db: Session):
-    user = db.query(User).filter(User.id == user_id).first()
-    return user
-
-def read_user_by_username(username: str, db: Session):
-    user = db.query(User).filter(User.username == username).first()
+async def read_user(user_id: str, db: AsyncSession):
+    result = await db.execute(select(User).filter(User.id == user_id))
+    user = result.scalars().first()
     return user
 
 
-def delete_user(user_id: str, db: Session):
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        return False
-    db.delete(db_user)
-    db.commit()
-    return True
+async def read_user_by_username(username: str, db: AsyncSession):
+    result = await db.execute(select(User).filter(User.username == username))
+    user = result.scalars().first()
+    return user
 
 
-def get_users(db: Session, role: Optional[str] = None):
-    users = db.query(User).filter(User.role == role if role is not None else True).all()
-    return users
+async def delete_user(user_id: str, db: AsyncSession):
+    result = await db.execute(
+        delete(User).where(User.id == user_id).returning(User.id)
+    )
+    await db.commit()
+    return result.scalar_one_or_none() is not None
+
+
+async def bulk_delete_users(user_ids: list[str], db: AsyncSession):
+    """Delete the users in one statement, returns the deleted ids"""
+    result = await db.execute(
+        delete(User).where(User.id.in_(user_ids)).returning(User.id)
+    )
+    await db.commit()
+    return result.scalars().all()
+
+
+async def get_users_page(
+    role: Optional[str],
+    limit: int,
+    after: Optional[uuid.UUID],
+    db: AsyncSession,
+):
+    query = select(User)
+    if role is not None:
+        query = query.filter(User.role == role)
+    return await paginate(query, User.id, limit, after, db)
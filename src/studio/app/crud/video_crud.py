@@ -1,77 +1,93 @@
-import re
+import uuid
+from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..crud.file_name_counter_crud import allocate_file_name
+from ..crud.pagination import paginate
 from ..models.video_model import Video
 from ..schemas.video_schema import VideoUpdate
 
 
-def create_video(video: Video, db: Session):
+async def create_video(video: Video, db: AsyncSession):
     # If there is a same name, will add one number behind to differentiating
-    if db.query(Video).filter(Video.file_name == video.file_name).first():
-        same_name_videos = (
-            db.query(Video)
-            .filter(Video.file_name.op("~")(rf"{video.file_name} \(\d+\)"))
-            .all()
-        )
-        max_cnt = 0
-        digit_pattern = r"\((\d+)\)"
-        for v in same_name_videos:
-            max_cnt = max(max_cnt, int(re.search(digit_pattern, v.file_name).group(1)))
-        video.file_name += f" ({max_cnt+1})"
+    video.file_name = await allocate_file_name(
+        "video", video.user_id, video.file_name, db
+    )
     db.add(video)
-    db.commit()
-    db.refresh(video)
+    await db.commit()
+    await db.refresh(video)
     return video
 
 
-def read_video(video_id: str, db: Session):
-    video = db.query(Video).filter(Video.id == video_id).first()
+async def read_video(video_id: str, db: AsyncSession):
+    result = await db.execute(select(Video).filter(Video.id == video_id))
+    video = result.scalars().first()
     return video
 
 
-def update_video(video_id: str, video: VideoUpdate, db: Session):
-    db_video = db.query(Video).filter(Video.id == video_id).first()
+async def update_video(video_id: str, video: VideoUpdate, db: AsyncSession):
+    result = await db.execute(select(Video).filter(Video.id == video_id))
+    db_video = result.scalars().first()
     if not db_video:
         return None
     update_data = video.dict(exclude_unset=True)
     for key, value in update_data.items():
         if key == "file_name":
-            if db.query(Video).filter(Video.file_name == value).first():
-                same_name_videos = (
-                    db.query(Video)
-                    .filter(Video.file_name.op("~")(rf"{value} \(\d+\)"))
-                    .all()
-                )
-                max_cnt = 0
-                digit_pattern = r"\((\d+)\)"
-                for v in same_name_videos:
-                    max_cnt = max(
-                        max_cnt,
-                        int(re.search(digit_pattern, v.file_name).group(1)),
-                    )
-                value += f" ({max_cnt+1})"
+            value = await allocate_file_name(
+                "video", db_video.user_id, value, db
+            )
         setattr(db_video, key, value)
     db.add(db_video)
-    db.commit()
-    db.refresh(db_video)
+    await db.commit()
+    await db.refresh(db_video)
     return db_video
 
 
-def delete_video(video_id: str, db: Session):
-    db_video = db.query(Video).filter(Video.id == video_id).first()
-    if not db_video:
-        return False
-    db.delete(db_video)
-    db.commit()
-    return True
+async def delete_video(video_id: str, db: AsyncSession):
+    """Delete the video, returns its id and extension, None when unknown"""
+    result = await db.execute(
+        delete(Video)
+        .where(Video.id == video_id)
+        .returning(Video.id, Video.extension)
+    )
+    await db.commit()
+    return result.first()
+
+
+async def bulk_delete_videos(video_ids: list[str], db: AsyncSession):
+    """Delete the videos in one statement, returns the ids and extensions
+    of the deleted ones"""
+    result = await db.execute(
+        delete(Video)
+        .where(Video.id.in_(video_ids))
+        .returning(Video.id, Video.extension)
+    )
+    await db.commit()
+    return result.all()
 
 
-def get_all_videos(db: Session):
-    videos = db.query(Video).filter(Video.file_name.contains("")).all()
-    return videos
+async def get_videos_page(
+    limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    return await paginate(select(Video), Video.id, limit, after, db)
 
 
-def get_all_videos_by_user(user_id: str, db: Session):
-    videos = db.query(Video).filter(Video.user_id == user_id).all()
-    return videos
+async def get_videos_page_by_user(
+    user_id: str, limit: int, after: Optional[uuid.UUID], db: AsyncSession
+):
+    query = select(Video).filter(Video.user_id == user_id)
+    return await paginate(query, Video.id, limit, after, db)
+
+
+async def get_video_by_content_hash(
+    user_id: str, content_hash: str, db: AsyncSession
+):
+    result = await db.execute(
+        select(Video).filter(
+            Video.user_id == user_id, Video.content_hash == content_hash
+        )
+    )
+    video = result.scalars().first()
+    return video
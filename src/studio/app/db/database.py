@@ -1,16 +1,53 @@
+import time
+
 from app.constants.config import settings
+from app.utils.metrics import observe_timing, register_gauge
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # Database URL
 POSTGRES_URL = f"postgresql+psycopg2://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOSTNAME}:{settings.DATABASE_PORT}/{settings.POSTGRES_DB}"
+ASYNC_POSTGRES_URL = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOSTNAME}:{settings.DATABASE_PORT}/{settings.POSTGRES_DB}"
+
+# Connection pool config, shared by the sync and async engines
+POOL_CONFIG = {
+    "echo": settings.DB_ECHO,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
 
 # Config for engine session
-engine = create_engine(POSTGRES_URL, echo=True)
+engine = create_engine(POSTGRES_URL, **POOL_CONFIG)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Config for async engine session, used by the routers so that queries do not
+# block the event loop. Objects are not expired on commit because lazy loading
+# is not available on an AsyncSession.
+async_engine = create_async_engine(ASYNC_POSTGRES_URL, **POOL_CONFIG)
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Expose the state of the async pool
+register_gauge("db_pool_size", lambda: async_engine.pool.size())
+register_gauge(
+    "db_pool_checked_out", lambda: async_engine.pool.checkedout()
+)
+register_gauge("db_pool_idle", lambda: async_engine.pool.checkedin())
+register_gauge(
+    "db_pool_overflow", lambda: max(async_engine.pool.overflow(), 0)
+)
+
 
 def get_db():
     """Calling the session of database"""
@@ -19,3 +56,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Calling the async session of database"""
+    async with AsyncSessionLocal() as db:
+        # Check out the connection up front to measure the wait on the pool
+        start = time.perf_counter()
+        await db.connection()
+        observe_timing("db_pool_wait", time.perf_counter() - start)
+        yield db
@@ -0,0 +1,54 @@
+from logging.config import fileConfig
+
+from alembic import context
+from app.db.database import POSTGRES_URL, Base, engine
+
+# Import the models so that their tables are part of the metadata
+from app.models import (  # noqa: F401
+    answer_model,
+    audio_model,
+    cv_model,
+    file_name_counter_model,
+    generation_model,
+    image_model,
+    interview_session_model,
+    jd_model,
+    question_model,
+    text_model,
+    user_model,
+    video_model,
+)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emit the migrations as SQL without connecting to the database"""
+    context.configure(
+        url=POSTGRES_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run the migrations against the database of the app settings"""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
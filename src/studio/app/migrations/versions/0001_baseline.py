@@ -0,0 +1,152 @@
+"""Baseline schema, the tables the app created with create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSON, UUID
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _id():
+    return sa.Column("id", UUID(as_uuid=True), primary_key=True)
+
+
+def _create_table(name, *columns):
+    """Create the table unless create_all already created it, so that the
+    databases set up before the migrations are adopted as they are"""
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def upgrade():
+    _create_table(
+        "answers",
+        _id(),
+        sa.Column("question_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("bucket_s3", sa.String(), nullable=False),
+        sa.Column("video_url", sa.String(), nullable=False),
+        sa.Column("audio_url", sa.String(), nullable=False),
+        sa.Column("overall_score", sa.Float(), nullable=False),
+        sa.Column("confidence_score", sa.Float(), nullable=False),
+        sa.Column("text_relevancy_score", sa.Float(), nullable=False),
+        sa.Column("has_bad_words", sa.Boolean(), nullable=False),
+        sa.Column("professional_score", sa.Float(), nullable=False),
+        sa.Column("emotion_from_text", sa.String(), nullable=False),
+        sa.Column("emotion_from_audio", sa.String(), nullable=False),
+        sa.Column("emotion_from_video", sa.String(), nullable=False),
+    )
+    _create_table(
+        "audios",
+        _id(),
+        sa.Column("user_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column("duration", sa.Integer(), nullable=False),
+        sa.Column("language", sa.String(), nullable=False),
+        sa.Column("extension", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+    )
+    _create_table(
+        "cvs",
+        _id(),
+        sa.Column("user_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("optional_infor", JSON(), nullable=True),
+    )
+    _create_table(
+        "generations",
+        _id(),
+        sa.Column("user_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("video_id", sa.String(), nullable=True),
+        sa.Column("audio_id", sa.String(), nullable=True),
+        sa.Column("image_id", sa.String(), nullable=True),
+        sa.Column("bucket_s3", sa.String(), nullable=True),
+        sa.Column("path_s3", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=False),
+    )
+    _create_table(
+        "images",
+        _id(),
+        sa.Column("user_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column("extension", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+    )
+    _create_table(
+        "interview_sessions",
+        _id(),
+        sa.Column("cv_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("jd_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("interviewer_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("interviewee_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    _create_table(
+        "jds",
+        _id(),
+        sa.Column("title", sa.String(), nullable=True),
+    )
+    _create_table(
+        "questions",
+        _id(),
+        sa.Column("avatar_generation_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("cv_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("jd_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("question_context", sa.String(), nullable=True),
+        sa.Column("topic", sa.Integer(), nullable=True),
+        sa.Column("interview_session_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("is_used", sa.Boolean(), nullable=True),
+        sa.Column("is_answered", sa.Boolean(), nullable=True),
+    )
+    _create_table(
+        "texts",
+        _id(),
+        sa.Column("parent_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("text", sa.String(), nullable=True),
+    )
+    _create_table(
+        "users",
+        _id(),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("position", sa.String(), nullable=False),
+    )
+    _create_table(
+        "videos",
+        _id(),
+        sa.Column("user_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column("language", sa.String(), nullable=False),
+        sa.Column("extension", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("duration", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    for table in [
+        "videos",
+        "users",
+        "texts",
+        "questions",
+        "jds",
+        "interview_sessions",
+        "images",
+        "generations",
+        "cvs",
+        "audios",
+        "answers",
+    ]:
+        op.drop_table(table)
@@ -0,0 +1,119 @@
+"""Media metadata, HLS renditions, file name counters and lookup indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Tables of the uploaded assets and their asset type in the name counters
+ASSET_TABLES = {"videos": "video", "audios": "audio", "images": "image"}
+
+# Columns added since the baseline, create_all may have added them already
+COLUMNS = [
+    ("generations", "hls_path_s3", "VARCHAR"),
+    ("videos", "content_hash", "VARCHAR"),
+    ("videos", "width", "INTEGER"),
+    ("videos", "height", "INTEGER"),
+    ("audios", "content_hash", "VARCHAR"),
+    ("images", "content_hash", "VARCHAR"),
+    ("images", "width", "INTEGER"),
+    ("images", "height", "INTEGER"),
+]
+
+# Name, table, columns and uniqueness of the indexes
+INDEXES = [
+    (
+        "ix_videos_user_id_content_hash",
+        "videos",
+        "user_id, content_hash",
+        True,
+    ),
+    (
+        "ix_audios_user_id_content_hash",
+        "audios",
+        "user_id, content_hash",
+        True,
+    ),
+    (
+        "ix_images_user_id_content_hash",
+        "images",
+        "user_id, content_hash",
+        True,
+    ),
+    (
+        "ix_questions_interview_session_id",
+        "questions",
+        "interview_session_id",
+        False,
+    ),
+    ("ix_texts_parent_id", "texts", "parent_id", False),
+    ("ix_generations_type", "generations", "type", False),
+    ("ix_generations_user_id_type", "generations", "user_id, type", False),
+    ("ix_answers_question_id", "answers", "question_id", False),
+    (
+        "ix_interview_sessions_cv_id_jd_id",
+        "interview_sessions",
+        "cv_id, jd_id",
+        False,
+    ),
+    ("ix_users_username", "users", "username", False),
+    ("ix_cvs_user_id", "cvs", "user_id", False),
+]
+
+
+def upgrade():
+    for table, column, type in COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {type}"
+        )
+
+    for name, table, columns, unique in INDEXES:
+        op.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+            f"{name} ON {table} ({columns})"
+        )
+
+    if not sa.inspect(op.get_bind()).has_table("file_name_counters"):
+        op.create_table(
+            "file_name_counters",
+            sa.Column("asset_type", sa.String(), primary_key=True),
+            sa.Column("user_id", UUID(as_uuid=True), primary_key=True),
+            sa.Column("file_name", sa.String(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+
+    # Continue the counters after the " (n)" suffixes of the existing names
+    for table, asset_type in ASSET_TABLES.items():
+        op.execute(
+            f"""
+            INSERT INTO file_name_counters
+                (asset_type, user_id, file_name, count)
+            SELECT
+                '{asset_type}',
+                user_id,
+                regexp_replace(file_name, ' \\(\\d+\\)$', ''),
+                max(coalesce(
+                    (regexp_match(file_name, ' \\((\\d+)\\)$'))[1]::int, 0
+                ))
+            FROM {table}
+            GROUP BY 1, 2, 3
+            ON CONFLICT DO NOTHING
+            """
+        )
+
+
+def downgrade():
+    op.drop_table("file_name_counters")
+    for name, _, _, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    for table, column, _ in reversed(COLUMNS):
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {column}")
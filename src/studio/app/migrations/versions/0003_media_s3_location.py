@@ -0,0 +1,31 @@
+"""S3 location of the media and CV files stored in S3
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Tables of the media which may be stored in S3 instead of the local store
+TABLES = ["videos", "audios", "images", "cvs"]
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(
+            table, sa.Column("bucket_s3", sa.String(), nullable=True)
+        )
+        op.add_column(table, sa.Column("path_s3", sa.String(), nullable=True))
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_column(table, "path_s3")
+        op.drop_column(table, "bucket_s3")
@@ -15,7 +15,7 @@ class Answer(Base):
         nullable=False,
         default=uuid.uuid4,
     )
-    question_id = Column(UUID(as_uuid=True), nullable=False)
+    question_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     bucket_s3 = Column(String, nullable=False)
     video_url = Column(String, nullable=False)
     audio_url = Column(String, nullable=False)
@@ -15,12 +15,15 @@ class CV(Base):
         nullable=False,
         default=uuid.uuid4,
     )
-    user_id = Column(UUID(as_uuid=True), nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     full_name = Column(String, nullable=False)
     email = Column(String, nullable=False)
     phone_number = Column(String, nullable=False)
     description = Column(String, nullable=False)
     optional_infor = Column(JSON, nullable=True)
+    # Location of the CV file in S3
+    bucket_s3 = Column(String, nullable=True)
+    path_s3 = Column(String, nullable=True)
 
     class Config:
         orm_mode = True
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..db.database import Base
+
+
+# Number of assets of a type a user named with the same file name, used to
+# suffix the duplicate names with " (n)"
+class FileNameCounter(Base):
+    __tablename__ = "file_name_counters"
+    asset_type = Column(String, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    file_name = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    class Config:
+        orm_mode = True
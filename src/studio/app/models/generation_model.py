@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.database import Base
@@ -21,7 +21,10 @@ class Generation(Base):
     image_id = Column(String, nullable=True)
     bucket_s3 = Column(String, nullable=True)
     path_s3 = Column(String, nullable=True)
-    type = Column(String, nullable=False, default="generated")
+    hls_path_s3 = Column(String, nullable=True)
+    type = Column(String, nullable=False, default="generated", index=True)
+
+    __table_args__ = (Index("ix_generations_user_id_type", "user_id", "type"),)
 
     class Config:
         orm_mode = True
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.database import Base
@@ -19,6 +19,22 @@ class Image(Base):
     file_name = Column(String, nullable=False)
     extension = Column(String, nullable=False)
     size = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    # Location of the media uploaded to S3, None in the local store
+    bucket_s3 = Column(String, nullable=True)
+    path_s3 = Column(String, nullable=True)
+
+    # A user uploading the same content again gets the existing asset
+    __table_args__ = (
+        Index(
+            "ix_images_user_id_content_hash",
+            "user_id",
+            "content_hash",
+            unique=True,
+        ),
+    )
 
     class Config:
         orm_mode = True
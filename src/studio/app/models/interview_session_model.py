@@ -1,6 +1,6 @@
 import uuid
 import datetime
-from sqlalchemy import Column, DateTime, String
+from sqlalchemy import Column, DateTime, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.database import Base
@@ -20,7 +20,11 @@ class Interview_session(Base):
     interviewer_id = Column(UUID(as_uuid=True), nullable=True)
     interviewee_id = Column(UUID(as_uuid=True), nullable=True)
     status = Column(String, nullable=False, default="completed")
-    created_at = Column(DateTime, default = datetime.datetime.now())
+    created_at = Column(DateTime, default=datetime.datetime.now)
+
+    __table_args__ = (
+        Index("ix_interview_sessions_cv_id_jd_id", "cv_id", "jd_id"),
+    )
 
     class Config:
         orm_mode = True
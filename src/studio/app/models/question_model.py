@@ -20,7 +20,9 @@ class Question(Base):
     jd_id = Column(UUID(as_uuid=True), nullable=False)
     question_context = Column(String, nullable=True)
     topic = Column(Integer, nullable=True)
-    interview_session_id = Column(UUID(as_uuid=True), nullable=False)
+    interview_session_id = Column(
+        UUID(as_uuid=True), nullable=False, index=True
+    )
     is_used = Column(Boolean, default=False)
     is_answered = Column(Boolean, default=False)
 
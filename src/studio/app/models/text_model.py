@@ -15,7 +15,7 @@ class Text(Base):
         nullable=False,
         default=uuid.uuid4,
     )
-    parent_id = Column(UUID(as_uuid=True), nullable=False)
+    parent_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     text = Column(String, nullable=True)
 
     class Config:
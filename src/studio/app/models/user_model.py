@@ -15,7 +15,7 @@ class User(Base):
         nullable=False,
         default=uuid.uuid4,
     )
-    username =  Column(String, nullable=False)
+    username = Column(String, nullable=False, index=True)
     password = Column(String, nullable=False)
     role = Column(String, nullable=False, default = "interviewee")
     position = Column(String, nullable=False, default = "")
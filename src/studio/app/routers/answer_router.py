@@ -1,23 +1,23 @@
 import os
 import uuid
-from typing import List
 
 from fastapi import APIRouter, Depends, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.question_crud import read_question
 from ..crud.jd_crud import read_jd
 from ..crud.answer_crud import (
+    bulk_delete_answers,
     create_answer,
     delete_answer,
-    get_all_answers,
+    get_answers_page,
     read_answer,
     read_answer_by_question_id,
     update_answer,
 )
 from ..crud.text_crud import create_text, get_all_texts_by_parent_id
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.generation_model import Generation
 from ..models.interview_session_model import Interview_session
 from ..models.answer_model import Answer
@@ -29,7 +29,15 @@ from ..schemas.answer_schema import (
     AnswerSelectionPipelineOutput,
     AnswerSelectionPipelineInput,
 )
-from ..utils.exception import NotFoundException
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
+from ..schemas.page_schema import Page, PageParams
+from ..schemas.s3_schema import PresignedDownload
+from ..services.direct_upload import presign_download
+from ..utils.exception import InvalidInput, NotFoundException
 from ..utils.logger import setup_logger
 from ..utils.mlp_api import (
     handle_return_mlp_avatargeneration,
@@ -37,6 +45,7 @@ from ..utils.mlp_api import (
     handle_send_answer_analysis,
 )
 from ..utils.answer_analysis_utils import createAnswerAnalysisMLInputObject
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -61,7 +70,7 @@ router.mount(
 )
 async def add_answer(
     answer_data: AnswerBaseSchema = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create the answer"""
     answer: Answer = Answer(**answer_data.dict())
@@ -72,10 +81,10 @@ async def add_answer(
 
 @router.put("/update/", response_model=AnswerResponse)
 async def update_answer_by_id(
-    answer: AnswerUpdate, db: Session = Depends(get_db)
+    answer: AnswerUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """update the answer by its id"""
-    answer_obj = update_answer(answer.dict(), db)
+    answer_obj = await update_answer(answer.dict(), db)
     if answer_obj is None:
         logger.info(f"Invalid answer with ID: {answer.id}")
         raise NotFoundException(detail=f"Invalid answer with ID: {answer.id}")
@@ -85,7 +94,7 @@ async def update_answer_by_id(
 
 
 @router.get("/get/{id}", response_model=AnswerResponse)
-async def get_answer_by_id(id: str, db: Session = Depends(get_db)):
+async def get_answer_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the answer by its id"""
     answer = await read_answer(id, db)
 
@@ -97,8 +106,28 @@ async def get_answer_by_id(id: str, db: Session = Depends(get_db)):
     return answer.__dict__
 
 
+@router.get("/download_url/{id}", response_model=PresignedDownload)
+async def get_answer_download_url(
+    id: str, media: str = "video", db: AsyncSession = Depends(get_async_db)
+):
+    """Presigned URL to download the video or audio of the answer straight
+    from S3"""
+    if media not in ("video", "audio"):
+        raise InvalidInput(detail="The media must be video or audio")
+    answer = await read_answer(id, db)
+
+    if answer is None:
+        logger.info(f"Invalid answer with ID: {id}")
+        raise NotFoundException(detail=f"Invalid answer with ID: {id}")
+
+    key = answer.video_url if media == "video" else answer.audio_url
+    return await presign_download(answer.bucket_s3, key)
+
+
 @router.get("/get_by_question_id/{id}", response_model=AnswerResponse)
-async def get_answer_by_question_id(id: str, db: Session = Depends(get_db)):
+async def get_answer_by_question_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Get the answer by its id"""
     answer = await read_answer_by_question_id(id, db)
 
@@ -112,34 +141,46 @@ async def get_answer_by_question_id(id: str, db: Session = Depends(get_db)):
     return answer.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[AnswerResponse])
-async def delete_answer_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_answer_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Delete answer by its id"""
-    result = delete_answer(id, db)
+    result = await delete_answer(id, db)
     if not result:
         logger.info(f"Invalid answer with ID: {id}")
         raise NotFoundException(detail=f"Invalid answer with ID: {id}")
 
     logger.info(f"Deleted answer with ID: {id}")
-    answers = get_all_answers(db)
-    answers_dict_list = [i.__dict__ for i in answers]
-    return answers_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[AnswerResponse])
-async def get_answers(db: Session = Depends(get_db)):
-    """Get all answers"""
-    answers = get_all_answers(db)
-    answers_dict_list = [i.__dict__ for i in answers]
-    logger.info(f"Number of answers: {len(answers)}")
-    return answers_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_answers_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many answers by their ids, unknown ids are skipped"""
+    ids = await bulk_delete_answers(data.ids, db)
+    logger.info(f"Deleted {len(ids)} answers")
+    return {"ids": ids}
+
+
+@router.get("/", response_model=Page[AnswerResponse])
+async def get_answers(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of answers"""
+    answers = await get_answers_page(page.limit, page.after, db)
+    logger.info(f"Number of answers: {len(answers['items'])}")
+    return page_response(answers, AnswerResponse)
 
 
 @router.post(
     "/send/answer_analysis", response_model=AnswerSelectionPipelineOutput
 )
 async def send_mlproxy_answeranalysis(
-    data: AnswerSelectionPipelineInput, db: Session = Depends(get_db)
+    data: AnswerSelectionPipelineInput,
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Read answer
     input_answer = await read_answer(data.answer_id, db)
@@ -148,7 +189,7 @@ async def send_mlproxy_answeranalysis(
     input_question = await read_question(input_answer.question_id, db)
 
     # Create ML input
-    input_data = createAnswerAnalysisMLInputObject(
+    input_data = await createAnswerAnalysisMLInputObject(
         input_question, input_answer, db
     )
 
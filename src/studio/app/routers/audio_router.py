@@ -1,25 +1,54 @@
 import os
-from typing import List
+import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
+from fastapi import APIRouter, Depends, File, Response, UploadFile, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.audio_crud import (
+    bulk_delete_audios,
     create_audio,
     delete_audio,
-    get_all_audios,
-    get_all_audios_by_user,
+    get_audio_by_content_hash,
+    get_audios_page,
+    get_audios_page_by_user,
     read_audio,
     update_audio,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.audio_model import Audio
 from ..schemas.audio_schema import AudioBaseSchema, AudioResponse, AudioUpdate
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
+from ..schemas.page_schema import Page, PageParams
+from ..schemas.s3_schema import PresignedDownload, PresignedUploadComplete
+from ..services.direct_upload import (
+    complete_upload,
+    presign_download,
+    read_uploaded_media_metadata,
+)
+from ..services.media_upload import (
+    discard_upload,
+    receive_upload,
+    remove_stored_uploads,
+    skip_duplicate_upload,
+    store_upload,
+)
 from ..services.validate_data import validate_user_id
-from ..utils.exception import InvalidFileType, NotFoundException
+from ..utils.exception import (
+    Conflict,
+    InvalidDestination,
+    InvalidFileType,
+    InvalidInput,
+    NotFoundException,
+)
 from ..utils.handle_file import validate_file_type
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -41,9 +70,10 @@ router.mount(
     response_model=AudioResponse,
 )
 async def add_audio(
+    response: Response,
     audio_data: AudioBaseSchema = Depends(),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create an audio"""
     extension = validate_file_type(file, "audio")
@@ -53,26 +83,131 @@ async def add_audio(
         raise InvalidFileType(detail="Your upload file must be an audio")
 
     # Validate user_id
-    if not validate_user_id(str(audio_data.user_id), db):
+    if not await validate_user_id(str(audio_data.user_id), db):
         logger.info(f"Invalid user with ID: {audio_data.user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {audio_data.user_id}")
 
-    # Add metada
-    file_content = await file.read()
-    size = len(file_content)
+    # Store the file and read its metadata in one pass over the upload
+    upload = await receive_upload(file, "audio")
+
+    # The same content uploaded again by the user returns the existing audio
+    existing_audio = await get_audio_by_content_hash(
+        str(audio_data.user_id), upload["content_hash"], db
+    )
+    if existing_audio:
+        skip_duplicate_upload(upload)
+        response.status_code = status.HTTP_200_OK
+        return existing_audio.__dict__
+
     audio: Audio = Audio(**audio_data.dict())
+    audio.id = uuid.uuid4()
     audio.extension = extension
-    audio.size = size
-    new_audio = create_audio(audio, db)
+    audio.size = upload["size"]
+    audio.content_hash = upload["content_hash"]
+    if upload["duration"] is not None:
+        audio.duration = upload["duration"]
+    elif audio.duration is None:
+        audio.duration = 0
+    try:
+        new_audio = await create_audio(audio, db)
+    except IntegrityError:
+        # Uploaded at the same time by another request
+        await db.rollback()
+        existing_audio = await get_audio_by_content_hash(
+            str(audio_data.user_id), upload["content_hash"], db
+        )
+        if existing_audio is None:
+            # The conflict was on another constraint, or the other upload
+            # was deleted since
+            discard_upload(upload)
+            raise Conflict(
+                detail="The audio conflicts with another upload, please retry"
+            )
+        skip_duplicate_upload(upload)
+        response.status_code = status.HTTP_200_OK
+        return existing_audio.__dict__
+    except BaseException:
+        discard_upload(upload)
+        raise
+    store_upload(upload, "audio", new_audio.id, extension)
     logger.info(f"Created audio name {new_audio.file_name} with ID {new_audio.id}")
 
     return new_audio.__dict__
 
 
+@router.post(
+    "/create_from_s3",
+    status_code=status.HTTP_201_CREATED,
+    response_model=AudioResponse,
+)
+async def add_audio_from_s3(
+    response: Response,
+    upload: PresignedUploadComplete,
+    audio_data: AudioBaseSchema = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create an audio uploaded straight to S3 with /s3/presigned_upload/,
+    the upload is completed here"""
+    # Validate user_id
+    if not await validate_user_id(str(audio_data.user_id), db):
+        logger.info(f"Invalid user with ID: {audio_data.user_id}")
+        raise NotFoundException(
+            detail=f"Invalid user with ID: {audio_data.user_id}"
+        )
+
+    if upload.user_id != audio_data.user_id:
+        raise InvalidInput(
+            detail=f"The upload {upload.file_id} is not of the user {audio_data.user_id}"
+        )
+
+    # The upload was completed before
+    existing_audio = await read_audio(str(upload.file_id), db)
+    if existing_audio:
+        if existing_audio.user_id != audio_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_audio.__dict__
+
+    res = await complete_upload(upload, "audio")
+    if not res["status"]:
+        raise InvalidDestination(detail=res["message"])
+    metadata = await read_uploaded_media_metadata(
+        upload.bucket_name, upload.path
+    )
+
+    audio: Audio = Audio(**audio_data.dict())
+    audio.id = upload.file_id
+    audio.extension = res["extension"]
+    audio.size = res["size"]
+    audio.bucket_s3 = upload.bucket_name
+    audio.path_s3 = upload.path
+    if metadata["duration"] is not None:
+        audio.duration = metadata["duration"]
+    elif audio.duration is None:
+        audio.duration = 0
+    try:
+        new_audio = await create_audio(audio, db)
+    except IntegrityError:
+        # Completed at the same time by another request
+        await db.rollback()
+        existing_audio = await read_audio(str(upload.file_id), db)
+        if existing_audio is None or existing_audio.user_id != audio_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_audio.__dict__
+    logger.info(f"Created audio with ID {new_audio.id} in S3")
+
+    return new_audio.__dict__
+
+
 @router.get("/get/{id}", response_model=AudioResponse)
-async def get_audio_by_id(id: str, db: Session = Depends(get_db)):
+async def get_audio_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the audio by its id"""
-    audio = read_audio(id, db)
+    audio = await read_audio(id, db)
 
     if audio is None:
         logger.info(f"Invalid audio with ID: {id}")
@@ -82,12 +217,28 @@ async def get_audio_by_id(id: str, db: Session = Depends(get_db)):
     return audio.__dict__
 
 
+@router.get("/download_url/{id}", response_model=PresignedDownload)
+async def get_audio_download_url(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
+    """Presigned URL to download the audio straight from S3"""
+    audio = await read_audio(id, db)
+
+    if audio is None:
+        logger.info(f"Invalid audio with ID: {id}")
+        raise NotFoundException(detail=f"Invalid audio with ID: {id}")
+    if not audio.path_s3:
+        raise NotFoundException(detail=f"The audio {id} is not stored in S3")
+
+    return await presign_download(audio.bucket_s3, audio.path_s3)
+
+
 @router.put("/update/{id}", response_model=AudioResponse)
 async def update_audio_by_id(
-    id: str, audio: AudioUpdate, db: Session = Depends(get_db)
+    id: str, audio: AudioUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """Update the audio following its id"""
-    audio = update_audio(id, audio, db)
+    audio = await update_audio(id, audio, db)
     if audio is None:
         logger.info(f"Invalid audio with ID: {id}")
         raise NotFoundException(detail=f"Invalid audio with ID: {id}")
@@ -96,38 +247,56 @@ async def update_audio_by_id(
     return audio.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[AudioResponse])
-async def delete_audio_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_audio_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Delete audio by its id"""
-    result = delete_audio(id, db)
-    if not result:
+    deleted = await delete_audio(id, db)
+    if deleted is None:
         logger.info(f"Invalid audio with ID: {id}")
         raise NotFoundException(detail=f"Invalid audio with ID: {id}")
 
+    remove_stored_uploads("audio", [deleted])
     logger.info(f"Deleted audio with ID: {id}")
-    audios = get_all_audios(db)
-    audios_dict_list = [i.__dict__ for i in audios]
-    return audios_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[AudioResponse])
-async def get_audios(db: Session = Depends(get_db)):
-    """Get all audios"""
-    audios = get_all_audios(db)
-    audios_dict_list = [i.__dict__ for i in audios]
-    logger.info(f"Number of audios: {len(audios)}")
-    return audios_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_audios_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many audios by their ids, unknown ids are skipped"""
+    deleted = await bulk_delete_audios(data.ids, db)
+    remove_stored_uploads("audio", deleted)
+    logger.info(f"Deleted {len(deleted)} audios")
+    return {"ids": [file_id for file_id, _ in deleted]}
 
 
-@router.get("/get_by_user/", response_model=List[AudioResponse])
-async def get_audios_by_user_id(user_id: str, db: Session = Depends(get_db)):
+@router.get("/", response_model=Page[AudioResponse])
+async def get_audios(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of audios"""
+    audios = await get_audios_page(page.limit, page.after, db)
+    logger.info(f"Number of audios: {len(audios['items'])}")
+    return page_response(audios, AudioResponse)
+
+
+@router.get("/get_by_user/", response_model=Page[AudioResponse])
+async def get_audios_by_user_id(
+    user_id: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get an image by user id"""
     # Validate user_id
-    if not validate_user_id(user_id, db):
+    if not await validate_user_id(user_id, db):
         logger.info(f"Invalid user with ID: {user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {user_id}")
 
-    audios = get_all_audios_by_user(user_id, db)
-    audios_dict_list = [i.__dict__ for i in audios]
+    audios = await get_audios_page_by_user(
+        user_id, page.limit, page.after, db
+    )
     logger.info(f"Get audios with user_id: {user_id}")
-    return audios_dict_list
+    return page_response(audios, AudioResponse)
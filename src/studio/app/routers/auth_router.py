@@ -4,12 +4,12 @@ import uuid
 
 from fastapi import APIRouter, Depends, Body
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.auth_crud import (
 		authenticate_user
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.user_model import User
 from ..schemas.user_schema import UserLogin, UserResponse
 from ..utils.logger import setup_logger
@@ -27,10 +27,11 @@ router.mount(
 	name="static",
 )
 
+
 @router.post("/token", response_model = UserResponse)
-async def login_for_access_token(user: UserLogin = Body(default=None), db: Session = Depends(get_db)):
+async def login_for_access_token(user: UserLogin = Body(default=None), db: AsyncSession = Depends(get_async_db)):
 	"""Authenticate user"""
-	userDB = authenticate_user(user.username, user.password, db)
+	userDB = await authenticate_user(user.username, user.password, db)
 	if not userDB:
 		return {'success': False, 'message': 'Invalid email or password'}
 	return userDB.__dict__
@@ -1,32 +1,50 @@
 import os
-from typing import List
+import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
+from fastapi import APIRouter, Depends, File, Response, UploadFile, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.cv_crud import (
+    bulk_delete_cvs,
     create_cv,
     delete_cv,
-    get_all_cvs,
-    get_all_cvs_by_user,
+    get_cvs_page,
+    get_cvs_page_by_user,
     read_cv,
     update_cv,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.cv_model import CV
-from ..schemas.cv_schema import CVBaseSchema, CVResponse, CVUpdate
+from ..schemas.cv_schema import (
+    CVBaseSchema,
+    CVInfoSchema,
+    CVResponse,
+    CVUpdate,
+)
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
 from ..schemas.mlp_questiongeneration_schema import CVExtractingContents
+from ..schemas.page_schema import Page, PageParams
+from ..schemas.s3_schema import PresignedDownload, PresignedUploadComplete
+from ..services.direct_upload import complete_upload, presign_download
 from ..services.validate_data import validate_user_id
 from ..utils.exception import (
+    Conflict,
     InvalidDestination,
     InvalidFileType,
+    InvalidInput,
     NotFoundException,
 )
 from ..utils.handle_file import validate_file_type
 from ..utils.logger import setup_logger
 from ..utils.mlp_api import handle_send_cv_mlproxy
-from ..utils.s3_client import upload_file
+from ..utils.s3_client import get_upload_key, upload_file
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -50,7 +68,7 @@ router.mount(
 async def add_cv(
     cv_data: CVBaseSchema = Depends(),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Cresate the cv"""
     extension = validate_file_type(file, "application")
@@ -60,7 +78,7 @@ async def add_cv(
         raise InvalidFileType(detail="Your upload file must be a PDF")
 
     # Validate user_id
-    if not validate_user_id(str(cv_data.user_id), db):
+    if not await validate_user_id(str(cv_data.user_id), db):
         logger.info(f"Invalid user with ID: {cv_data.user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {cv_data.user_id}")
 
@@ -71,9 +89,14 @@ async def add_cv(
         if key != "bucket_name" and key != "path"
     }
     cv: CV = CV(**cv_object)
+    cv.id = uuid.uuid4()
+    cv.bucket_s3 = cv_data.bucket_name
+    cv.path_s3 = get_upload_key(
+        cv_data.path, "application", str(cv.user_id), f"{cv.id}.{extension}"
+    )
     new_cv = await create_cv(cv, db)
     res = await upload_file(
-        file.file,
+        file,
         cv_data.bucket_name,
         cv_data.path,
         "application",
@@ -87,10 +110,72 @@ async def add_cv(
     return new_cv.__dict__
 
 
+@router.post(
+    "/create_from_s3",
+    status_code=status.HTTP_201_CREATED,
+    response_model=CVResponse,
+)
+async def add_cv_from_s3(
+    response: Response,
+    upload: PresignedUploadComplete,
+    cv_data: CVInfoSchema = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create the CV uploaded straight to S3 with /s3/presigned_upload/,
+    the upload is completed here"""
+    # Validate user_id
+    if not await validate_user_id(str(cv_data.user_id), db):
+        logger.info(f"Invalid user with ID: {cv_data.user_id}")
+        raise NotFoundException(
+            detail=f"Invalid user with ID: {cv_data.user_id}"
+        )
+
+    if upload.user_id != cv_data.user_id:
+        raise InvalidInput(
+            detail=f"The upload {upload.file_id} is not of the user {cv_data.user_id}"
+        )
+
+    # The upload was completed before
+    existing_cv = await read_cv(str(upload.file_id), db)
+    if existing_cv:
+        if existing_cv.user_id != cv_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_cv.__dict__
+
+    res = await complete_upload(upload, "application")
+    if not res["status"]:
+        raise InvalidDestination(detail=res["message"])
+
+    cv: CV = CV(**cv_data.dict())
+    cv.id = upload.file_id
+    cv.bucket_s3 = upload.bucket_name
+    cv.path_s3 = upload.path
+    try:
+        new_cv = await create_cv(cv, db)
+    except IntegrityError:
+        # Completed at the same time by another request
+        await db.rollback()
+        existing_cv = await read_cv(str(upload.file_id), db)
+        if existing_cv is None or existing_cv.user_id != cv_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_cv.__dict__
+
+    logger.info(f"Created CV with ID {new_cv.id} in S3")
+    return new_cv.__dict__
+
+
 @router.put("/update/", response_model=CVResponse)
-async def update_cv_by_id(cv: CVUpdate, db: Session = Depends(get_db)):
+async def update_cv_by_id(
+    cv: CVUpdate, db: AsyncSession = Depends(get_async_db)
+):
     """update the cv by its id"""
-    cv_obj = update_cv(cv.dict(), db)
+    cv_obj = await update_cv(cv.dict(), db)
     if cv_obj is None:
         logger.info(f"Invalid CV with ID: {cv.cv_id}")
         raise NotFoundException(detail=f"Invalid CV with ID: {cv.cv_id}")
@@ -100,7 +185,7 @@ async def update_cv_by_id(cv: CVUpdate, db: Session = Depends(get_db)):
 
 
 @router.get("/get/{id}", response_model=CVResponse)
-async def get_cv_by_id(id: str, db: Session = Depends(get_db)):
+async def get_cv_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the cv by its id"""
     cv = await read_cv(id, db)
     if cv is None:
@@ -111,46 +196,73 @@ async def get_cv_by_id(id: str, db: Session = Depends(get_db)):
     return cv.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[CVResponse])
-async def delete_cv_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/download_url/{id}", response_model=PresignedDownload)
+async def get_cv_download_url(id: str, db: AsyncSession = Depends(get_async_db)):
+    """Presigned URL to download the CV file straight from S3"""
+    cv = await read_cv(id, db)
+
+    if cv is None:
+        logger.info(f"Invalid CV with ID: {id}")
+        raise NotFoundException(detail=f"Invalid CV with ID: {id}")
+    if not cv.path_s3:
+        raise NotFoundException(detail=f"The CV {id} is not stored in S3")
+
+    return await presign_download(cv.bucket_s3, cv.path_s3)
+
+
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_cv_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete cv by its id"""
-    result = delete_cv(id, db)
+    result = await delete_cv(id, db)
     if not result:
         logger.info(f"Invalid CV with ID: {id}")
         raise NotFoundException(detail=f"Invalid CV with ID: {id}")
 
     logger.info(f"Deleted CV with ID: {id}")
-    cvs = get_all_cvs(db)
-    cvs_dict_list = [i.__dict__ for i in cvs]
-    return cvs_dict_list
+    return {"id": id}
+
+
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_cvs_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many cvs by their ids, unknown ids are skipped"""
+    ids = await bulk_delete_cvs(data.ids, db)
+    logger.info(f"Deleted {len(ids)} cvs")
+    return {"ids": ids}
 
 
-@router.get("/", response_model=List[CVResponse])
-async def get_cvs(db: Session = Depends(get_db)):
-    """Get all CVs"""
-    cvs = get_all_cvs(db)
-    cvs_dict_list = [i.__dict__ for i in cvs]
-    logger.info(f"Number of CVs: {len(cvs)}")
-    return cvs_dict_list
+@router.get("/", response_model=Page[CVResponse])
+async def get_cvs(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of CVs"""
+    cvs = await get_cvs_page(page.limit, page.after, db)
+    logger.info(f"Number of CVs: {len(cvs['items'])}")
+    return page_response(cvs, CVResponse)
 
 
-@router.get("/get_by_user/", response_model=List[CVResponse])
-async def get_cvs_by_user_id(user_id: str, db: Session = Depends(get_db)):
+@router.get("/get_by_user/", response_model=Page[CVResponse])
+async def get_cvs_by_user_id(
+    user_id: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get all cvs by user id"""
     # Validate user_id
-    if not validate_user_id(user_id, db):
+    if not await validate_user_id(user_id, db):
         logger.info(f"Invalid user with ID: {user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {user_id}")
 
-    cvs = get_all_cvs_by_user(user_id, db)
-    cvs_dict_list = [i.__dict__ for i in cvs]
+    cvs = await get_cvs_page_by_user(user_id, page.limit, page.after, db)
     logger.info(f"Get CVs with user_id: {user_id}")
-    return cvs_dict_list
+    return page_response(cvs, CVResponse)
 
 
 @router.post("/send/cv_extracting")
 async def send_mlproxy_cvextracting(
-    data: CVExtractingContents = Depends(), db: Session = Depends(get_db)
+    data: CVExtractingContents = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Send CV file to ML proxy to extract keywords and update to CV model"""
     cv = await read_cv(data.cv_id, db)
@@ -3,24 +3,31 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.generation_crud import (
+    bulk_delete_generations,
     check_video_type_exist,
     create_generation,
     delete_generation,
-    get_all_base_generations,
-    get_all_generations,
-    get_all_generations_by_user,
+    get_base_generations_page,
+    get_generations_page,
+    get_generations_page_by_user,
     read_generation,
     update_generation,
     update_type_generation,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.generation_model import Generation
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
 from ..schemas.generation_schema import (
     GenerationBaseSchema,
     GenerationCheckTypeExist,
+    GenerationPlaylist,
     GenerationResponse,
     GenerationUpdate,
     GenerationUpdateType,
@@ -29,15 +36,20 @@ from ..schemas.mlp_avatargeneration_schema import (
     MLPBaseAvatarGenerationSchema,
     MLPInputAvatarGenerationSchema,
 )
+from ..schemas.page_schema import FieldsParams, Page, PageParams
+from ..schemas.s3_schema import PresignedDownload
+from ..services.direct_upload import presign_download
 from ..services.validate_data import validate_user_id
 from ..services.validate_input import validate_input_included
 from ..utils.exception import InvalidInput, NotFoundException
 from ..utils.logger import setup_logger
+from ..utils.s3_client import get_hls_url
 from ..utils.avatar_generation_utils import (
     createGenerationObjectDict,
     sendGenerationML,
     receiveMLResponse,
 )
+from ..utils.serialization import page_response
 
 
 logger = setup_logger(__name__)
@@ -63,7 +75,7 @@ router.mount(
 )
 async def add_generation(
     generation_data: GenerationBaseSchema = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create the generation"""
     generation: Generation = Generation(**generation_data.dict())
@@ -78,7 +90,7 @@ async def add_generation(
 
 @router.put("/update/", response_model=GenerationResponse)
 async def update_generation_by_id(
-    generation: GenerationUpdate, db: Session = Depends(get_db)
+    generation: GenerationUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """update the cv by its id"""
     generation_obj = await update_generation(generation.dict(), db)
@@ -94,7 +106,7 @@ async def update_generation_by_id(
 
 @router.put("/update_type/", response_model=GenerationResponse)
 async def update_generation_type_by_user_id(
-    generation: GenerationUpdateType, db: Session = Depends(get_db)
+    generation: GenerationUpdateType, db: AsyncSession = Depends(get_async_db)
 ):
     """update the cv by its id"""
     # Check if the type input is valid
@@ -120,7 +132,9 @@ async def update_generation_type_by_user_id(
 
 
 @router.get("/get/{id}", response_model=GenerationResponse)
-async def get_generation_by_id(id: str, db: Session = Depends(get_db)):
+async def get_generation_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Get the generation by its id"""
     generation = await read_generation(id, db)
 
@@ -132,43 +146,97 @@ async def get_generation_by_id(id: str, db: Session = Depends(get_db)):
     return generation.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[GenerationResponse])
-async def delete_generation_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/download_url/{id}", response_model=PresignedDownload)
+async def get_generation_download_url(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
+    """Presigned URL to download the generated video straight from S3"""
+    generation = await read_generation(id, db)
+
+    if generation is None:
+        logger.info(f"Invalid generation with ID: {id}")
+        raise NotFoundException(detail=f"Invalid generation with ID: {id}")
+    if not generation.path_s3:
+        raise NotFoundException(detail=f"The generation {id} has no video")
+
+    return await presign_download(generation.bucket_s3, generation.path_s3)
+
+
+@router.get("/hls/{id}", response_model=GenerationPlaylist)
+async def get_generation_playlist(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
+    """Get the URL of the HLS playlist of the generation"""
+    generation = await read_generation(id, db)
+
+    if generation is None:
+        logger.info(f"Invalid generation with ID: {id}")
+        raise NotFoundException(detail=f"Invalid generation with ID: {id}")
+
+    if not generation.hls_path_s3:
+        raise NotFoundException(
+            detail=f"Generation with ID {id} is not packaged yet"
+        )
+
+    playlist_url = get_hls_url(generation.hls_path_s3)
+    if playlist_url is None:
+        raise NotFoundException(
+            detail="The HLS playlists are not served, HLS_BASE_URL is not set"
+        )
+
+    return {"id": generation.id, "playlist_url": playlist_url}
+
+
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_generation_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Delete generation by its id"""
-    result = delete_generation(id, db)
+    result = await delete_generation(id, db)
     if not result:
         logger.info(f"Invalid generation with ID: {id}")
         raise NotFoundException(detail=f"Invalid generation with ID: {id}")
 
     logger.info(f"Deleted generation with ID: {id}")
-    generations = get_all_generations(db)
-    generations_dict_list = [i.__dict__ for i in generations]
-    return generations_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[GenerationResponse])
-async def get_generations(db: Session = Depends(get_db)):
-    """Get all generations"""
-    generations = await get_all_generations(db)
-    generations_dict_list = [i.__dict__ for i in generations]
-    logger.info(f"Number of generations: {len(generations)}")
-    return generations_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_generations_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many generations by their ids, unknown ids are skipped"""
+    ids = await bulk_delete_generations(data.ids, db)
+    logger.info(f"Deleted {len(ids)} generations")
+    return {"ids": ids}
 
 
-@router.get("/base", response_model=List[GenerationResponse])
-async def get_base_generations(db: Session = Depends(get_db)):
-    """Get all base generations"""
-    generations = await get_all_base_generations(db)
-    generations_dict_list = [i.__dict__ for i in generations]
-    logger.info(f"Number of base generations: {len(generations)}")
-    return generations_dict_list
+@router.get("/", response_model=Page[GenerationResponse])
+async def get_generations(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of generations"""
+    generations = await get_generations_page(page.limit, page.after, db)
+    logger.info(f"Number of generations: {len(generations['items'])}")
+    return page_response(generations, GenerationResponse)
+
+
+@router.get("/base", response_model=Page[GenerationResponse])
+async def get_base_generations(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of base generations"""
+    generations = await get_base_generations_page(page.limit, page.after, db)
+    logger.info(f"Number of base generations: {len(generations['items'])}")
+    return page_response(generations, GenerationResponse)
 
 
 @router.post(
     "/check_video_type_exist", response_model=List[GenerationResponse]
 )
 async def get_video_type_exist(
-    generation: GenerationCheckTypeExist, db: Session = Depends(get_db)
+    generation: GenerationCheckTypeExist,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all base generations"""
     generations = await check_video_type_exist(
@@ -179,20 +247,26 @@ async def get_video_type_exist(
     return generations_dict_list
 
 
-@router.get("/get_by_user/", response_model=List[GenerationResponse])
+@router.get("/get_by_user/", response_model=Page[GenerationResponse])
 async def get_generations_by_user_id(
-    user_id: str, type: Optional[str] = None, db: Session = Depends(get_db)
+    user_id: str,
+    type: Optional[str] = None,
+    page: PageParams = Depends(),
+    fields: Optional[List[str]] = Depends(FieldsParams(GenerationResponse)),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get all generations by user id"""
+    """Get a page of generations by user id, only with the comma separated
+    fields when given"""
     # Validate user_id
-    if not validate_user_id(user_id, db):
+    if not await validate_user_id(user_id, db):
         logger.info(f"Invalid user with ID: {user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {user_id}")
 
-    generations = await get_all_generations_by_user(user_id, db, type)
-    generations_dict_list = [i.__dict__ for i in generations]
+    generations = await get_generations_page_by_user(
+        user_id, type, page.limit, page.after, db, fields
+    )
     logger.info(f"Get generations with user_id: {user_id}")
-    return generations_dict_list
+    return page_response(generations, GenerationResponse, fields)
 
 
 @router.post("/send/talking_head")
@@ -224,7 +298,8 @@ async def send_mlproxy_talkinghead(
 
 @router.post("/receive/talking_head")
 async def receive_mlproxy_talkinghead(
-    data: MLPInputAvatarGenerationSchema, db: Session = Depends(get_db)
+    data: MLPInputAvatarGenerationSchema,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Receive data from ML proxy to render video"""
     response_server = await receiveMLResponse(data.dict(), db)
@@ -1,26 +1,54 @@
 import os
-from typing import List
 import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
+from fastapi import APIRouter, Depends, File, Response, UploadFile, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.image_crud import (
+    bulk_delete_images,
     create_image,
     delete_image,
-    get_all_images,
-    get_all_images_by_user,
+    get_image_by_content_hash,
+    get_images_page,
+    get_images_page_by_user,
     read_image,
     update_image,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.image_model import Image
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
 from ..schemas.image_schema import ImageBaseSchema, ImageResponse, ImageUpdate
+from ..schemas.page_schema import Page, PageParams
+from ..schemas.s3_schema import PresignedDownload, PresignedUploadComplete
+from ..services.direct_upload import (
+    complete_upload,
+    presign_download,
+    read_uploaded_media_metadata,
+)
+from ..services.media_upload import (
+    discard_upload,
+    receive_upload,
+    remove_stored_uploads,
+    skip_duplicate_upload,
+    store_upload,
+)
 from ..services.validate_data import validate_user_id
-from ..utils.exception import InvalidFileType, NotFoundException
+from ..utils.exception import (
+    Conflict,
+    InvalidDestination,
+    InvalidFileType,
+    InvalidInput,
+    NotFoundException,
+)
 from ..utils.handle_file import validate_file_type
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -42,9 +70,10 @@ router.mount(
     response_model=ImageResponse,
 )
 async def add_image(
+    response: Response,
     image_data: ImageBaseSchema = Depends(),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create an image"""
     extension = validate_file_type(file, "image")
@@ -54,26 +83,127 @@ async def add_image(
         raise InvalidFileType(detail="Your upload file must be an image")
 
     # Validate user_id
-    if not validate_user_id(str(image_data.user_id), db):
+    if not await validate_user_id(str(image_data.user_id), db):
         logger.info(f"Invalid user with ID: {image_data.user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {image_data.user_id}")
 
-    # Add metada
-    file_content = await file.read()
-    size = len(file_content)
+    # Store the file and read its metadata in one pass over the upload
+    upload = await receive_upload(file, "image")
+
+    # The same content uploaded again by the user returns the existing image
+    existing_image = await get_image_by_content_hash(
+        str(image_data.user_id), upload["content_hash"], db
+    )
+    if existing_image:
+        skip_duplicate_upload(upload)
+        response.status_code = status.HTTP_200_OK
+        return existing_image.__dict__
+
     image: Image = Image(**image_data.dict())
+    image.id = uuid.uuid4()
     image.extension = extension
-    image.size = size
-    new_image = create_image(image, db)
+    image.size = upload["size"]
+    image.content_hash = upload["content_hash"]
+    image.width = upload["width"]
+    image.height = upload["height"]
+    try:
+        new_image = await create_image(image, db)
+    except IntegrityError:
+        # Uploaded at the same time by another request
+        await db.rollback()
+        existing_image = await get_image_by_content_hash(
+            str(image_data.user_id), upload["content_hash"], db
+        )
+        if existing_image is None:
+            # The conflict was on another constraint, or the other upload
+            # was deleted since
+            discard_upload(upload)
+            raise Conflict(
+                detail="The image conflicts with another upload, please retry"
+            )
+        skip_duplicate_upload(upload)
+        response.status_code = status.HTTP_200_OK
+        return existing_image.__dict__
+    except BaseException:
+        discard_upload(upload)
+        raise
+    store_upload(upload, "image", new_image.id, extension)
     logger.info(f"Created image name {new_image.file_name} with ID {new_image.id}")
 
     return new_image.__dict__
 
 
+@router.post(
+    "/create_from_s3/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ImageResponse,
+)
+async def add_image_from_s3(
+    response: Response,
+    upload: PresignedUploadComplete,
+    image_data: ImageBaseSchema = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create an image uploaded straight to S3 with /s3/presigned_upload/,
+    the upload is completed here"""
+    # Validate user_id
+    if not await validate_user_id(str(image_data.user_id), db):
+        logger.info(f"Invalid user with ID: {image_data.user_id}")
+        raise NotFoundException(
+            detail=f"Invalid user with ID: {image_data.user_id}"
+        )
+
+    if upload.user_id != image_data.user_id:
+        raise InvalidInput(
+            detail=f"The upload {upload.file_id} is not of the user {image_data.user_id}"
+        )
+
+    # The upload was completed before
+    existing_image = await read_image(str(upload.file_id), db)
+    if existing_image:
+        if existing_image.user_id != image_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_image.__dict__
+
+    res = await complete_upload(upload, "image")
+    if not res["status"]:
+        raise InvalidDestination(detail=res["message"])
+    metadata = await read_uploaded_media_metadata(
+        upload.bucket_name, upload.path
+    )
+
+    image: Image = Image(**image_data.dict())
+    image.id = upload.file_id
+    image.extension = res["extension"]
+    image.size = res["size"]
+    image.bucket_s3 = upload.bucket_name
+    image.path_s3 = upload.path
+    image.width = metadata["width"]
+    image.height = metadata["height"]
+    try:
+        new_image = await create_image(image, db)
+    except IntegrityError:
+        # Completed at the same time by another request
+        await db.rollback()
+        existing_image = await read_image(str(upload.file_id), db)
+        if existing_image is None or existing_image.user_id != image_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_image.__dict__
+    logger.info(f"Created image with ID {new_image.id} in S3")
+
+    return new_image.__dict__
+
+
 @router.get("/get/{id}", response_model=ImageResponse)
-async def get_image_by_id(id: str, db: Session = Depends(get_db)):
+async def get_image_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get an image by Id"""
-    image = read_image(id, db)
+    image = await read_image(id, db)
 
     if image is None:
         logger.info(f"Invalid image with ID: {id}")
@@ -82,26 +212,47 @@ async def get_image_by_id(id: str, db: Session = Depends(get_db)):
     return image.__dict__
 
 
-@router.get("/get_by_user/", response_model=List[ImageResponse])
-async def get_images_by_user_id(user_id: str, db: Session = Depends(get_db)):
+@router.get("/download_url/{id}", response_model=PresignedDownload)
+async def get_image_download_url(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
+    """Presigned URL to download the image straight from S3"""
+    image = await read_image(id, db)
+
+    if image is None:
+        logger.info(f"Invalid image with ID: {id}")
+        raise NotFoundException(detail=f"Invalid image with ID: {id}")
+    if not image.path_s3:
+        raise NotFoundException(detail=f"The image {id} is not stored in S3")
+
+    return await presign_download(image.bucket_s3, image.path_s3)
+
+
+@router.get("/get_by_user/", response_model=Page[ImageResponse])
+async def get_images_by_user_id(
+    user_id: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get an image by user id"""
     # Validate user_id
-    if not validate_user_id(user_id, db):
+    if not await validate_user_id(user_id, db):
         logger.info(f"Invalid user with ID: {user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {user_id}")
 
-    images = get_all_images_by_user(user_id, db)
-    images_dict_list = [i.__dict__ for i in images]
+    images = await get_images_page_by_user(
+        user_id, page.limit, page.after, db
+    )
     logger.info(f"Get images with user_iD: {user_id}")
-    return images_dict_list
+    return page_response(images, ImageResponse)
 
 
 @router.put("/update/{id}", response_model=ImageResponse)
 async def update_image_by_id(
-    id: str, image: ImageUpdate, db: Session = Depends(get_db)
+    id: str, image: ImageUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """Update an image file_name by its id"""
-    image = update_image(id, image, db)
+    image = await update_image(id, image, db)
     if image is None:
         logger.info(f"Invalid image with ID: {id}")
         raise NotFoundException(detail=f"Invalid image with ID: {id}")
@@ -110,24 +261,37 @@ async def update_image_by_id(
     return image.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[ImageResponse])
-async def delete_image_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_image_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Delete an image by its id"""
-    result = delete_image(id, db)
-    if not result:
+    deleted = await delete_image(id, db)
+    if deleted is None:
         logger.info(f"Invalid image with ID: {id}")
         raise NotFoundException(detail=f"Invalid image with ID: {id}")
 
+    remove_stored_uploads("image", [deleted])
     logger.info(f"Deleted image with ID: {id}")
-    images = get_all_images(db)
-    images_dict_list = [i.__dict__ for i in images]
-    return images_dict_list
-
-
-@router.get("/", response_model=List[ImageResponse])
-async def get_images(db: Session = Depends(get_db)):
-    """Get all images"""
-    images = get_all_images(db)
-    images_dict_list = [i.__dict__ for i in images]
-    logger.info(f"Number of images: {len(images)}")
-    return images_dict_list
+    return {"id": id}
+
+
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_images_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many images by their ids, unknown ids are skipped"""
+    deleted = await bulk_delete_images(data.ids, db)
+    remove_stored_uploads("image", deleted)
+    logger.info(f"Deleted {len(deleted)} images")
+    return {"ids": [file_id for file_id, _ in deleted]}
+
+
+@router.get("/", response_model=Page[ImageResponse])
+async def get_images(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of images"""
+    images = await get_images_page(page.limit, page.after, db)
+    logger.info(f"Number of images: {len(images['items'])}")
+    return page_response(images, ImageResponse)
@@ -1,26 +1,34 @@
 import os
 import uuid
-from typing import List, Optional
+from typing import Optional
 
 from fastapi import APIRouter, Depends, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.interview_session_crud import (
+    bulk_delete_interview_sessions,
     create_interview_session,
     delete_interview_session,
-    get_all_interview_sessions,
-    get_all_interview_sessions_by_cv_and_jd,
+    get_interview_sessions_page,
+    get_interview_sessions_page_by_cv_and_jd,
     read_interview_session,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.interview_session_model import Interview_session
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
 from ..schemas.interview_session_schema import (
     Interview_sessionBaseSchema,
     Interview_sessionResponse,
 )
+from ..schemas.page_schema import Page, PageParams
 from ..utils.exception import NotFoundException
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -45,7 +53,7 @@ router.mount(
 )
 async def add_interview_session(
     interview_session_data: Interview_sessionBaseSchema = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create the interview_session"""
     interview_session: Interview_session = Interview_session(
@@ -61,7 +69,9 @@ async def add_interview_session(
 
 
 @router.get("/get/{id}", response_model=Interview_sessionResponse)
-async def get_interview_session_by_id(id: str, db: Session = Depends(get_db)):
+async def get_interview_session_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Get the interview_session by its id"""
     interview_session = await read_interview_session(id, db)
 
@@ -75,12 +85,12 @@ async def get_interview_session_by_id(id: str, db: Session = Depends(get_db)):
     return interview_session.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[Interview_sessionResponse])
+@router.get("/delete/{id}", response_model=DeleteResponse)
 async def delete_interview_session_by_id(
-    id: str, db: Session = Depends(get_db)
+    id: str, db: AsyncSession = Depends(get_async_db)
 ):
     """Delete interview_session by its id"""
-    result = delete_interview_session(id, db)
+    result = await delete_interview_session(id, db)
     if not result:
         logger.info(f"Invalid interview_session with ID: {id}")
         raise NotFoundException(
@@ -88,30 +98,45 @@ async def delete_interview_session_by_id(
         )
 
     logger.info(f"Deleted interview_session with ID: {id}")
-    interview_sessions = get_all_interview_sessions(db)
-    interview_sessions_dict_list = [i.__dict__ for i in interview_sessions]
-    return interview_sessions_dict_list
+    return {"id": id}
+
+
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_interview_sessions_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many interview_sessions by their ids, unknown ids are skipped"""
+    ids = await bulk_delete_interview_sessions(data.ids, db)
+    logger.info(f"Deleted {len(ids)} interview_sessions")
+    return {"ids": ids}
 
 
-@router.get("/", response_model=List[Interview_sessionResponse])
-async def get_interview_sessions(db: Session = Depends(get_db)):
-    """Get all interview_sessions"""
-    interview_sessions = get_all_interview_sessions(db)
-    interview_sessions_dict_list = [i.__dict__ for i in interview_sessions]
-    logger.info(f"Number of interview_sessions: {len(interview_sessions)}")
-    return interview_sessions_dict_list
+@router.get("/", response_model=Page[Interview_sessionResponse])
+async def get_interview_sessions(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of interview_sessions"""
+    interview_sessions = await get_interview_sessions_page(
+        page.limit, page.after, db
+    )
+    logger.info(
+        f"Number of interview_sessions: {len(interview_sessions['items'])}"
+    )
+    return page_response(interview_sessions, Interview_sessionResponse)
 
 
 @router.get(
-    "/get_by_cv_and_jd/", response_model=List[Interview_sessionResponse]
+    "/get_by_cv_and_jd/", response_model=Page[Interview_sessionResponse]
 )
 async def get_interview_sessions_by_cv_and_jd(
-    cv_id: str, jd_id: str, db: Session = Depends(get_db)
+    cv_id: str,
+    jd_id: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get all interview_sessions by user id"""
-    interview_sessions = get_all_interview_sessions_by_cv_and_jd(
-        cv_id, jd_id, db
+    """Get a page of interview_sessions by cv and jd"""
+    interview_sessions = await get_interview_sessions_page_by_cv_and_jd(
+        cv_id, jd_id, page.limit, page.after, db
     )
-    interview_sessions_dict_list = [i.__dict__ for i in interview_sessions]
     logger.info(f"Get interview_sessions with cv_id {cv_id} and jd_id {jd_id}")
-    return interview_sessions_dict_list
+    return page_response(interview_sessions, Interview_sessionResponse)
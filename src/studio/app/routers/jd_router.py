@@ -1,23 +1,30 @@
 import os
-from typing import List
 
 from fastapi import APIRouter, Depends, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.jd_crud import (
+    bulk_delete_jds,
     create_jd,
     delete_jd,
-    get_all_jds,
-    get_all_jds_by_title,
+    get_jds_page,
+    get_jds_page_by_title,
     read_jd,
     update_jd,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.jd_model import JD
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
 from ..schemas.jd_schema import JDBaseSchema, JDResponse, JDUpdate
+from ..schemas.page_schema import Page, PageParams
 from ..utils.exception import NotFoundException
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -40,7 +47,7 @@ router.mount(
 )
 async def add_jd(
     jd_data: JDBaseSchema = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create the jd"""
     jd: JD = JD(**jd_data.dict())
@@ -50,9 +57,11 @@ async def add_jd(
 
 
 @router.put("/update/", response_model=JDResponse)
-async def update_jd_by_id(jd: JDUpdate, db: Session = Depends(get_db)):
+async def update_jd_by_id(
+    jd: JDUpdate, db: AsyncSession = Depends(get_async_db)
+):
     """update the jd by its id"""
-    jd_obj = update_jd(jd.dict(), db)
+    jd_obj = await update_jd(jd.dict(), db)
     if jd_obj is None:
         logger.info(f"Invalid JD with ID: {jd.id}")
         raise NotFoundException(detail=f"Invalid JD with ID: {jd.id}")
@@ -62,7 +71,7 @@ async def update_jd_by_id(jd: JDUpdate, db: Session = Depends(get_db)):
 
 
 @router.get("/get/{id}", response_model=JDResponse)
-async def get_jd_by_id(id: str, db: Session = Depends(get_db)):
+async def get_jd_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the jd by its id"""
     jd = await read_jd(id, db)
 
@@ -74,33 +83,45 @@ async def get_jd_by_id(id: str, db: Session = Depends(get_db)):
     return jd.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[JDResponse])
-async def delete_jd_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_jd_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete jd by its id"""
-    result = delete_jd(id, db)
+    result = await delete_jd(id, db)
     if not result:
         logger.info(f"Invalid JD with ID: {id}")
         raise NotFoundException(detail=f"Invalid JD with ID: {id}")
 
     logger.info(f"Deleted jd with ID: {id}")
-    jds = get_all_jds(db)
-    jds_dict_list = [i.__dict__ for i in jds]
-    return jds_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[JDResponse])
-async def get_jds(db: Session = Depends(get_db)):
-    """Get all jds"""
-    jds = get_all_jds(db)
-    jds_dict_list = [i.__dict__ for i in jds]
-    logger.info(f"Number of JDs: {len(jds)}")
-    return jds_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_jds_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many jds by their ids, unknown ids are skipped"""
+    ids = await bulk_delete_jds(data.ids, db)
+    logger.info(f"Deleted {len(ids)} jds")
+    return {"ids": ids}
 
 
-@router.get("/get_by_title/", response_model=List[JDResponse])
-async def get_jds_by_title(title: str, db: Session = Depends(get_db)):
-    """Get all jds by title"""
-    jds = get_all_jds_by_title(title, db)
-    jds_dict_list = [i.__dict__ for i in jds]
+@router.get("/", response_model=Page[JDResponse])
+async def get_jds(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of jds"""
+    jds = await get_jds_page(page.limit, page.after, db)
+    logger.info(f"Number of JDs: {len(jds['items'])}")
+    return page_response(jds, JDResponse)
+
+
+@router.get("/get_by_title/", response_model=Page[JDResponse])
+async def get_jds_by_title(
+    title: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get a page of jds by title"""
+    jds = await get_jds_page_by_title(title, page.limit, page.after, db)
     logger.info(f"Get JD with title: {title}")
-    return jds_dict_list
+    return page_response(jds, JDResponse)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from ..utils.metrics import get_metrics
+
+router = APIRouter()
+
+
+@router.get("/")
+async def read_metrics():
+    """Get the counters, timings and gauges of this worker"""
+    return get_metrics()
@@ -1,33 +1,39 @@
 import os
-import uuid
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.cv_crud import read_cv
-from ..crud.generation_crud import create_generation, get_all_base_generations
 from ..crud.interview_session_crud import (
     create_interview_session,
+    read_interview_session,
+    update_interview_session,
 )
 from ..crud.jd_crud import read_jd
 from ..crud.question_crud import (
+    bulk_delete_questions,
     create_question,
     delete_question,
-    get_all_questions,
-    get_all_questions_by_interview_session_id,
-    get_all_questions_by_interviewer_id_and_interview_session_id,
+    get_questions_page,
+    get_questions_page_by_interview_session_id,
     read_question,
     update_question,
 )
-from ..crud.text_crud import create_text, get_all_texts_by_parent_id
-from ..db.database import get_db
-from ..models.generation_model import Generation
+from ..db.database import get_async_db
 from ..models.interview_session_model import Interview_session
 from ..models.question_model import Question
-from ..models.text_model import Text
-from ..schemas.mlp_questiongeneration_schema import QuestionGenerationContents
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
+from ..schemas.mlp_questiongeneration_schema import (
+    QuestionGenerationContents,
+    QuestionGenerationStatus,
+)
+from ..schemas.page_schema import FieldsParams, Page, PageParams
 from ..schemas.question_schema import (
     QuestionBaseSchema,
     QuestionResponse,
@@ -35,19 +41,16 @@ from ..schemas.question_schema import (
     QuestionSelectionPipelineInput,
     QuestionSelectionPipelineOutput,
 )
-from ..utils.exception import NotFoundException
-from ..utils.logger import setup_logger
-from ..utils.mlp_api import (
-    handle_return_mlp_avatargeneration,
-    handle_send_question_generation,
-    handle_send_question_selection,
-)
-from ..utils.question_selection_utils import (
-    createQuestionObjectDict,
-    createAskedQuestionObjectDict,
-    createQuestionBankDict,
-    createMLInput,
+from ..services.question_generation import run_question_generation
+from ..services.question_selection import (
+    forget_interview_sessions,
+    select_next_question,
 )
+from ..utils.exception import NotFoundException, ServiceUnavailable
+from ..utils.job_queue import JobQueueFull, enqueue_job, get_job_progress
+from ..utils.logger import setup_logger
+from ..utils.resilience import RETRYABLE_ERRORS, CircuitOpen
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -72,7 +75,7 @@ router.mount(
 )
 async def add_question(
     question_data: QuestionBaseSchema = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create the question"""
     question: Question = Question(**question_data.dict())
@@ -83,22 +86,25 @@ async def add_question(
 
 @router.put("/update/", response_model=QuestionResponse)
 async def update_question_by_id(
-    question: QuestionUpdate, db: Session = Depends(get_db)
+    question: QuestionUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """update the question by its id"""
-    question_obj = update_question(question.dict(), db)
+    question_obj = await update_question(question.dict(), db)
     if question_obj is None:
         logger.info(f"Invalid question with ID: {question.id}")
         raise NotFoundException(
             detail=f"Invalid question with ID: {question.id}"
         )
+    forget_interview_sessions([question_obj.interview_session_id])
 
     logger.info(f"Update question with ID: {question_obj.id}")
     return question_obj.__dict__
 
 
 @router.get("/get/{id}", response_model=QuestionResponse)
-async def get_question_by_id(id: str, db: Session = Depends(get_db)):
+async def get_question_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Get the question by its id"""
     question = await read_question(id, db)
 
@@ -110,51 +116,74 @@ async def get_question_by_id(id: str, db: Session = Depends(get_db)):
     return question.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[QuestionResponse])
-async def delete_question_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_question_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Delete question by its id"""
-    result = delete_question(id, db)
-    if not result:
+    interview_session_id = await delete_question(id, db)
+    if interview_session_id is None:
         logger.info(f"Invalid question with ID: {id}")
         raise NotFoundException(detail=f"Invalid question with ID: {id}")
+    forget_interview_sessions([interview_session_id])
 
     logger.info(f"Deleted question with ID: {id}")
-    questions = get_all_questions(db)
-    questions_dict_list = [i.__dict__ for i in questions]
-    return questions_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[QuestionResponse])
-async def get_questions(db: Session = Depends(get_db)):
-    """Get all questions"""
-    questions = get_all_questions(db)
-    questions_dict_list = [i.__dict__ for i in questions]
-    logger.info(f"Number of questions: {len(questions)}")
-    return questions_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_questions_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many questions by their ids, unknown ids are skipped"""
+    deleted = await bulk_delete_questions(data.ids, db)
+    forget_interview_sessions(
+        {interview_session_id for _, interview_session_id in deleted}
+    )
+    logger.info(f"Deleted {len(deleted)} questions")
+    return {"ids": [question_id for question_id, _ in deleted]}
+
+
+@router.get("/", response_model=Page[QuestionResponse])
+async def get_questions(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of questions"""
+    questions = await get_questions_page(page.limit, page.after, db)
+    logger.info(f"Number of questions: {len(questions['items'])}")
+    return page_response(questions, QuestionResponse)
 
 
 @router.get(
-    "/get_by_interview_session/", response_model=List[QuestionResponse]
+    "/get_by_interview_session/", response_model=Page[QuestionResponse]
 )
 async def get_questions_by_interview_session(
-    interview_session_id: str, db: Session = Depends(get_db)
+    interview_session_id: str,
+    page: PageParams = Depends(),
+    fields: Optional[List[str]] = Depends(FieldsParams(QuestionResponse)),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get all questions by interview session id"""
-    questions = get_all_questions_by_interview_session_id(
-        interview_session_id, db
+    """Get a page of questions by interview session id, only with the
+    comma separated fields when given"""
+    questions = await get_questions_page_by_interview_session_id(
+        interview_session_id, page.limit, page.after, db, fields
     )
-    questions_dict_list = [i.__dict__ for i in questions]
     logger.info(
         f"Get questions with interview_session_id {interview_session_id}"
     )
-    return questions_dict_list
+    return page_response(questions, QuestionResponse, fields)
 
 
-@router.post("/send/question_generation")
+@router.post(
+    "/send/question_generation",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=QuestionGenerationStatus,
+)
 async def send_mlproxy_questiongeneration(
-    data: QuestionGenerationContents = Depends(), db: Session = Depends(get_db)
+    data: QuestionGenerationContents = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Send message to ML proxy to generate questions"""
+    """Enqueue the question generation of a new interview session"""
     # Get the id of CV
     get_cv = await read_cv(data.cv_id, db)
     if not get_cv:
@@ -163,11 +192,15 @@ async def send_mlproxy_questiongeneration(
 
     # get the texts of JD
     get_jd = await read_jd(data.jd_id, db)
+    if not get_jd:
+        logger.info(f"Invalid jd with ID: {data.jd_id}")
+        raise NotFoundException(detail=f"Invalid jd with ID: {data.jd_id}")
 
     # Create interview sessio Object
     new_interview_session_data = {
         "cv_id": data.cv_id,
         "jd_id": data.jd_id,
+        "status": "pending",
     }
     new_interview_session_obj: Interview_session = Interview_session(
         **new_interview_session_data
@@ -176,144 +209,74 @@ async def send_mlproxy_questiongeneration(
         new_interview_session_obj, db
     )
 
-    if not get_jd:
-        logger.info(f"Invalid jd with ID: {data.jd_id}")
-        raise NotFoundException(detail=f"Invalid jd with ID: {data.jd_id}")
+    # Generate the questions in the background
+    try:
+        enqueue_job(interview_session.id, run_question_generation, data)
+    except JobQueueFull:
+        await update_interview_session(
+            {"id": interview_session.id, "status": "failed"}, db
+        )
+        logger.info("Question generation queue is full")
+        raise ServiceUnavailable(
+            detail="Too many question generations, please retry later"
+        )
 
-    # get the list of texts following jd_id
-    jd_texts = get_all_texts_by_parent_id(data.jd_id, db)
-    texts = [jd_text.text for jd_text in jd_texts]
-
-    # Get the list of questions from ML
-    input_data_question_generation = {
-        "task_id": interview_session.id,
-        "cv_url": {
-            "bucket": data.bucket_name,
-            "key_file": f"{data.path}/application/{get_cv.user_id}/{data.cv_id}.pdf",
-        },
-        "jd_texts": texts,
+    logger.info(
+        f"Enqueued question generation of session {interview_session.id}"
+    )
+    return {
+        "interview_session_id": interview_session.id,
+        "status": interview_session.status,
     }
-    response_data = await handle_send_question_generation(
-        input_data_question_generation
+
+
+@router.get(
+    "/question_generation/status/{interview_session_id}",
+    response_model=QuestionGenerationStatus,
+)
+async def get_questiongeneration_status(
+    interview_session_id: str, db: AsyncSession = Depends(get_async_db)
+):
+    """Get the status and progress of the question generation"""
+    interview_session = await read_interview_session(
+        interview_session_id, db
     )
+    if interview_session is None:
+        logger.info(
+            f"Invalid interview_session with ID: {interview_session_id}"
+        )
+        raise NotFoundException(
+            detail=f"Invalid interview_session with ID: {interview_session_id}"
+        )
 
-    questions = response_data["questions"]
-    cv_texts = response_data["cv_texts"]
-
-    # Get all generation base videos (Base videos mean all generated videos will depends on those)
-    base_avatar_generations = await get_all_base_generations(db)
-
-    base_avatar_generations_list = [
-        {k: v for k, v in gen.__dict__.items() if not k.startswith("_")}
-        for gen in base_avatar_generations
-    ]
-
-    # Loop thourgh base avatar generation videos
-    for generation_base in base_avatar_generations_list:
-        generation_data = generation_base
-        generation_data["type"] = "generated"
-
-        # Loop through questions and create generation schema
-        for question in questions:
-            uuid_value = uuid.uuid4()
-            generation_data["id"] = uuid_value
-            generation_object: Generation = Generation(**generation_data)
-            new_generation_question = await create_generation(
-                generation_object, db, generation_data
-            )
-            # Generate avatar based on question
-            input_data = {"task_id": uuid_value}
-            if generation_object.video_id:
-                video_url = {}
-                video_url["bucket"] = new_generation_question.bucket_s3
-                video_url[
-                    "key_file"
-                ] = f"server-test-01/video/${new_generation_question.user_id}/${new_generation_question.video_id}.mp4"
-                input_data["video_url"] = video_url
-
-            if generation_object.audio_id:
-                audio_url = {}
-                audio_url["bucket"] = new_generation_question.bucket_s3
-                audio_url[
-                    "key_file"
-                ] = f"server-test-01/audio/${new_generation_question.user_id}/${new_generation_question.audio_id}.wav"
-                input_data["audio_url"] = audio_url
-
-            if generation_object.image_id:
-                image_url = {}
-                image_url["bucket"] = new_generation_question.bucket_s3
-                image_url[
-                    "key_file"
-                ] = f"server-test-01/image/${new_generation_question.user_id}/${new_generation_question.image_id}.jpg"
-                input_data["image_url"] = image_url
-
-            input_data["text"] = question["question"]
-            return_mlp = await handle_return_mlp_avatargeneration(
-                input_data, input_data, db
-            )
-
-            # Add question into db
-            new_question_data = {
-                "avatar_generation_id": return_mlp["id"],
-                "cv_id": data.cv_id,
-                "jd_id": data.jd_id,
-                "question_context": question["question"],
-                "topic": question["topic"],
-                "interview_session_id": interview_session.id,
-            }
-            new_question_obj: Question = Question(**new_question_data)
-            new_question = await create_question(new_question_obj, db)
-            # Create ground truth texts from list of ground truths in Question
-            ground_truths = question["ground_truths"]
-            for gt in ground_truths:
-                text: Text = Text(**{"text": gt, "parent_id": new_question.id})
-                new_text = await create_text(text, db)
-                logger.info(f"Created text with ID {new_text.id}")
-
-    for cv_text in cv_texts:
-        new_text_data_by_cv_data = {"parent_id": get_cv.id, "text": cv_text}
-        new_text_data_by_cv_obj: Text = Text(**new_text_data_by_cv_data)
-        await create_text(new_text_data_by_cv_obj, db)
-
-    return {"interview_session_id": interview_session.id}
+    # The progress is only known by the worker process running the job
+    progress = get_job_progress(interview_session_id) or {}
+    return {
+        **progress,
+        "interview_session_id": interview_session.id,
+        "status": interview_session.status,
+    }
 
 
 @router.post(
     "/send/question_selection", response_model=QuestionSelectionPipelineOutput
 )
 async def send_mlproxy_questionselection(
-    data: QuestionSelectionPipelineInput, db: Session = Depends(get_db)
+    data: QuestionSelectionPipelineInput,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Read the question base on the question id
-    input_question = await read_question(data.question_id, db)
-
-    # Update the question attr is_used
-    updated_input_question_dict = {
-        k: v
-        for k, v in input_question.__dict__.items()
-        if not k.startswith("_")
-    }
-    updated_input_question_dict["is_used"] = True
-    updated_input_question_dict["is_answered"] = data.is_answered
-    updated_input_question = update_question(updated_input_question_dict, db)
-
-    # Create an askedQuestion
-    asked_question = createAskedQuestionObjectDict(updated_input_question)
-
-    # Create Question
-    question = createQuestionObjectDict(updated_input_question)
-    
-    # Get the question bank base on interview session
-    question_bank_obj = (
-        await get_all_questions_by_interviewer_id_and_interview_session_id(
-            data.interviewer_id, data.interview_session_id, db
+    """Mark the answered question as asked and select the next question"""
+    try:
+        next_question = await select_next_question(data, db)
+    except (*RETRYABLE_ERRORS, CircuitOpen):
+        # Only raised when the local selector has no question left either
+        logger.info("Question selection is unavailable")
+        raise ServiceUnavailable(
+            detail="Question selection is unavailable, please retry later"
         )
-    )
-
-    # Create a question bank for ML
-    question_bank_dict = createQuestionBankDict(question_bank_obj)
-
-    # Create ML input data
-    ml_input_data = createMLInput(question_bank_dict, asked_question)
-    return_ml_data = await handle_send_question_selection(ml_input_data)
-    return return_ml_data
+    if next_question is None:
+        logger.info(f"Invalid question with ID: {data.question_id}")
+        raise NotFoundException(
+            detail=f"Invalid question with ID: {data.question_id}"
+        )
+    return next_question
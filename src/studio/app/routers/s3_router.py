@@ -1,13 +1,41 @@
 import os
+from typing import Optional
 
-from fastapi import APIRouter, File, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, File, Header, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from ..schemas.s3_schema import S3ResponseModel
-from ..utils.exception import InvalidDestination, InvalidFileType
-from ..utils.handle_file import save_to_FS, validate_file_type
-from ..utils.s3_client import download_convert_file, download_file, upload_file
+from ..schemas.s3_schema import (
+    PresignedDownload,
+    PresignedUpload,
+    PresignedUploadComplete,
+    PresignedUploadRequest,
+    S3ResponseModel,
+    UploadedFile,
+)
+from ..services.direct_upload import (
+    complete_upload,
+    presign_download,
+    presign_upload,
+)
+from ..utils.exception import (
+    InvalidDestination,
+    InvalidFileType,
+    RangeNotSatisfiable,
+    ServiceUnavailable,
+)
+from ..utils.handle_file import (
+    save_to_FS,
+    validate_content_type,
+    validate_file_type,
+)
+from ..utils.s3_client import (
+    download_convert_file,
+    download_file,
+    iter_file_stream,
+    open_file_stream,
+    upload_file,
+)
 
 router = APIRouter()
 # Serve static files
@@ -37,7 +65,7 @@ async def upload_s3(
         raise InvalidFileType(detail=f"Your upload file must be a {type}")
 
     res = await upload_file(
-        file.file,
+        file,
         bucket_name,
         path,
         type,
@@ -64,12 +92,93 @@ async def download_s3(bucket_name: str, path: str, task_id: str):
 
 
 @router.get("/get_binary/")
-async def get_binary(bucket_name: str, path: str, type: str):
-    res = await download_file(bucket_name, path)
-    return Response((res["file_content"]), media_type=f"{type}/*")
+async def get_binary(
+    bucket_name: str,
+    path: str,
+    type: str,
+    range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Stream the file from s3, a Range header returns only that part.
+    Prefetched videos are streamed from the local video cache."""
+    res = await open_file_stream(
+        bucket_name, path, range, if_none_match, cached=type == "video"
+    )
+    if not res["status"]:
+        if res.get("status_code") == 304:
+            return Response(status_code=304, headers={"ETag": res["etag"]})
+        if res.get("status_code") == 416:
+            raise RangeNotSatisfiable(detail=res["message"])
+        raise InvalidDestination(detail=res["message"])
+
+    file_object = res["file_object"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(file_object["ContentLength"]),
+        "ETag": file_object["ETag"],
+    }
+    status_code = 200
+    if file_object.get("ContentRange"):
+        headers["Content-Range"] = file_object["ContentRange"]
+        status_code = 206
+    return StreamingResponse(
+        iter_file_stream(file_object["Body"]),
+        status_code=status_code,
+        media_type=f"{type}/*",
+        headers=headers,
+    )
 
 
 @router.get("/get_binary_video_convert_codecs/")
 async def get_binary_video_convert_codecs(bucket_name: str, path: str, type: str):
+    """Stream the file from s3 with converted codecs, conversions are cached"""
     res = await download_convert_file(bucket_name, path)
-    return Response((res["file_content"]), media_type=f"{type}/*")
+    if not res["status"]:
+        if res.get("busy"):
+            raise ServiceUnavailable(detail=res["message"])
+        raise InvalidDestination(detail=res["message"])
+    headers = {}
+    if res["content_length"] is not None:
+        headers["Content-Length"] = str(res["content_length"])
+    return StreamingResponse(
+        res["stream"], media_type=f"{type}/*", headers=headers
+    )
+
+
+@router.post("/presigned_upload/", response_model=PresignedUpload)
+async def create_presigned_upload(data: PresignedUploadRequest):
+    """Presigned URLs to upload a file straight to S3 under the same key as
+    /upload_s3/, in parts when it is larger than one part. The upload is
+    completed with /presigned_upload/complete/ or the create_from_s3
+    endpoint of the media."""
+    extension = validate_content_type(data.content_type, data.type)
+    if not extension:
+        raise InvalidFileType(detail=f"Your upload file must be a {data.type}")
+
+    res = await presign_upload(
+        data.bucket_name,
+        data.path,
+        data.type,
+        str(data.user_id),
+        data.content_type,
+        extension,
+        data.size,
+    )
+    if not res["status"]:
+        raise InvalidDestination(detail=res["message"])
+    return res
+
+
+@router.post("/presigned_upload/complete/", response_model=UploadedFile)
+async def complete_presigned_upload(data: PresignedUploadComplete, type: str):
+    """Complete a presigned upload, returns the size of the uploaded file"""
+    res = await complete_upload(data, type)
+    if not res["status"]:
+        raise InvalidDestination(detail=res["message"])
+    return {"bucket_name": data.bucket_name, "path": data.path, **res}
+
+
+@router.get("/presigned_download/", response_model=PresignedDownload)
+async def create_presigned_download(bucket_name: str, path: str):
+    """Presigned URL to download the file straight from S3"""
+    return await presign_download(bucket_name, path)
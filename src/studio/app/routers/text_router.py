@@ -3,21 +3,30 @@ from typing import List
 
 from fastapi import APIRouter, Depends, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.text_crud import (
+    bulk_delete_texts,
     create_text,
     delete_text,
-    get_all_texts,
     get_all_texts_by_parent_id,
+    get_texts_page,
+    get_texts_page_by_parent_id,
     read_text,
     update_text,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.text_model import Text
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
+from ..schemas.page_schema import Page, PageParams
 from ..schemas.text_schema import TextBaseSchema, TextResponse, TextUpdate
 from ..utils.exception import NotFoundException
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -40,7 +49,7 @@ router.mount(
 )
 async def add_text(
     text_data: TextBaseSchema = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create the text"""
     text: Text = Text(**text_data.dict())
@@ -56,7 +65,7 @@ async def add_text(
 )
 async def add_text_from_paragraph(
     text_data: TextBaseSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Split the paragraph"""
     text_list = list(filter(bool, text_data.text.split("\n")))
@@ -68,15 +77,17 @@ async def add_text_from_paragraph(
         new_text = await create_text(text, db)
         logger.info(f"Created text with ID {new_text.id}")
 
-    texts = get_all_texts_by_parent_id(text_data.parent_id, db)
+    texts = await get_all_texts_by_parent_id(text_data.parent_id, db)
     texts_dict_list = [i.__dict__ for i in texts]
     return texts_dict_list
 
 
 @router.put("/update/", response_model=TextResponse)
-async def update_text_by_id(text: TextUpdate, db: Session = Depends(get_db)):
+async def update_text_by_id(
+    text: TextUpdate, db: AsyncSession = Depends(get_async_db)
+):
     """update the text by its id"""
-    text_obj = update_text(text.dict(), db)
+    text_obj = await update_text(text.dict(), db)
     if text_obj is None:
         logger.info(f"Invalid text with ID: {text.id}")
         raise NotFoundException(detail=f"Invalid text with ID: {text.id}")
@@ -86,7 +97,7 @@ async def update_text_by_id(text: TextUpdate, db: Session = Depends(get_db)):
 
 
 @router.get("/get/{id}", response_model=TextResponse)
-async def get_text_by_id(id: str, db: Session = Depends(get_db)):
+async def get_text_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the text by its id"""
     text = await read_text(id, db)
 
@@ -98,33 +109,47 @@ async def get_text_by_id(id: str, db: Session = Depends(get_db)):
     return text.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[TextResponse])
-async def delete_text_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_text_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete text by its id"""
-    result = delete_text(id, db)
+    result = await delete_text(id, db)
     if not result:
         logger.info(f"Invalid text with ID: {id}")
         raise NotFoundException(detail=f"Invalid text with ID: {id}")
 
     logger.info(f"Deleted text with ID: {id}")
-    texts = get_all_texts(db)
-    texts_dict_list = [i.__dict__ for i in texts]
-    return texts_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[TextResponse])
-async def get_texts(db: Session = Depends(get_db)):
-    """Get all texts"""
-    texts = get_all_texts(db)
-    texts_dict_list = [i.__dict__ for i in texts]
-    logger.info(f"Number of texts: {len(texts)}")
-    return texts_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_texts_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many texts by their ids, unknown ids are skipped"""
+    ids = await bulk_delete_texts(data.ids, db)
+    logger.info(f"Deleted {len(ids)} texts")
+    return {"ids": ids}
 
 
-@router.get("/get_by_parent_id/", response_model=List[TextResponse])
-async def get_texts_by_parent_id(parent_id: str, db: Session = Depends(get_db)):
-    """Get all texts by parent_id"""
-    texts = get_all_texts_by_parent_id(parent_id, db)
-    texts_dict_list = [i.__dict__ for i in texts]
+@router.get("/", response_model=Page[TextResponse])
+async def get_texts(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of texts"""
+    texts = await get_texts_page(page.limit, page.after, db)
+    logger.info(f"Number of texts: {len(texts['items'])}")
+    return page_response(texts, TextResponse)
+
+
+@router.get("/get_by_parent_id/", response_model=Page[TextResponse])
+async def get_texts_by_parent_id(
+    parent_id: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get a page of texts by parent_id"""
+    texts = await get_texts_page_by_parent_id(
+        parent_id, page.limit, page.after, db
+    )
     logger.info(f"Get text with jd_id: {parent_id}")
-    return texts_dict_list
+    return page_response(texts, TextResponse)
@@ -1,18 +1,25 @@
 import os
-from typing import List, Optional
+from typing import Optional
 import uuid
 
-from ..crud.user_crud import create_user,read_user,delete_user,get_users
+from ..crud.user_crud import create_user, read_user, delete_user, get_users_page, bulk_delete_users
 from fastapi import APIRouter, Depends, status, Body
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.user_model import User
 from ..services.validate_input import validate_input_included
 from ..utils.exception import NotFoundException, InvalidInput
+from ..schemas.delete_schema import (
+	BulkDeleteRequest,
+	BulkDeleteResponse,
+	DeleteResponse,
+)
+from ..schemas.page_schema import Page, PageParams
 from ..schemas.user_schema import UserBaseSchema, UserResponse
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -35,11 +42,11 @@ router.mount(
 )
 async def register_user(
 	user_data: UserBaseSchema,
-	db: Session = Depends(get_db),
+	db: AsyncSession = Depends(get_async_db),
 ):
 	"""Create an User"""
 	user: User = User(**user_data.dict())
-	new_user = create_user(user, db)
+	new_user = await create_user(user, db)
 
 	# Check if the type input is valid
 	isValid = validate_input_included(new_user.role, ["interviewer", "interviewee"])
@@ -54,10 +61,11 @@ async def register_user(
 
 	return new_user.__dict__
 
+
 @router.get("/{id}", response_model=UserResponse)
-async def get_user_by_id(id: str, db: Session = Depends(get_db)):
+async def get_user_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
 	"""Get the user by its id"""
-	user = read_user(id, db)
+	user = await read_user(id, db)
 
 	if user is None:
 			logger.info(f"Invalid user with ID: {id}")
@@ -67,23 +75,35 @@ async def get_user_by_id(id: str, db: Session = Depends(get_db)):
 	return user.__dict__
 
 
-@router.delete("/{id}", response_model=List[UserResponse])
-async def delete_user_by_id(id: str, db: Session = Depends(get_db)):
+@router.delete("/{id}", response_model=DeleteResponse)
+async def delete_user_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
 	"""Delete user by its id"""
-	result = delete_user(id, db)
+	result = await delete_user(id, db)
 	if not result:
 			logger.info(f"Invalid user with ID: {id}")
 			raise NotFoundException(detail=f"Invalid user with ID: {id}")
 
 	logger.info(f"Deleted user with ID: {id}")
-	users = get_all_users(db)
-	users_dict_list = [i.__dict__ for i in users]
-	return users_dict_list
+	return {"id": id}
+
+
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_users_by_ids(
+	data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+	"""Delete many users by their ids, unknown ids are skipped"""
+	ids = await bulk_delete_users(data.ids, db)
+	logger.info(f"Deleted {len(ids)} users")
+	return {"ids": ids}
 
 
-@router.get("", response_model=List[UserResponse])
-async def get_all_users(role: Optional[str] = None, db: Session = Depends(get_db)):
-	"""Get all users"""
+@router.get("", response_model=Page[UserResponse])
+async def get_all_users(
+	role: Optional[str] = None,
+	page: PageParams = Depends(),
+	db: AsyncSession = Depends(get_async_db),
+):
+	"""Get a page of users"""
 	
 	# Check if the type input is valid
 	isValid = validate_input_included(role, ["interviewer", "interviewee"])
@@ -92,9 +112,8 @@ async def get_all_users(role: Optional[str] = None, db: Session = Depends(get_db
 	if not isValid:
 		raise InvalidInput(detail="The role should be interviewer/interviewee only")
 
-	users = get_users(db, role)
-	users_dict_list = [i.__dict__ for i in users]
-	logger.info(f"Number of users: {len(users)}")
-	return users_dict_list
+	users = await get_users_page(role, page.limit, page.after, db)
+	logger.info(f"Number of users: {len(users['items'])}")
+	return page_response(users, UserResponse)
 
 
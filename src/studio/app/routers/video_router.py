@@ -1,26 +1,54 @@
 import os
-from typing import List
 import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
+from fastapi import APIRouter, Depends, File, Response, UploadFile, status
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.video_crud import (
+    bulk_delete_videos,
     create_video,
     delete_video,
-    get_all_videos,
-    get_all_videos_by_user,
+    get_video_by_content_hash,
+    get_videos_page,
+    get_videos_page_by_user,
     read_video,
     update_video,
 )
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.video_model import Video
+from ..schemas.delete_schema import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    DeleteResponse,
+)
+from ..schemas.page_schema import Page, PageParams
+from ..schemas.s3_schema import PresignedDownload, PresignedUploadComplete
 from ..schemas.video_schema import VideoBaseSchema, VideoResponse, VideoUpdate
+from ..services.direct_upload import (
+    complete_upload,
+    presign_download,
+    read_uploaded_media_metadata,
+)
+from ..services.media_upload import (
+    discard_upload,
+    receive_upload,
+    remove_stored_uploads,
+    skip_duplicate_upload,
+    store_upload,
+)
 from ..services.validate_data import validate_user_id
-from ..utils.exception import InvalidFileType, NotFoundException
+from ..utils.exception import (
+    Conflict,
+    InvalidDestination,
+    InvalidFileType,
+    InvalidInput,
+    NotFoundException,
+)
 from ..utils.handle_file import validate_file_type
 from ..utils.logger import setup_logger
+from ..utils.serialization import page_response
 
 logger = setup_logger(__name__)
 
@@ -42,9 +70,10 @@ router.mount(
     response_model=VideoResponse,
 )
 async def add_video(
+    response: Response,
     video_data: VideoBaseSchema = Depends(),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create an video"""
     extension = validate_file_type(file, "video")
@@ -54,26 +83,135 @@ async def add_video(
         raise InvalidFileType(detail="Your upload file must be a video")
 
     # Validate user_id
-    if not validate_user_id(str(video_data.user_id), db):
+    if not await validate_user_id(str(video_data.user_id), db):
         logger.info(f"Invalid user with ID: {video_data.user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {video_data.user_id}")
 
-    # Add metada
-    file_content = await file.read()
-    size = len(file_content)
+    # Store the file and read its metadata in one pass over the upload
+    upload = await receive_upload(file, "video")
+
+    # The same content uploaded again by the user returns the existing video
+    existing_video = await get_video_by_content_hash(
+        str(video_data.user_id), upload["content_hash"], db
+    )
+    if existing_video:
+        skip_duplicate_upload(upload)
+        response.status_code = status.HTTP_200_OK
+        return existing_video.__dict__
+
     video: Video = Video(**video_data.dict())
+    video.id = uuid.uuid4()
     video.extension = extension
-    video.size = size
-    new_video = create_video(video, db)
+    video.size = upload["size"]
+    video.content_hash = upload["content_hash"]
+    video.width = upload["width"]
+    video.height = upload["height"]
+    if upload["duration"] is not None:
+        video.duration = upload["duration"]
+    elif video.duration is None:
+        video.duration = 0
+    try:
+        new_video = await create_video(video, db)
+    except IntegrityError:
+        # Uploaded at the same time by another request
+        await db.rollback()
+        existing_video = await get_video_by_content_hash(
+            str(video_data.user_id), upload["content_hash"], db
+        )
+        if existing_video is None:
+            # The conflict was on another constraint, or the other upload
+            # was deleted since
+            discard_upload(upload)
+            raise Conflict(
+                detail="The video conflicts with another upload, please retry"
+            )
+        skip_duplicate_upload(upload)
+        response.status_code = status.HTTP_200_OK
+        return existing_video.__dict__
+    except BaseException:
+        discard_upload(upload)
+        raise
+    store_upload(upload, "video", new_video.id, extension)
     logger.info(f"Created video name {new_video.file_name} with ID {new_video.id}")
 
     return new_video.__dict__
 
 
+@router.post(
+    "/create_from_s3",
+    status_code=status.HTTP_201_CREATED,
+    response_model=VideoResponse,
+)
+async def add_video_from_s3(
+    response: Response,
+    upload: PresignedUploadComplete,
+    video_data: VideoBaseSchema = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create a video uploaded straight to S3 with /s3/presigned_upload/,
+    the upload is completed here"""
+    # Validate user_id
+    if not await validate_user_id(str(video_data.user_id), db):
+        logger.info(f"Invalid user with ID: {video_data.user_id}")
+        raise NotFoundException(
+            detail=f"Invalid user with ID: {video_data.user_id}"
+        )
+
+    if upload.user_id != video_data.user_id:
+        raise InvalidInput(
+            detail=f"The upload {upload.file_id} is not of the user {video_data.user_id}"
+        )
+
+    # The upload was completed before
+    existing_video = await read_video(str(upload.file_id), db)
+    if existing_video:
+        if existing_video.user_id != video_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_video.__dict__
+
+    res = await complete_upload(upload, "video")
+    if not res["status"]:
+        raise InvalidDestination(detail=res["message"])
+    metadata = await read_uploaded_media_metadata(
+        upload.bucket_name, upload.path
+    )
+
+    video: Video = Video(**video_data.dict())
+    video.id = upload.file_id
+    video.extension = res["extension"]
+    video.size = res["size"]
+    video.bucket_s3 = upload.bucket_name
+    video.path_s3 = upload.path
+    video.width = metadata["width"]
+    video.height = metadata["height"]
+    if metadata["duration"] is not None:
+        video.duration = metadata["duration"]
+    elif video.duration is None:
+        video.duration = 0
+    try:
+        new_video = await create_video(video, db)
+    except IntegrityError:
+        # Completed at the same time by another request
+        await db.rollback()
+        existing_video = await read_video(str(upload.file_id), db)
+        if existing_video is None or existing_video.user_id != video_data.user_id:
+            raise Conflict(
+                detail=f"The file ID {upload.file_id} is already used"
+            )
+        response.status_code = status.HTTP_200_OK
+        return existing_video.__dict__
+    logger.info(f"Created video with ID {new_video.id} in S3")
+
+    return new_video.__dict__
+
+
 @router.get("/get/{id}", response_model=VideoResponse)
-async def get_video_by_id(id: str, db: Session = Depends(get_db)):
+async def get_video_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """Get the video by its id"""
-    video = read_video(id, db)
+    video = await read_video(id, db)
 
     if video is None:
         logger.info(f"Invalid video with ID: {id}")
@@ -83,12 +221,28 @@ async def get_video_by_id(id: str, db: Session = Depends(get_db)):
     return video.__dict__
 
 
+@router.get("/download_url/{id}", response_model=PresignedDownload)
+async def get_video_download_url(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
+    """Presigned URL to download the video straight from S3"""
+    video = await read_video(id, db)
+
+    if video is None:
+        logger.info(f"Invalid video with ID: {id}")
+        raise NotFoundException(detail=f"Invalid video with ID: {id}")
+    if not video.path_s3:
+        raise NotFoundException(detail=f"The video {id} is not stored in S3")
+
+    return await presign_download(video.bucket_s3, video.path_s3)
+
+
 @router.put("/update/{id}", response_model=VideoResponse)
 async def update_video_by_id(
-    id: str, video: VideoUpdate, db: Session = Depends(get_db)
+    id: str, video: VideoUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """Update the video following its id"""
-    video = update_video(id, video, db)
+    video = await update_video(id, video, db)
     if video is None:
         logger.info(f"Invalid video with ID: {id}")
         raise NotFoundException(detail=f"Invalid video with ID: {id}")
@@ -97,38 +251,56 @@ async def update_video_by_id(
     return video.__dict__
 
 
-@router.get("/delete/{id}", response_model=List[VideoResponse])
-async def delete_video_by_id(id: str, db: Session = Depends(get_db)):
+@router.get("/delete/{id}", response_model=DeleteResponse)
+async def delete_video_by_id(
+    id: str, db: AsyncSession = Depends(get_async_db)
+):
     """Delete video by its id"""
-    result = delete_video(id, db)
-    if not result:
+    deleted = await delete_video(id, db)
+    if deleted is None:
         logger.info(f"Invalid video with ID: {id}")
         raise NotFoundException(detail=f"Invalid video with ID: {id}")
 
+    remove_stored_uploads("video", [deleted])
     logger.info(f"Deleted video with ID: {id}")
-    videos = get_all_videos(db)
-    videos_dict_list = [i.__dict__ for i in videos]
-    return videos_dict_list
+    return {"id": id}
 
 
-@router.get("/", response_model=List[VideoResponse])
-async def get_videos(db: Session = Depends(get_db)):
-    """Get all videos"""
-    videos = get_all_videos(db)
-    videos_dict_list = [i.__dict__ for i in videos]
-    logger.info(f"Number of videos: {len(videos)}")
-    return videos_dict_list
+@router.post("/bulk_delete", response_model=BulkDeleteResponse)
+async def bulk_delete_videos_by_ids(
+    data: BulkDeleteRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many videos by their ids, unknown ids are skipped"""
+    deleted = await bulk_delete_videos(data.ids, db)
+    remove_stored_uploads("video", deleted)
+    logger.info(f"Deleted {len(deleted)} videos")
+    return {"ids": [file_id for file_id, _ in deleted]}
 
 
-@router.get("/get_by_user/", response_model=List[VideoResponse])
-async def get_videos_by_user_id(user_id: str, db: Session = Depends(get_db)):
+@router.get("/", response_model=Page[VideoResponse])
+async def get_videos(
+    page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of videos"""
+    videos = await get_videos_page(page.limit, page.after, db)
+    logger.info(f"Number of videos: {len(videos['items'])}")
+    return page_response(videos, VideoResponse)
+
+
+@router.get("/get_by_user/", response_model=Page[VideoResponse])
+async def get_videos_by_user_id(
+    user_id: str,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get an image by user id"""
     # Validate user_id
-    if not validate_user_id(user_id, db):
+    if not await validate_user_id(user_id, db):
         logger.info(f"Invalid user with ID: {user_id}")
         raise NotFoundException(detail=f"Invalid user with ID: {user_id}")
 
-    videos = get_all_videos_by_user(user_id, db)
-    videos_dict_list = [i.__dict__ for i in videos]
+    videos = await get_videos_page_by_user(
+        user_id, page.limit, page.after, db
+    )
     logger.info(f"Get videos with user_id: {user_id}")
-    return videos_dict_list
+    return page_response(videos, VideoResponse)
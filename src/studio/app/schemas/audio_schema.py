@@ -7,7 +7,7 @@ class AudioBaseSchema(BaseModel):
     user_id: UUID4
     file_name: str
     language: str
-    duration: int
+    duration: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -28,6 +28,7 @@ class AudioResponse(BaseModel):
     extension: str
     size: int
     duration: int
+    content_hash: Optional[str] = None
 
     class Config:
         orm_mode = True
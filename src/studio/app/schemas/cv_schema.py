@@ -3,20 +3,23 @@ from typing import Optional
 from pydantic import UUID4, BaseModel, EmailStr
 
 
-class CVBaseSchema(BaseModel):
+class CVInfoSchema(BaseModel):
     user_id: UUID4
     full_name: str
     email: EmailStr
     phone_number: str
     description: str
     optional_infor: Optional[str] = None
-    bucket_name: str
-    path: str
 
     class Config:
         orm_mode = True
 
 
+class CVBaseSchema(CVInfoSchema):
+    bucket_name: str
+    path: str
+
+
 class CVUpdate(BaseModel):
     cv_id: UUID4
     optional_infor: Optional[str] = None
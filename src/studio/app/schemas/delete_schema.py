@@ -0,0 +1,17 @@
+from typing import List
+
+from pydantic import UUID4, BaseModel, conlist
+
+from ..constants.config import settings
+
+
+class DeleteResponse(BaseModel):
+    id: UUID4
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: conlist(UUID4, min_items=1, max_items=settings.BULK_DELETE_MAX_IDS)
+
+
+class BulkDeleteResponse(BaseModel):
+    ids: List[UUID4]
@@ -51,7 +51,13 @@ class GenerationResponse(BaseModel):
     image_id: Optional[str] = None
     bucket_s3: Optional[str] = None
     path_s3: Optional[str] = None
+    hls_path_s3: Optional[str] = None
     type: str
 
     class Config:
         orm_mode = True
+
+
+class GenerationPlaylist(BaseModel):
+    id: UUID4
+    playlist_url: str
@@ -24,6 +24,9 @@ class ImageResponse(BaseModel):
     file_name: str
     extension: str
     size: int
+    content_hash: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import UUID4, BaseModel
 
 
 class CVExtractingContents(BaseModel):
@@ -18,3 +20,16 @@ class QuestionGenerationContents(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class QuestionGenerationStatus(BaseModel):
+    interview_session_id: UUID4
+    status: str
+    questions_generated: Optional[int] = None
+    avatars_total: Optional[int] = None
+    avatars_rendered: Optional[int] = None
+    avatars_failed: Optional[int] = None
+    error: Optional[str] = None
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,58 @@
+import uuid
+from typing import Generic, List, Optional, Type, TypeVar
+
+from fastapi import Query
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+
+from ..constants.config import settings
+from ..crud.pagination import decode_cursor
+from ..utils.exception import InvalidCursor, InvalidFields
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(GenericModel, Generic[ItemT]):
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
+
+
+class PageParams:
+    """Query parameters of the paginated endpoints, the cursor is the
+    next_cursor of the previous page"""
+
+    def __init__(
+        self,
+        limit: int = Query(
+            settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX
+        ),
+        cursor: Optional[str] = None,
+    ):
+        self.limit = limit
+        self.after: Optional[uuid.UUID] = None
+        if cursor:
+            try:
+                self.after = decode_cursor(cursor)
+            except ValueError as e:
+                raise InvalidCursor(detail=str(e))
+
+
+class FieldsParams:
+    """Dependency parsing the comma separated fields query parameter into the
+    fields of the schema to return, None returns all of them. The id is
+    always returned since the cursor is made from it."""
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+
+    def __call__(self, fields: Optional[str] = None) -> Optional[List[str]]:
+        if not fields:
+            return None
+        names = ["id"]
+        for name in fields.split(","):
+            name = name.strip()
+            if name not in self.schema.__fields__:
+                raise InvalidFields(detail=f"Unknown field: {name}")
+            if name not in names:
+                names.append(name)
+        return names
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import List, Optional
+
+from pydantic import UUID4, BaseModel, conint
 
 
 class S3ResponseModel(BaseModel):
@@ -7,3 +9,52 @@ class S3ResponseModel(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class PresignedUploadRequest(BaseModel):
+    bucket_name: str
+    path: str
+    type: str
+    user_id: UUID4
+    content_type: str
+    size: conint(gt=0)
+
+
+class PresignedUpload(BaseModel):
+    """Either a single PUT url, or the upload_id and the PUT url of each
+    part of a multipart upload"""
+
+    bucket_name: str
+    path: str
+    file_id: UUID4
+    expires_in: int
+    url: Optional[str] = None
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    part_urls: List[str] = []
+
+
+class UploadedPart(BaseModel):
+    part_number: conint(ge=1)
+    etag: str
+
+
+class PresignedUploadComplete(BaseModel):
+    bucket_name: str
+    path: str
+    user_id: UUID4
+    file_id: UUID4
+    upload_id: Optional[str] = None
+    parts: List[UploadedPart] = []
+
+
+class UploadedFile(BaseModel):
+    bucket_name: str
+    path: str
+    size: int
+    content_type: Optional[str] = None
+
+
+class PresignedDownload(BaseModel):
+    url: str
+    expires_in: int
@@ -7,7 +7,7 @@ class VideoBaseSchema(BaseModel):
     user_id: UUID4
     file_name: str
     language: str
-    duration: int
+    duration: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -28,6 +28,9 @@ class VideoResponse(BaseModel):
     extension: str
     size: int
     duration: int
+    content_hash: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -0,0 +1,118 @@
+import uuid
+
+from botocore.exceptions import ClientError
+
+from ..constants.config import settings
+from ..schemas.s3_schema import PresignedUploadComplete
+from ..utils.handle_file import validate_content_type
+from ..utils.logger import setup_logger
+from ..utils.metrics import increment_counter
+from ..utils.s3_client import (
+    MIN_PART_SIZE,
+    complete_direct_upload,
+    create_presigned_multipart_upload,
+    generate_download_url,
+    generate_upload_url,
+    get_upload_key,
+)
+from .media_upload import read_media_metadata
+
+logger = setup_logger(__name__)
+
+
+async def presign_upload(
+    bucket_name: str,
+    path: str,
+    type: str,
+    user_id: str,
+    content_type: str,
+    extension: str,
+    size: int,
+) -> dict:
+    """Presign the upload of a new file of the user straight to S3, with a
+    single PUT when it fits into one part and in parts otherwise"""
+    file_id = uuid.uuid4()
+    key = get_upload_key(path, type, user_id, f"{file_id}.{extension}")
+    expires_in = settings.S3_PRESIGNED_URL_EXPIRATION
+    upload = {
+        "bucket_name": bucket_name,
+        "path": key,
+        "file_id": file_id,
+        "expires_in": expires_in,
+        "status": True,
+    }
+    try:
+        if size <= max(settings.S3_MULTIPART_PART_SIZE, MIN_PART_SIZE):
+            upload["url"] = await generate_upload_url(
+                bucket_name, key, content_type, expires_in
+            )
+        else:
+            upload.update(
+                await create_presigned_multipart_upload(
+                    bucket_name, key, size, content_type, expires_in
+                )
+            )
+    except ClientError:
+        logger.exception(f"Failed to presign the upload of {key}")
+        return {
+            "message": f"Invalid bucket name {bucket_name} or path {key}",
+            "status": False,
+        }
+    increment_counter("s3_presigned_uploads")
+    return upload
+
+
+def _is_issued_key(upload: PresignedUploadComplete, type: str) -> bool:
+    """Whether the key has the structure presign_upload issues for the file
+    of the user, <path>/<type>/<user_id>/<file_id>.<extension>"""
+    path, separator, file_name = upload.path.rpartition(
+        get_upload_key("", type, str(upload.user_id), "")
+    )
+    file_id, _, extension = file_name.partition(".")
+    return (
+        bool(path and separator and extension)
+        and file_id == str(upload.file_id)
+        and "/" not in extension
+    )
+
+
+async def complete_upload(upload: PresignedUploadComplete, type: str) -> dict:
+    """Complete an upload made with presign_upload once its key is checked
+    to be of the file type and of the user, then checks the content type
+    of the object and returns its size and extension"""
+    if not _is_issued_key(upload, type):
+        return {
+            "message": f"{upload.path} is not a {type} upload of the user",
+            "status": False,
+        }
+    res = await complete_direct_upload(
+        upload.bucket_name,
+        upload.path,
+        upload.upload_id,
+        [part.dict() for part in upload.parts],
+    )
+    if not res["status"]:
+        return res
+    extension = validate_content_type(res["content_type"], type)
+    if extension is None or not upload.path.endswith(f".{extension}"):
+        return {
+            "message": f"{upload.path} is not a {type} upload",
+            "status": False,
+        }
+    increment_counter("s3_presigned_uploads_completed")
+    return {**res, "extension": extension}
+
+
+async def read_uploaded_media_metadata(bucket_name: str, key: str) -> dict:
+    """Duration and resolution of a media uploaded to S3, ffprobe reads only
+    the parts of the object it needs through a presigned URL"""
+    return await read_media_metadata(
+        await generate_download_url(bucket_name, key)
+    )
+
+
+async def presign_download(bucket_name: str, key: str) -> dict:
+    """Presigned URL to download the object straight from S3"""
+    expires_in = settings.S3_PRESIGNED_URL_EXPIRATION
+    url = await generate_download_url(bucket_name, key, expires_in)
+    return {"url": url, "expires_in": expires_in}
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+from ..constants.config import settings
+from ..crud.generation_crud import update_generation
+from ..db.database import AsyncSessionLocal
+from ..utils.logger import setup_logger
+from ..utils.metrics import increment_counter, register_gauge
+from ..utils.s3_client import generate_download_url, upload_directory
+from ..utils.transcoder import package_hls
+
+logger = setup_logger(__name__)
+
+# Packaging runs in background tasks rather than the job queue so that a
+# backlog of videos never holds back the question generation jobs
+_semaphore = asyncio.Semaphore(settings.HLS_PACKAGING_CONCURRENCY)
+_tasks: set[asyncio.Task] = set()
+
+register_gauge("hls_packaging_pending", lambda: len(_tasks))
+
+
+def get_hls_prefix(path_s3: str) -> str:
+    """The HLS files of a video are stored next to it"""
+    return f"{os.path.splitext(path_s3)[0]}_hls"
+
+
+async def package_generation(generation_id: str, bucket_s3: str, path_s3: str):
+    """Package the video of a generation into HLS renditions and save the
+    path of its master playlist"""
+    input_url = await generate_download_url(bucket_s3, path_s3)
+    output_dir = tempfile.mkdtemp()
+    try:
+        playlist = await package_hls(input_url, output_dir)
+        hls_prefix = get_hls_prefix(path_s3)
+        await upload_directory(output_dir, bucket_s3, hls_prefix)
+    finally:
+        await asyncio.to_thread(shutil.rmtree, output_dir, True)
+
+    async with AsyncSessionLocal() as db:
+        await update_generation(
+            {"id": generation_id, "hls_path_s3": f"{hls_prefix}/{playlist}"},
+            db,
+        )
+    logger.info(f"Packaged generation {generation_id} into HLS")
+
+
+async def _package_in_background(
+    generation_id: str, bucket_s3: str, path_s3: str
+):
+    async with _semaphore:
+        try:
+            await package_generation(generation_id, bucket_s3, path_s3)
+            increment_counter("hls_packaging_completed")
+        except Exception:
+            logger.exception(f"HLS packaging of {generation_id} failed")
+            increment_counter("hls_packaging_failed")
+
+
+def schedule_hls_packaging(generation: dict):
+    """Package the video of a generation into HLS in the background, the
+    video stays playable as a single MP4 meanwhile"""
+    if not settings.HLS_PACKAGING_ENABLED:
+        return
+    if not generation.get("bucket_s3") or not generation.get("path_s3"):
+        return
+    task = asyncio.create_task(
+        _package_in_background(
+            generation["id"], generation["bucket_s3"], generation["path_s3"]
+        )
+    )
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
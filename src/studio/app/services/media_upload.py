@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import increment_counter
+from ..utils.transcoder import TranscodeFailed, probe
+
+logger = setup_logger(__name__)
+
+# Local store of the uploaded media, one directory per media type
+MEDIA_STORE_DIR = "/var/static"
+MEDIA_TYPES = ("video", "audio", "image")
+
+# Size in bytes of the chunks copied from the spooled upload
+CHUNK_SIZE = 1024 * 1024
+
+
+def _copy_and_hash(source: BinaryIO, destination: BinaryIO):
+    """Copy the source in chunks, returns its size and SHA-256"""
+    sha256 = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    while chunk := source.read(CHUNK_SIZE):
+        sha256.update(chunk)
+        destination.write(chunk)
+        size += len(chunk)
+    return size, sha256.hexdigest()
+
+
+async def read_media_metadata(path: str) -> dict:
+    """Duration in seconds and resolution of the media, None when unknown"""
+    metadata = {"duration": None, "width": None, "height": None}
+    try:
+        media = await probe(path)
+    except (TranscodeFailed, OSError) as e:
+        logger.info(f"Cannot read the media metadata of {path}: {e}")
+        return metadata
+
+    duration = media.get("format", {}).get("duration")
+    if duration:
+        metadata["duration"] = round(float(duration))
+    for stream in media.get("streams", []):
+        if stream.get("codec_type") == "video":
+            metadata["width"] = stream.get("width")
+            metadata["height"] = stream.get("height")
+            break
+    return metadata
+
+
+async def receive_upload(file: UploadFile, type: str) -> dict:
+    """Copy the upload into the local store in one streaming pass which also
+    computes its size and SHA-256, then read its metadata from the copy. The
+    copy stays a temporary file until store_upload or discard_upload."""
+    directory = os.path.join(MEDIA_STORE_DIR, type)
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    temp_file = tempfile.NamedTemporaryFile(
+        dir=directory, prefix=".tmp-", delete=False
+    )
+    upload = {"temp_path": temp_file.name}
+    try:
+        with temp_file:
+            upload["size"], upload["content_hash"] = await asyncio.to_thread(
+                _copy_and_hash, file.file, temp_file
+            )
+        upload.update(await read_media_metadata(temp_file.name))
+    except BaseException:
+        discard_upload(upload)
+        raise
+    return upload
+
+
+def store_upload(upload: dict, type: str, file_id: str, extension: str):
+    """Keep the received upload in the local store as <file_id>.<extension>"""
+    path = os.path.join(MEDIA_STORE_DIR, type, f"{file_id}.{extension}")
+    os.replace(upload["temp_path"], path)
+    logger.info(f"Stored upload at {path}")
+    return path
+
+
+def remove_stored_uploads(type: str, files: list):
+    """Remove the stored uploads of deleted rows, given as (id, extension)
+    pairs. Rows uploaded straight to S3 have no stored upload, a file which
+    is already gone is skipped."""
+    for file_id, extension in files:
+        path = os.path.join(MEDIA_STORE_DIR, type, f"{file_id}.{extension}")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        logger.info(f"Removed stored upload at {path}")
+
+
+def discard_upload(upload: dict):
+    """Remove the temporary copy of an upload which is not kept"""
+    if os.path.exists(upload["temp_path"]):
+        os.remove(upload["temp_path"])
+
+
+def skip_duplicate_upload(upload: dict):
+    """Drop an upload whose content the user already uploaded"""
+    discard_upload(upload)
+    increment_counter("media_dedup_uploads")
+    increment_counter("media_dedup_bytes_saved", upload["size"])
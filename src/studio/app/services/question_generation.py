@@ -0,0 +1,250 @@
+import datetime
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.cv_crud import read_cv
+from ..crud.generation_crud import (
+    bulk_create_generations,
+    bulk_delete_generations,
+    bulk_update_generations,
+    get_all_base_generations,
+)
+from ..constants.config import settings
+from ..crud.interview_session_crud import (
+    fail_unfinished_interview_sessions,
+    update_interview_session,
+)
+from ..crud.question_crud import bulk_create_questions_with_texts
+from ..crud.text_crud import bulk_create_texts, get_all_texts_by_parent_id
+from ..db.database import AsyncSessionLocal
+from ..schemas.mlp_questiongeneration_schema import QuestionGenerationContents
+from ..utils.avatar_generation_utils import createGenerationUpdateDict
+from ..utils.job_queue import update_job_progress
+from ..utils.logger import setup_logger
+from ..utils.mlp_api import (
+    dispatch_mlp_avatargenerations,
+    handle_send_question_generation,
+)
+from .hls_packaging import schedule_hls_packaging
+
+logger = setup_logger(__name__)
+
+
+async def run_question_generation(
+    interview_session_id: str, data: QuestionGenerationContents
+):
+    """Run the question generation pipeline of an interview session in the
+    background and keep its status up to date"""
+    async with AsyncSessionLocal() as db:
+        await update_interview_session(
+            {"id": interview_session_id, "status": "processing"}, db
+        )
+        try:
+            await generate_questions(interview_session_id, data, db)
+        except Exception:
+            await db.rollback()
+            await update_interview_session(
+                {"id": interview_session_id, "status": "failed"}, db
+            )
+            raise
+
+        await update_interview_session(
+            {"id": interview_session_id, "status": "completed"}, db
+        )
+        update_job_progress(interview_session_id, status="completed")
+
+
+async def fail_interrupted_question_generations(
+    interview_session_ids: list[str],
+):
+    """Mark the question generations dropped by a shutdown failed, so they
+    can be requested again"""
+    if not interview_session_ids:
+        return
+    async with AsyncSessionLocal() as db:
+        failed = await fail_unfinished_interview_sessions(
+            db, interview_session_ids=interview_session_ids
+        )
+    logger.warning(f"Failed {len(failed)} interrupted question generations")
+
+
+async def fail_stale_question_generations():
+    """Mark the question generations failed which a worker left pending or
+    processing when it stopped without its shutdown. Only sessions older
+    than JOB_STALE_AFTER are failed, newer ones may still run in another
+    worker"""
+    created_before = datetime.datetime.now() - datetime.timedelta(
+        seconds=settings.JOB_STALE_AFTER
+    )
+    async with AsyncSessionLocal() as db:
+        failed = await fail_unfinished_interview_sessions(
+            db, created_before=created_before
+        )
+    if failed:
+        logger.warning(f"Failed {len(failed)} stale question generations")
+
+
+async def generate_questions(
+    interview_session_id: str,
+    data: QuestionGenerationContents,
+    db: AsyncSession,
+):
+    """Generate the questions, their avatar videos and ground truths"""
+    get_cv = await read_cv(data.cv_id, db)
+
+    # get the list of texts following jd_id
+    jd_texts = await get_all_texts_by_parent_id(data.jd_id, db)
+    texts = [jd_text.text for jd_text in jd_texts]
+
+    # Get the list of questions from ML
+    input_data_question_generation = {
+        "task_id": interview_session_id,
+        "cv_url": {
+            "bucket": data.bucket_name,
+            "key_file": f"{data.path}/application/{get_cv.user_id}/{data.cv_id}.pdf",
+        },
+        "jd_texts": texts,
+    }
+    response_data = await handle_send_question_generation(
+        input_data_question_generation
+    )
+
+    questions = response_data["questions"]
+    cv_texts = response_data["cv_texts"]
+    update_job_progress(
+        interview_session_id, questions_generated=len(questions)
+    )
+
+    # Get all generation base videos (Base videos mean all generated videos will depends on those)
+    base_avatar_generations = await get_all_base_generations(db)
+
+    base_avatar_generations_list = [
+        {k: v for k, v in gen.__dict__.items() if not k.startswith("_")}
+        for gen in base_avatar_generations
+    ]
+
+    # Loop thourgh base avatar generation videos
+    generation_rows = []
+    avatar_generation_jobs = []
+    for generation_base in base_avatar_generations_list:
+        # Loop through questions and create generation schema
+        for question in questions:
+            uuid_value = uuid.uuid4()
+            generation_data = {
+                **generation_base,
+                "id": uuid_value,
+                "type": "generated",
+                "hls_path_s3": None,
+            }
+            generation_rows.append(generation_data)
+
+            # Generate avatar based on question
+            input_data = {"task_id": uuid_value}
+            if generation_data["video_id"]:
+                video_url = {}
+                video_url["bucket"] = generation_data["bucket_s3"]
+                video_url[
+                    "key_file"
+                ] = f"server-test-01/video/${generation_data['user_id']}/${generation_data['video_id']}.mp4"
+                input_data["video_url"] = video_url
+
+            if generation_data["audio_id"]:
+                audio_url = {}
+                audio_url["bucket"] = generation_data["bucket_s3"]
+                audio_url[
+                    "key_file"
+                ] = f"server-test-01/audio/${generation_data['user_id']}/${generation_data['audio_id']}.wav"
+                input_data["audio_url"] = audio_url
+
+            if generation_data["image_id"]:
+                image_url = {}
+                image_url["bucket"] = generation_data["bucket_s3"]
+                image_url[
+                    "key_file"
+                ] = f"server-test-01/image/${generation_data['user_id']}/${generation_data['image_id']}.jpg"
+                input_data["image_url"] = image_url
+
+            input_data["text"] = question["question"]
+            avatar_generation_jobs.append((question, input_data))
+
+    # Create all generations of the job before sending them to ML
+    await bulk_create_generations(generation_rows, db)
+    update_job_progress(
+        interview_session_id,
+        avatars_total=len(avatar_generation_jobs),
+        avatars_rendered=0,
+    )
+
+    # Send all avatar generations to ML at once, bounded by a semaphore
+    avatars_rendered = 0
+
+    def on_avatar_rendered(response_data: dict):
+        nonlocal avatars_rendered
+        avatars_rendered += 1
+        update_job_progress(
+            interview_session_id, avatars_rendered=avatars_rendered
+        )
+
+    avatar_responses = await dispatch_mlp_avatargenerations(
+        [input_data for _, input_data in avatar_generation_jobs],
+        on_done=on_avatar_rendered,
+    )
+
+    # The generations ML failed on would never get a video, drop them with
+    # their questions and keep the others
+    rendered_jobs = []
+    failed_generation_ids = []
+    for job, response_data in zip(avatar_generation_jobs, avatar_responses):
+        if isinstance(response_data, Exception):
+            logger.warning(
+                f"Avatar generation {job[1]['task_id']} failed: "
+                f"{response_data!r}"
+            )
+            failed_generation_ids.append(job[1]["task_id"])
+        else:
+            rendered_jobs.append((job, response_data))
+    if failed_generation_ids:
+        await bulk_delete_generations(failed_generation_ids, db)
+        update_job_progress(
+            interview_session_id, avatars_failed=len(failed_generation_ids)
+        )
+        if not rendered_jobs:
+            raise next(
+                response_data
+                for response_data in avatar_responses
+                if isinstance(response_data, Exception)
+            )
+
+    # Persist the rendered avatars, their questions and ground truths
+    # The talking head service may only acknowledge the task and send the
+    # video later through /generation/receive/talking_head
+    rendered_generations = [
+        createGenerationUpdateDict(response_data)
+        for _, response_data in rendered_jobs
+        if "video_url" in response_data
+    ]
+    await bulk_update_generations(rendered_generations, db)
+    for generation in rendered_generations:
+        schedule_hls_packaging(generation)
+    new_questions_data = [
+        {
+            "avatar_generation_id": input_data["task_id"],
+            "cv_id": data.cv_id,
+            "jd_id": data.jd_id,
+            "question_context": question["question"],
+            "topic": question["topic"],
+            "interview_session_id": interview_session_id,
+            "ground_truths": question["ground_truths"],
+        }
+        for (question, input_data), _ in rendered_jobs
+    ]
+    new_question_ids = await bulk_create_questions_with_texts(
+        new_questions_data, db
+    )
+    logger.info(f"Created {len(new_question_ids)} questions")
+
+    new_texts_data_by_cv = [
+        {"parent_id": get_cv.id, "text": cv_text} for cv_text in cv_texts
+    ]
+    await bulk_create_texts(new_texts_data_by_cv, db)
@@ -0,0 +1,256 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..constants.config import settings
+from ..crud.question_crud import (
+    get_all_questions_by_interviewer_id_and_interview_session_id,
+    is_question_unused,
+    mark_question_used,
+    read_question,
+)
+from ..models.question_model import Question
+from ..schemas.question_schema import QuestionSelectionPipelineInput
+from ..utils.logger import setup_logger
+from ..utils.metrics import increment_counter, observe_timing, register_gauge
+from ..utils.mlp_api import handle_send_question_selection
+from ..utils.question_selection_utils import (
+    createAskedQuestionObjectDict,
+    createMLInput,
+    createQuestionObjectDict,
+)
+from ..utils.resilience import (
+    RETRYABLE_ERRORS,
+    CircuitOpen,
+    get_circuit_breaker,
+)
+from .video_prefetch import schedule_video_prefetch
+
+logger = setup_logger(__name__)
+
+
+class SelectionState:
+    """Question bank of an interview session for one interviewer, updated
+    in place as the questions are asked instead of being read again"""
+
+    def __init__(self, questions: list[Question]):
+        # The bank entries are shared with the index, so marking a question
+        # keeps the bank sent to ML up to date without rebuilding it
+        self.question_bank = []
+        self._questions: dict[str, dict] = {}
+        self._generation_ids: dict[str, str] = {}
+        # Unused question ids by topic, the dicts keep the bank order
+        self.unused_by_topic: dict[Optional[int], dict] = defaultdict(dict)
+        self.asked_by_topic: Counter = Counter()
+        self.asked: list[dict] = []
+        for question in questions:
+            entry = createQuestionObjectDict(question)
+            self.question_bank.append(entry)
+            self._questions[str(question.id)] = entry
+            self._generation_ids[str(question.id)] = str(
+                question.avatar_generation_id
+            )
+            if question.is_used:
+                self.asked_by_topic[question.topic] += 1
+            else:
+                self.unused_by_topic[question.topic][str(question.id)] = None
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._questions
+
+    def mark_asked(self, question_id: str, is_answered: bool) -> dict:
+        """Record the answer of a question, returns the asked question"""
+        entry = self._questions[question_id]
+        if question_id in self.unused_by_topic[entry["topic"]]:
+            del self.unused_by_topic[entry["topic"]][question_id]
+            self.asked_by_topic[entry["topic"]] += 1
+        entry["is_used"] = True
+        asked_question = {**entry, "is_answered": is_answered}
+        self.asked.append(asked_question)
+        return asked_question
+
+    def discard(self, question_id: str) -> bool:
+        """Take out a question asked through another worker or deleted,
+        returns whether the state still had it unused"""
+        entry = self._questions.get(question_id)
+        if entry is None or entry["is_used"]:
+            return False
+        del self.unused_by_topic[entry["topic"]][question_id]
+        entry["is_used"] = True
+        return True
+
+    def generation_id(self, question_id: str) -> str:
+        """Id of the avatar generation asking the question"""
+        return self._generation_ids[question_id]
+
+    def _ranked_topics(self, asked_by_topic: Counter, last_topic) -> list:
+        """Topics with unused questions, least asked first and the topic
+        just asked last among equals"""
+        topics = [topic for topic, ids in self.unused_by_topic.items() if ids]
+        return sorted(
+            topics,
+            key=lambda topic: (
+                asked_by_topic[topic],
+                topic == last_topic,
+                topic is None,
+                topic or 0,
+            ),
+        )
+
+    def select_locally(self) -> Optional[str]:
+        """Deterministic choice of the next question: an unused question of
+        the least asked topic, avoiding the topic just asked when another
+        one is left. None when every question was asked."""
+        last_topic = self.asked[-1]["topic"] if self.asked else None
+        topics = self._ranked_topics(self.asked_by_topic, last_topic)
+        if not topics:
+            return None
+        return next(iter(self.unused_by_topic[topics[0]]))
+
+    def likely_next(self, question_id: str, count: int) -> list[str]:
+        """Unused questions most likely to follow the question, taken in
+        turn from the topics in the order the local selector would rotate
+        through them once the question is asked"""
+        topic = self._questions[question_id]["topic"]
+        asked_by_topic = self.asked_by_topic + Counter({topic: 1})
+        queues = [
+            iter(self.unused_by_topic[topic])
+            for topic in self._ranked_topics(asked_by_topic, topic)
+        ]
+        likely = []
+        while queues and len(likely) < count:
+            for queue in list(queues):
+                next_id = next(queue, None)
+                if next_id is None:
+                    queues.remove(queue)
+                elif next_id != question_id and len(likely) < count:
+                    likely.append(next_id)
+        return likely
+
+
+# Selection states by (interviewer_id, interview_session_id), least recently
+# used first. Each worker process keeps its own states: the writes to the
+# questions through this worker drop the states of their session, those
+# through another worker are caught when the pick is checked in the database
+_states: "OrderedDict[tuple, SelectionState]" = OrderedDict()
+
+register_gauge("question_selection_cached_sessions", lambda: len(_states))
+
+
+def _get_state(key: tuple) -> Optional[SelectionState]:
+    state = _states.get(key)
+    if state is not None:
+        _states.move_to_end(key)
+    return state
+
+
+def _put_state(key: tuple, state: SelectionState):
+    _states[key] = state
+    _states.move_to_end(key)
+    while len(_states) > settings.QUESTION_SELECTION_CACHE_SESSIONS:
+        _states.popitem(last=False)
+
+
+def forget_interview_sessions(interview_session_ids):
+    """Drop the selection states of the sessions whose questions were
+    changed, they are rebuilt from the database on their next selection"""
+    sessions = {str(session_id) for session_id in interview_session_ids}
+    for key in [key for key in _states if key[1] in sessions]:
+        del _states[key]
+
+
+async def select_next_question(
+    data: QuestionSelectionPipelineInput, db: AsyncSession
+) -> Optional[dict]:
+    """Mark the answered question as asked and let ML select the next one
+    from the question bank. The bank of the session is kept in memory and
+    only rebuilt from the database when it is not cached. Returns None when
+    the question does not exist."""
+    key = (str(data.interviewer_id), str(data.interview_session_id))
+    if not await mark_question_used(data.question_id, data.is_answered, db):
+        return None
+
+    state = _get_state(key)
+    if state is None or data.question_id not in state:
+        increment_counter("question_selection_cache_misses")
+        questions = (
+            await get_all_questions_by_interviewer_id_and_interview_session_id(
+                data.interviewer_id, data.interview_session_id, db
+            )
+        )
+        state = SelectionState(questions)
+        _put_state(key, state)
+    else:
+        increment_counter("question_selection_cache_hits")
+
+    if data.question_id in state:
+        asked_question = state.mark_asked(data.question_id, data.is_answered)
+    else:
+        # A question outside of the interviewer's bank
+        question = await read_question(data.question_id, db)
+        asked_question = createAskedQuestionObjectDict(question)
+
+    ml_input_data = createMLInput(state.question_bank, asked_question)
+    response = await _select_with_fallback(state, ml_input_data)
+    question_id = await _check_pick(state, str(response["question_id"]), db)
+    _prefetch_videos(state, question_id)
+    return {**response, "question_id": question_id}
+
+
+async def _check_pick(
+    state: SelectionState, question_id: str, db: AsyncSession
+) -> str:
+    """Pick again locally while the picked question is already asked or
+    deleted, which the state may not know when it happened through another
+    worker. The first pick is kept when no unused question is left."""
+    picked_id = question_id
+    while not await is_question_unused(question_id, db):
+        if state.discard(question_id):
+            increment_counter("question_selection_stale_picks")
+        question_id = state.select_locally()
+        if question_id is None:
+            return picked_id
+    return question_id
+
+
+def _prefetch_videos(state: SelectionState, question_id: str):
+    """Warm the video cache with the avatar video of the selected question
+    and of the questions likely to be selected after it"""
+    if not settings.VIDEO_PREFETCH_COUNT or question_id not in state:
+        return
+    question_ids = [
+        question_id,
+        *state.likely_next(question_id, settings.VIDEO_PREFETCH_COUNT),
+    ]
+    schedule_video_prefetch(
+        [state.generation_id(next_id) for next_id in question_ids]
+    )
+
+
+async def _select_with_fallback(state: SelectionState, ml_input_data: dict):
+    """Let ML select the next question within the fallback deadline, the
+    local selector answers when ML is slower or failing so the candidate
+    does not wait on it"""
+    start = time.perf_counter()
+    fallback_deadline = asyncio.timeout(
+        settings.QUESTION_SELECTION_FALLBACK_DEADLINE
+    )
+    try:
+        async with fallback_deadline:
+            response = await handle_send_question_selection(ml_input_data)
+    except (*RETRYABLE_ERRORS, CircuitOpen) as e:
+        if fallback_deadline.expired():
+            # The call is cancelled before its own deadline could fail it,
+            # count it against ML so that a slow ML opens the circuit
+            get_circuit_breaker("question_selection").record_failure()
+        question_id = state.select_locally()
+        if question_id is None:
+            raise
+        logger.info(f"Local question selection after {type(e).__name__}")
+        increment_counter("question_selection_fallbacks")
+        return {"question_id": question_id}
+    observe_timing("question_selection_ml", time.perf_counter() - start)
+    return response
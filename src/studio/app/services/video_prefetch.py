@@ -0,0 +1,59 @@
+import asyncio
+
+from ..constants.config import settings
+from ..crud.generation_crud import get_generation_locations
+from ..db.database import AsyncSessionLocal
+from ..utils.logger import setup_logger
+from ..utils.metrics import increment_counter, register_gauge
+from ..utils.s3_client import prefetch_file
+
+logger = setup_logger(__name__)
+
+# Prefetches run in background tasks so the selection response never waits
+# for them, the objects being downloaded are not scheduled twice
+_semaphore = asyncio.Semaphore(settings.VIDEO_PREFETCH_CONCURRENCY)
+_tasks: set[asyncio.Task] = set()
+_in_flight: set[tuple] = set()
+
+register_gauge("video_prefetch_pending", lambda: len(_in_flight))
+
+
+async def _prefetch_video(bucket_s3: str, path_s3: str):
+    try:
+        async with _semaphore:
+            if await prefetch_file(bucket_s3, path_s3):
+                increment_counter("video_prefetch_completed")
+    except Exception:
+        logger.exception(f"Prefetch of {path_s3} failed")
+        increment_counter("video_prefetch_failed")
+    finally:
+        _in_flight.discard((bucket_s3, path_s3))
+
+
+async def prefetch_generation_videos(generation_ids: list[str]):
+    """Download the videos of the generations into the video cache"""
+    async with AsyncSessionLocal() as db:
+        locations = await get_generation_locations(generation_ids, db)
+    prefetches = []
+    for bucket_s3, path_s3 in locations:
+        if not bucket_s3 or not path_s3 or (bucket_s3, path_s3) in _in_flight:
+            continue
+        _in_flight.add((bucket_s3, path_s3))
+        prefetches.append(_prefetch_video(bucket_s3, path_s3))
+    await asyncio.gather(*prefetches)
+
+
+async def _prefetch_in_background(generation_ids: list[str]):
+    try:
+        await prefetch_generation_videos(generation_ids)
+    except Exception:
+        logger.exception("Prefetch of the avatar videos failed")
+
+
+def schedule_video_prefetch(generation_ids: list[str]):
+    """Prefetch the videos of the generations in the background"""
+    if not generation_ids:
+        return
+    task = asyncio.create_task(_prefetch_in_background(generation_ids))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
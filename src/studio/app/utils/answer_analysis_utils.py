@@ -1,7 +1,7 @@
 from ..models.question_model import Question
 from ..models.answer_model import Answer
 from ..crud.text_crud import get_all_texts_by_parent_id
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class QuestionMLInput:
@@ -15,10 +15,12 @@ class QuestionMLInput:
         self.topic = topic
 
 
-def createAnswerAnalysisMLInputObject(
-    question: Question, answer: Answer, db: Session
+async def createAnswerAnalysisMLInputObject(
+    question: Question, answer: Answer, db: AsyncSession
 ) -> dict:
-    ground_truths = [gt.text for gt in get_all_texts_by_parent_id(question.id, db)]
+    ground_truths = [
+        gt.text for gt in await get_all_texts_by_parent_id(question.id, db)
+    ]
     input_question = QuestionMLInput(
         question.question_context, ground_truths, question.topic
     )
@@ -32,5 +34,5 @@ def createAnswerAnalysisMLInputObject(
             "bucket": answer.bucket_s3,
             "key_file": answer.audio_url,
         },
-        "question": input_question,
+        "question": vars(input_question),
     }
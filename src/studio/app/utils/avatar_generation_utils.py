@@ -1,8 +1,14 @@
 from ..crud.generation_crud import update_generation
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..constants.config import settings
+import asyncio
+
 import aiohttp
 
+from ..services.hls_packaging import schedule_hls_packaging
+from .ml_client import post_ml
+from .resilience import CircuitOpen, call_with_resilience
+
 
 def createGenerationObjectDict(data: dict) -> dict:
     input_data = {"task_id": data["task_id"]}
@@ -31,23 +37,31 @@ def createGenerationObjectDict(data: dict) -> dict:
 
 
 async def sendGenerationML(input_data: dict) -> dict:
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                settings.TALKING_HEAD_GENERATION_URL
-                if not input_data["text"]
-                else settings.TALKING_HEAD_GENERATION_WITH_TEXT_URL,
-                json=input_data,
-            ) as response:
-                response_data = await response.json()
-                return {"status": True, "data": response_data}
-        except aiohttp.ClientError as e:
-            return {"status": False, "data": e}
-
-
-async def receiveMLResponse(response: dict, db: Session) -> dict:
+    url = (
+        settings.TALKING_HEAD_GENERATION_URL
+        if not input_data.get("text")
+        else settings.TALKING_HEAD_GENERATION_WITH_TEXT_URL
+    )
+    try:
+        response_data = await call_with_resilience(
+            "talking_head",
+            lambda: post_ml(url, input_data),
+            deadline=settings.ML_TALKING_HEAD_DEADLINE,
+        )
+        return {"status": True, "data": response_data}
+    except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpen) as e:
+        return {"status": False, "data": e}
+
+
+def createGenerationUpdateDict(response: dict) -> dict:
     generation_dict = {"id": response["task_id"]}
     generation_dict["bucket_s3"] = response["video_url"]["bucket"]
     generation_dict["path_s3"] = response["video_url"]["key_file"]
+    return generation_dict
+
+
+async def receiveMLResponse(response: dict, db: AsyncSession) -> dict:
+    generation_dict = createGenerationUpdateDict(response)
     generation = await update_generation(generation_dict, db)
+    schedule_hls_packaging(generation.__dict__)
     return generation.__dict__
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Optional
+
+from ..services.media_upload import MEDIA_STORE_DIR, MEDIA_TYPES
+from .logger import setup_logger
+from .metrics import increment_counter, register_gauge
+
+logger = setup_logger(__name__)
+
+# Suffix of the files written by the caches, no other file is indexed,
+# evicted or removed so a misplaced cache cannot delete foreign files
+CACHE_SUFFIX = ".cache"
+# Prefix of the files which are still being written into the cache
+TEMP_PREFIX = ".tmp-"
+# Temporary files older than this (in seconds) were left by a crashed write
+STALE_TEMP_SECONDS = 3600
+
+
+def _holds_media_store(directory: str) -> bool:
+    """Whether the directory is the local media store, one of its media
+    directories or a parent of the store"""
+    directory = os.path.realpath(directory)
+    store = os.path.realpath(MEDIA_STORE_DIR)
+    if os.path.commonpath([directory, store]) == directory:
+        return True
+    relative = os.path.relpath(directory, store)
+    return relative.split(os.sep)[0] in MEDIA_TYPES
+
+
+class DiskLRUCache:
+    """Files on local disk addressed by a key, the least recently used files
+    are evicted once the cache grows over max_bytes. Each worker process
+    keeps its own index of the shared directory, so the cap is approximate
+    when several workers share it."""
+
+    def __init__(self, name: str, directory: str, max_bytes: int):
+        if _holds_media_store(directory):
+            raise ValueError(
+                f"The {name} cache cannot use {directory}, which holds the "
+                "uploaded media"
+            )
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._load()
+        register_gauge(f"{name}_cache_bytes", lambda: self._size)
+        register_gauge(f"{name}_cache_files", lambda: len(self._entries))
+        register_gauge(f"{name}_cache_hit_rate", self.hit_rate)
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a content address from the parts identifying an entry"""
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def hit_rate(self) -> float:
+        """Share of the lookups of this worker served from the cache"""
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0.0
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open the cached file of the key for reading, None on a miss.
+        An open file stays readable even when it is evicted meanwhile."""
+        with self._lock:
+            try:
+                file = open(self.path(key), "rb")
+            except FileNotFoundError:
+                self._discard(key)
+                self._misses += 1
+                increment_counter(f"{self.name}_cache_misses")
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Added by another worker sharing the directory
+                self._add(key, os.fstat(file.fileno()).st_size)
+            self._hits += 1
+        increment_counter(f"{self.name}_cache_hits")
+        return file
+
+    def new_temp_file(self) -> BinaryIO:
+        """Create a temporary file in the cache directory, to be written and
+        then moved into the cache with put_file"""
+        os.makedirs(self.directory, exist_ok=True)
+        return tempfile.NamedTemporaryFile(
+            dir=self.directory,
+            prefix=TEMP_PREFIX,
+            suffix=CACHE_SUFFIX,
+            delete=False,
+        )
+
+    def put_file(self, key: str, temp_path: str):
+        """Move a fully written temporary file into the cache"""
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            os.replace(temp_path, self.path(key))
+            self._discard(key)
+            self._add(key, size)
+            self._evict()
+
+    def put(self, key: str, content: bytes):
+        """Store the content in the cache"""
+        with self.new_temp_file() as temp_file:
+            temp_file.write(content)
+        self.put_file(key, temp_file.name)
+
+    def _add(self, key: str, size: int):
+        self._entries[key] = size
+        self._size += size
+
+    def _discard(self, key: str):
+        self._size -= self._entries.pop(key, 0)
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            increment_counter(f"{self.name}_cache_evictions")
+
+    def _load(self):
+        """Index the cache files left in the directory, oldest access
+        first"""
+        if not os.path.isdir(self.directory):
+            return
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or not entry.name.endswith(CACHE_SUFFIX):
+                continue
+            stat = entry.stat()
+            if entry.name.startswith(TEMP_PREFIX):
+                if time.time() - stat.st_mtime > STALE_TEMP_SECONDS:
+                    os.remove(entry.path)
+                continue
+            key = entry.name[: -len(CACHE_SUFFIX)]
+            files.append((stat.st_atime, key, stat.st_size))
+        for _, key, size in sorted(files):
+            self._add(key, size)
+        with self._lock:
+            self._evict()
+        logger.info(
+            f"Loaded {len(self._entries)} files into the {self.name} cache"
+        )
@@ -19,3 +19,35 @@ class InvalidDestination(HTTPException):
 class InvalidInput(HTTPException):
     def __init__(self, detail: str):
         super().__init__(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=detail)
+
+
+class ServiceUnavailable(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class RangeNotSatisfiable(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=detail,
+        )
+
+
+class InvalidCursor(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=detail
+        )
+
+
+class InvalidFields(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=detail
+        )
+
+
+class Conflict(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
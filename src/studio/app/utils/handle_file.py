@@ -1,7 +1,5 @@
-import os
-import shutil
-import subprocess
-import tempfile
+import asyncio
+from typing import BinaryIO
 
 from fastapi import UploadFile
 
@@ -9,13 +7,22 @@ from .logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Size in bytes of the chunks streamed from a local file to the client
+FILE_CHUNK_SIZE = 1024 * 1024
+
 
 # Validate file type and return extension if true
 def validate_file_type(file: UploadFile, target_file: str):
-    if file.content_type.split("/")[0] != target_file:
+    return validate_content_type(file.content_type, target_file)
+
+
+def validate_content_type(content_type: str, target_file: str):
+    """Extension of the files of the content type, None when the content
+    type is not of the target file type"""
+    if not content_type or content_type.split("/")[0] != target_file:
         return None
     # Currently the ML service cannnot process jpeg file, so we will set the fix extension as "jpg"
-    extension = "jpg" if target_file == "image" else "wav" if target_file == "audio" else file.content_type.split("/")[1]
+    extension = "jpg" if target_file == "image" else "wav" if target_file == "audio" else content_type.split("/")[1]
     return extension
 
 
@@ -29,31 +36,13 @@ def save_to_FS(type: str, file_name: str, extension: str, file_content: bytes):
     file.close()
 
 
-def convert_file(file_content: bytes):
-    temp_dir = tempfile.mkdtemp()
+async def iter_file(file: BinaryIO):
+    """Yield the content of an open file in chunks and close it at the end"""
     try:
-        temp_file_path = os.path.join(temp_dir, "init.mp4")
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(file_content)
-        output_file_path = os.path.join(temp_dir, "converted.mp4")
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-i",
-            temp_file_path,
-            "-vcodec",
-            "libx264",
-            output_file_path,
-        ]
-        subprocess.run(ffmpeg_cmd, check=True)
-        with open(output_file_path, "rb") as output_file:
-            converted_content = output_file.read()
-        shutil.rmtree(temp_dir)
-        return {
-            "message": "File converted successfully",
-            "status": True,
-            "file_data": converted_content,
-        }
-
-    except Exception as e:
-        shutil.rmtree(temp_dir)
-        return {"message": "Error converting file: " + str(e), "status": False}
+        while True:
+            chunk = await asyncio.to_thread(file.read, FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
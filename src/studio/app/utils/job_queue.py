@@ -0,0 +1,99 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from ..constants.config import settings
+from .logger import setup_logger
+from .metrics import increment_counter, register_gauge
+
+logger = setup_logger(__name__)
+
+# Number of finished jobs whose progress is kept for the status endpoint
+MAX_TRACKED_JOBS = 1000
+
+# In-process job queue, started and stopped with the application
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+_progress: "OrderedDict[str, dict]" = OrderedDict()
+_running: set[str] = set()
+
+register_gauge("job_queue_size", lambda: _queue.qsize() if _queue else 0)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+async def _worker(worker_id: int):
+    while True:
+        job_id, func, args = await _queue.get()
+        _running.add(job_id)
+        try:
+            update_job_progress(job_id, status="processing")
+            await func(job_id, *args)
+            increment_counter("jobs_completed")
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed in worker {worker_id}")
+            update_job_progress(job_id, status="failed", error=str(e))
+            increment_counter("jobs_failed")
+        finally:
+            _running.discard(job_id)
+            _queue.task_done()
+
+
+async def start_job_queue():
+    """Start the workers which run the enqueued jobs"""
+    global _queue
+    _queue = asyncio.Queue(maxsize=settings.JOB_QUEUE_MAX_SIZE)
+    for worker_id in range(settings.JOB_QUEUE_WORKERS):
+        _workers.append(asyncio.create_task(_worker(worker_id)))
+    logger.info(f"Started {settings.JOB_QUEUE_WORKERS} job queue workers")
+
+
+async def stop_job_queue() -> list[str]:
+    """Cancel the workers and return the ids of the running and queued jobs,
+    which are dropped. The caller marks them failed where they are stored."""
+    dropped = list(_running)
+    while _queue is not None and not _queue.empty():
+        job_id, _, _ = _queue.get_nowait()
+        dropped.append(job_id)
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    for job_id in dropped:
+        update_job_progress(
+            job_id, status="failed", error="Interrupted by a shutdown"
+        )
+    if dropped:
+        logger.warning(f"Dropped {len(dropped)} unfinished jobs")
+        increment_counter("jobs_dropped", len(dropped))
+    return dropped
+
+
+def enqueue_job(job_id: str, func: Callable[..., Awaitable], *args):
+    """Add a job to the queue. The job is called as func(job_id, *args)
+    by a worker, raises JobQueueFull when the queue is at capacity."""
+    job_id = str(job_id)
+    try:
+        _queue.put_nowait((job_id, func, args))
+    except asyncio.QueueFull:
+        increment_counter("jobs_rejected")
+        raise JobQueueFull(f"Job queue is full, cannot enqueue {job_id}")
+    update_job_progress(job_id, status="pending")
+    increment_counter("jobs_enqueued")
+
+
+def update_job_progress(job_id: str, **progress):
+    """Merge the given fields into the progress of the job"""
+    job_id = str(job_id)
+    job_progress = _progress.pop(job_id, {})
+    job_progress.update(progress)
+    _progress[job_id] = job_progress
+    while len(_progress) > MAX_TRACKED_JOBS:
+        _progress.popitem(last=False)
+
+
+def get_job_progress(job_id: str) -> Optional[dict]:
+    """Get the progress of a job known by this worker process"""
+    return _progress.get(str(job_id))
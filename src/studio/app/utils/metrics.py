@@ -0,0 +1,46 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict
+
+# In-process metrics of the worker, exposed by the metrics router
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_timings: Dict[str, dict] = {}
+_gauges: Dict[str, Callable[[], float]] = {}
+
+
+def increment_counter(name: str, value: float = 1):
+    """Increase the counter with the given name"""
+    with _lock:
+        _counters[name] += value
+
+
+def observe_timing(name: str, seconds: float):
+    """Record one duration (in seconds) for the timing with the given name"""
+    with _lock:
+        timing = _timings.setdefault(
+            name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        timing["count"] += 1
+        timing["total_seconds"] += seconds
+        timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+
+def register_gauge(name: str, func: Callable[[], float]):
+    """Register a function which reads the current value of a gauge"""
+    _gauges[name] = func
+
+
+def get_metrics() -> dict:
+    """Snapshot of all counters, timings and gauges"""
+    with _lock:
+        counters = dict(_counters)
+        timings = {
+            name: {
+                **timing,
+                "avg_seconds": timing["total_seconds"] / timing["count"],
+            }
+            for name, timing in _timings.items()
+        }
+    gauges = {name: func() for name, func in _gauges.items()}
+    return {"counters": counters, "timings": timings, "gauges": gauges}
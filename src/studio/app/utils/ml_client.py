@@ -0,0 +1,66 @@
+import datetime
+import json
+import uuid
+from typing import Optional
+
+import aiohttp
+
+from ..constants.config import settings
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Application scoped HTTP client shared by every call to the ML proxy, so
+# that connections are kept alive and reused between requests
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _json_default(value):
+    """Serialize the UUIDs and dates found in the ML inputs"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value)}")
+
+
+async def start_ml_client():
+    """Create the shared ML client, called on application startup"""
+    global _session
+    connector = aiohttp.TCPConnector(
+        limit=settings.ML_CLIENT_MAX_CONNECTIONS,
+        limit_per_host=settings.ML_CLIENT_MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=settings.ML_CLIENT_KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.ML_CLIENT_TIMEOUT,
+        connect=settings.ML_CLIENT_CONNECT_TIMEOUT,
+    )
+    _session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        json_serialize=lambda data: json.dumps(data, default=_json_default),
+    )
+    logger.info("Started the ML client")
+
+
+async def close_ml_client():
+    """Close the shared ML client, called on application shutdown"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def get_ml_client() -> aiohttp.ClientSession:
+    """Get the shared ML client"""
+    if _session is None:
+        raise RuntimeError("The ML client is not started")
+    return _session
+
+
+async def post_ml(url: str, input_data: dict) -> dict:
+    """Send the input data to an ML proxy endpoint and return its JSON"""
+    async with get_ml_client().post(url, json=input_data) as response:
+        response.raise_for_status()
+        return await response.json()
@@ -1,17 +1,25 @@
-import aiohttp
-from sqlalchemy.orm import Session
+import asyncio
+from typing import Callable, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..constants.config import settings
 from ..crud.cv_crud import update_cv
 from ..crud.answer_crud import update_answer
 import random  # this is for local test
 from ..utils.avatar_generation_utils import receiveMLResponse, sendGenerationML
+from ..utils.ml_client import post_ml
+from ..utils.resilience import call_with_resilience
+
 
+async def request_mlp_avatargeneration(input_data: dict):
+    if settings.TALKING_HEAD_GENERATION_URL:
+        response_ml = await sendGenerationML(input_data)
+        if not response_ml["status"]:
+            raise response_ml["data"]
+        return response_ml["data"]
 
-async def handle_return_mlp_avatargeneration(input_data: dict, db: Session):
-    # response_ml = sendGenerationML(input_data)
-    # if not response_ml["status"]:
-    #     return None
-    # response_data = response_ml["data"]
+    # Mocked response while the ML service is not configured
     response_data = {
         "task_id": input_data["task_id"],
         "video_url": {
@@ -19,38 +27,68 @@ async def handle_return_mlp_avatargeneration(input_data: dict, db: Session):
             "key_file": "hungnguyendc-storage-01/outputs/VideoRetalking/a2ea8de1-a4a1-4c05-abe1-b89f881e83d7.mp4",
         },
     }
+    return response_data
+
+
+async def dispatch_mlp_avatargenerations(
+    input_data_list: list[dict],
+    on_done: Optional[Callable[[dict], None]] = None,
+):
+    """Send the avatar generations concurrently, at most
+    AVATAR_GENERATION_CONCURRENCY in flight, and return the ML responses in
+    the same order as the inputs. A failed generation gives its exception in
+    place of the response, so one failure does not lose the others. on_done
+    is called with each response as soon as it arrives."""
+    semaphore = asyncio.Semaphore(settings.AVATAR_GENERATION_CONCURRENCY)
+
+    async def request_with_limit(input_data: dict):
+        async with semaphore:
+            response_data = await request_mlp_avatargeneration(input_data)
+        if on_done is not None:
+            on_done(response_data)
+        return response_data
+
+    return await asyncio.gather(
+        *[request_with_limit(input_data) for input_data in input_data_list],
+        return_exceptions=True,
+    )
+
+
+async def handle_return_mlp_avatargeneration(input_data: dict, db: AsyncSession):
+    response_data = await request_mlp_avatargeneration(input_data)
     response_server = await receiveMLResponse(response_data, db)
     return response_server
 
 
-async def handle_send_cv_mlproxy(input_data: dict, db: Session):
-    # async with aiohttp.ClientSession() as session:
-    #     async with session.post(
-    #         settings.CV_EXTRACTING_URL,
-    #         json=input_data,
-    #     ) as response:
-    #         response_data = await response.json()
+async def handle_send_cv_mlproxy(input_data: dict, db: AsyncSession):
+    if settings.CV_EXTRACTING_URL:
+        response_data = await call_with_resilience(
+            "cv_extracting",
+            lambda: post_ml(settings.CV_EXTRACTING_URL, input_data),
+            deadline=settings.ML_CV_EXTRACTING_DEADLINE,
+            idempotent=True,
+        )
+    else:
+        # Mocked response while the ML service is not configured
+        response_data = "[{'page': '1', 'sections': 'Sample data'}]"
 
-    #     # Update the CV schema
-    #     updated_cv = update_cv(response_data, db)
-    #     return updated_cv.__dict__
-    response_data = "[{'page': '1', 'sections': 'Sample data'}]"
+    # Update the CV schema
     updated_data_obj = {"cv_id": input_data["cv_id"], "texts": response_data}
-    update_cv(updated_data_obj, db)
+    await update_cv(updated_data_obj, db)
     return response_data
 
 
 async def handle_send_question_generation(input_data: dict):
-    # async with aiohttp.ClientSession() as session:
-    #     async with session.post(
-    #         settings.QUESTION_GENERATION_URL,
-    #         json=input_data,
-    #     ) as response:
-    #         response_data = await response.json()
-
-    #     return response_data
+    if settings.QUESTION_GENERATION_URL:
+        return await call_with_resilience(
+            "question_generation",
+            lambda: post_ml(settings.QUESTION_GENERATION_URL, input_data),
+            deadline=settings.ML_QUESTION_GENERATION_DEADLINE,
+        )
+
+    # Mocked response while the ML service is not configured
     response_data = {
-        "task_id": input_data["id"],
+        "task_id": input_data["task_id"],
         "questions": [
             {
                 "question": "How are you today ?",
@@ -91,42 +129,44 @@ async def handle_send_question_generation(input_data: dict):
 
 
 async def handle_send_question_selection(input_data: dict):
-    # async with aiohttp.ClientSession() as session:
-    #     async with session.post(
-    #         settings.QUESTION_SELECTION_URL,
-    #         json=input_data,
-    #     ) as response:
-    #         response_data = await response.json()
-
-    #     return response_data
+    if settings.QUESTION_SELECTION_URL:
+        return await call_with_resilience(
+            "question_selection",
+            lambda: post_ml(settings.QUESTION_SELECTION_URL, input_data),
+            deadline=settings.ML_QUESTION_SELECTION_DEADLINE,
+            idempotent=True,
+        )
+
+    # Mocked response while the ML service is not configured
     questions = input_data["question_bank"]
     return {"question_id": random.choice(questions)["question_id"]}
 
 
-async def handle_send_answer_analysis(input_data: dict, db: Session):
-    # async with aiohttp.ClientSession() as session:
-    #     async with session.post(
-    #         settings.QUESTION_SELECTION_URL,
-    #         json=input_data,
-    #     ) as response:
-    #         response_data = await response.json()
-
-    #     return response_data
-    response = {
-        "task_id": input_data["task_id"],
-        "overall_score": 0.8,
-        "confidence_score": 0.9,
-        "text_relevancy_score": 0.75,
-        "has_bad_words": False,
-        "professional_score": 0.85,
-        "emotion_from_text": "happy",
-        "emotion_from_audio": "calm",
-        "emotion_from_video": "excited",
-    }
+async def handle_send_answer_analysis(input_data: dict, db: AsyncSession):
+    if settings.ANSWER_ANALYSIS_URL:
+        response = await call_with_resilience(
+            "answer_analysis",
+            lambda: post_ml(settings.ANSWER_ANALYSIS_URL, input_data),
+            deadline=settings.ML_ANSWER_ANALYSIS_DEADLINE,
+            idempotent=True,
+        )
+    else:
+        # Mocked response while the ML service is not configured
+        response = {
+            "task_id": input_data["task_id"],
+            "overall_score": 0.8,
+            "confidence_score": 0.9,
+            "text_relevancy_score": 0.75,
+            "has_bad_words": False,
+            "professional_score": 0.85,
+            "emotion_from_text": "happy",
+            "emotion_from_audio": "calm",
+            "emotion_from_video": "excited",
+        }
 
     update_answer_dict = {
         k: v for k, v in response.items() if not k == "task_id"
     }
     update_answer_dict["id"] = input_data["task_id"]
-    updated_answer = update_answer(update_answer_dict, db)
+    await update_answer(update_answer_dict, db)
     return response
@@ -0,0 +1,162 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import aiohttp
+
+from ..constants.config import settings
+from .logger import setup_logger
+from .metrics import increment_counter, register_gauge
+
+logger = setup_logger(__name__)
+
+# Errors of a call to a remote endpoint, is_retryable tells which of them
+# count as a failure of the endpoint
+RETRYABLE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+# Response statuses which count as a failure of the endpoint, the other
+# error statuses are caused by the request itself
+RETRYABLE_STATUSES = {429}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether the error is a failure of the endpoint, a connection error, a
+    timeout or a 5xx or 429 response, which a retry may not hit again"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500 or error.status in RETRYABLE_STATUSES
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Fail fast once the error rate of the recent calls of an endpoint
+    crosses the threshold, then let one probe call through after the reset
+    timeout to decide whether to close again"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        window_size: int,
+        reset_timeout: float,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.window_size = window_size
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.results = deque(maxlen=window_size)
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self.probe_in_flight = False
+        # Half open, only a single probe call is let through
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.state == "half_open":
+            logger.info(f"Circuit of {self.name} is closed again")
+            self.state = "closed"
+            self.probe_in_flight = False
+            self.results.clear()
+        self.results.append(True)
+
+    def record_failure(self):
+        if self.state == "half_open":
+            self._trip()
+            return
+        self.results.append(False)
+        failures = self.results.count(False)
+        if (
+            self.state == "closed"
+            and len(self.results) >= self.window_size
+            and failures / len(self.results) >= self.failure_rate
+        ):
+            self._trip()
+
+    def release_probe(self):
+        """Let another probe through when the probe ended without result"""
+        if self.state == "half_open":
+            self.probe_in_flight = False
+
+    def _trip(self):
+        logger.info(f"Circuit of {self.name} is open")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+        self.results.clear()
+        increment_counter(f"ml_{self.name}_trips")
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Get the circuit breaker of an endpoint, created on first use"""
+    if name not in _breakers:
+        breaker = CircuitBreaker(
+            name,
+            failure_rate=settings.ML_BREAKER_FAILURE_RATE,
+            window_size=settings.ML_BREAKER_WINDOW_SIZE,
+            reset_timeout=settings.ML_BREAKER_RESET_TIMEOUT,
+        )
+        _breakers[name] = breaker
+        register_gauge(
+            f"ml_{name}_circuit_open", lambda: int(breaker.state != "closed")
+        )
+    return _breakers[name]
+
+
+async def call_with_resilience(
+    name: str,
+    func: Callable[[], Awaitable],
+    deadline: Optional[float] = None,
+    idempotent: bool = False,
+):
+    """Call an endpoint through its circuit breaker with a deadline per
+    attempt. Idempotent calls are retried with exponential backoff and full
+    jitter, raises CircuitOpen when the circuit does not allow the call."""
+    breaker = get_circuit_breaker(name)
+    attempts = settings.ML_RETRY_ATTEMPTS if idempotent else 1
+    for attempt in range(attempts):
+        if not breaker.allow_request():
+            increment_counter(f"ml_{name}_short_circuits")
+            raise CircuitOpen(f"Circuit of {name} is open")
+        try:
+            result = await asyncio.wait_for(func(), timeout=deadline)
+        except RETRYABLE_ERRORS as e:
+            if not is_retryable(e):
+                # The endpoint answered, the request itself is at fault
+                breaker.release_probe()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= attempts:
+                raise
+            backoff = min(
+                settings.ML_RETRY_BACKOFF_MAX,
+                settings.ML_RETRY_BACKOFF_BASE * 2**attempt,
+            )
+            logger.info(f"Retry {name} after {type(e).__name__}: {e}")
+            increment_counter(f"ml_{name}_retries")
+            await asyncio.sleep(random.uniform(0, backoff))
+            continue
+        except BaseException:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
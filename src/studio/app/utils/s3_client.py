@@ -1,58 +1,637 @@
 # from fastapi.responses import FileResponse
+import asyncio
+import math
+import os
+from typing import AsyncIterator, BinaryIO, Optional
+
 from boto3 import client
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
 
 from ..constants.config import settings
-from ..utils.handle_file import convert_file
+from ..utils.handle_file import iter_file
+from .disk_cache import DiskLRUCache
+from .logger import setup_logger
+from .metrics import increment_counter
+from .transcoder import (
+    TRANSCODE_PROFILE,
+    TranscodeFailed,
+    TranscoderBusy,
+    transcode,
+)
+
+logger = setup_logger(__name__)
 
 # Configuration Details
 ACCESS_KEY = settings.ACCESS_KEY
 SECRET_KEY = settings.SECRET_KEY
 
+# S3 rejects multipart parts smaller than 5MB, except for the last one, and
+# uploads of more than 10000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_COUNT = 10000
+
+# Validity in seconds of the URLs ffmpeg reads the videos from
+DOWNLOAD_URL_EXPIRATION = 3600
+
+# Content types of the files uploaded from local disk
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+# Write-backs of converted files still running after their response
+_background_tasks = set()
 
-# Connecting to S3
+
+# Connecting to S3, boto3 clients are thread safe so the blocking calls are
+# offloaded to the default thread pool to keep the event loop responsive
 s3_client = client(
     "s3",
     aws_access_key_id=ACCESS_KEY,
     aws_secret_access_key=SECRET_KEY,
+    endpoint_url=settings.S3_ENDPOINT_URL or None,
+    config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS),
+)
+
+# Converted videos, keyed on the bucket, key, ETag and conversion profile
+transcode_cache = DiskLRUCache(
+    "transcode",
+    settings.TRANSCODE_CACHE_DIR,
+    settings.TRANSCODE_CACHE_MAX_BYTES,
+)
+
+# Original videos prefetched during an interview, keyed on the bucket, key
+# and ETag
+video_cache = DiskLRUCache(
+    "video", settings.VIDEO_CACHE_DIR, settings.VIDEO_CACHE_MAX_BYTES
 )
 
 
+class _FileRange:
+    """Streaming body reading only a byte range of an open file"""
+
+    def __init__(self, file: BinaryIO, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int) -> bytes:
+        chunk = self.file.read(min(size, self.remaining))
+        self.remaining -= len(chunk)
+        return chunk
+
+    def close(self):
+        self.file.close()
+
+
+def _parse_range(byte_range: str, size: int) -> Optional[tuple[int, int]]:
+    """First and last byte of a single bytes range, None when it cannot be
+    satisfied. Raises ValueError for the ranges which are not supported."""
+    unit, _, spec = byte_range.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(f"Unsupported range {byte_range}")
+    first, _, last = spec.strip().partition("-")
+    if not first:
+        suffix = int(last)
+        if not suffix or not size:
+            return None
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if end < start:
+        raise ValueError(f"Invalid range {byte_range}")
+    if start >= size:
+        return None
+    return start, min(end, size - 1)
+
+
+async def generate_download_url(
+    bucket_name: str, key: str, expires_in: int = DOWNLOAD_URL_EXPIRATION
+) -> str:
+    """Presigned URL to read the object without credentials"""
+    return await asyncio.to_thread(
+        s3_client.generate_presigned_url,
+        "get_object",
+        Params={"Bucket": bucket_name, "Key": key},
+        ExpiresIn=expires_in,
+    )
+
+
+async def generate_upload_url(
+    bucket_name: str, key: str, content_type: str, expires_in: int
+) -> str:
+    """Presigned URL to PUT the object without credentials, the request must
+    send the same Content-Type"""
+    return await asyncio.to_thread(
+        s3_client.generate_presigned_url,
+        "put_object",
+        Params={
+            "Bucket": bucket_name,
+            "Key": key,
+            "ContentType": content_type,
+        },
+        ExpiresIn=expires_in,
+    )
+
+
+def _presign_parts(
+    bucket_name: str, key: str, upload_id: str, count: int, expires_in: int
+) -> list[str]:
+    return [
+        s3_client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": bucket_name,
+                "Key": key,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expires_in,
+        )
+        for part_number in range(1, count + 1)
+    ]
+
+
+async def create_presigned_multipart_upload(
+    bucket_name: str,
+    key: str,
+    size: int,
+    content_type: str,
+    expires_in: int,
+) -> dict:
+    """Start a multipart upload of size bytes and presign the PUT URL of
+    each of its parts, numbered from 1 in the order of the list"""
+    part_size = max(
+        settings.S3_MULTIPART_PART_SIZE,
+        MIN_PART_SIZE,
+        math.ceil(size / MAX_PART_COUNT),
+    )
+    multipart_upload = await asyncio.to_thread(
+        s3_client.create_multipart_upload,
+        Bucket=bucket_name,
+        Key=key,
+        ContentType=content_type,
+    )
+    upload_id = multipart_upload["UploadId"]
+    part_urls = await asyncio.to_thread(
+        _presign_parts,
+        bucket_name,
+        key,
+        upload_id,
+        math.ceil(size / part_size),
+        expires_in,
+    )
+    return {
+        "upload_id": upload_id,
+        "part_size": part_size,
+        "part_urls": part_urls,
+    }
+
+
+async def complete_direct_upload(
+    bucket_name: str,
+    key: str,
+    upload_id: Optional[str] = None,
+    parts: Optional[list[dict]] = None,
+):
+    """Complete the multipart upload when there is one, then read the size
+    and content type of the object the client uploaded"""
+    try:
+        if upload_id:
+            await asyncio.to_thread(
+                s3_client.complete_multipart_upload,
+                Bucket=bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {
+                            "ETag": part["etag"],
+                            "PartNumber": part["part_number"],
+                        }
+                        for part in sorted(
+                            parts or [], key=lambda part: part["part_number"]
+                        )
+                    ]
+                },
+            )
+        file_head = await asyncio.to_thread(
+            s3_client.head_object, Bucket=bucket_name, Key=key
+        )
+    except Exception:
+        logger.exception(f"Failed to complete the upload of {key}")
+        return {
+            "message": f"No complete upload of {key} in {bucket_name}",
+            "status": False,
+        }
+    return {
+        "size": file_head["ContentLength"],
+        "content_type": file_head.get("ContentType"),
+        "status": True,
+    }
+
+
+def get_hls_url(key: str) -> Optional[str]:
+    """URL of a packaged HLS file under HLS_BASE_URL, None when the HLS
+    files are not served"""
+    if not settings.HLS_BASE_URL:
+        return None
+    return f"{settings.HLS_BASE_URL.rstrip('/')}/{key}"
+
+
 async def download_file(bucket_name: str, key: str):
     """Downloading the file as byte stream"""
     try:
-        file_object = s3_client.get_object(Bucket=bucket_name, Key=key)
+        file_object = await asyncio.to_thread(
+            s3_client.get_object, Bucket=bucket_name, Key=key
+        )
     except Exception:
         return {"message": "Invalid bucket name or path", "status": False}
-    file_content = file_object["Body"].read()
+    file_content = await asyncio.to_thread(file_object["Body"].read)
     return {"file_content": file_content, "status": True}
 
 
+async def _open_cached_stream(
+    bucket_name: str, key: str, byte_range: str, if_none_match: str
+) -> Optional[dict]:
+    """Open the object from the video cache like open_file_stream, None
+    when it has to be read from S3"""
+    try:
+        file_head = await asyncio.to_thread(
+            s3_client.head_object, Bucket=bucket_name, Key=key
+        )
+    except Exception:
+        return None
+    etag = file_head["ETag"]
+    size = file_head["ContentLength"]
+    if if_none_match == etag:
+        return {"status": False, "status_code": 304, "etag": etag}
+
+    bounds = None
+    if byte_range:
+        try:
+            bounds = _parse_range(byte_range, size)
+        except ValueError:
+            return None
+        if bounds is None:
+            return {
+                "status": False,
+                "status_code": 416,
+                "message": f"Range {byte_range} cannot be satisfied",
+            }
+
+    cache_key = video_cache.make_key(bucket_name, key, etag)
+    file = await asyncio.to_thread(video_cache.open, cache_key)
+    if file is None:
+        return None
+    file_object = {"Body": file, "ContentLength": size, "ETag": etag}
+    if bounds:
+        start, end = bounds
+        file_object["Body"] = await asyncio.to_thread(
+            _FileRange, file, start, end - start + 1
+        )
+        file_object["ContentLength"] = end - start + 1
+        file_object["ContentRange"] = f"bytes {start}-{end}/{size}"
+    return {"file_object": file_object, "status": True}
+
+
+async def open_file_stream(
+    bucket_name: str,
+    key: str,
+    byte_range: str = None,
+    if_none_match: str = None,
+    cached: bool = False,
+):
+    """Open the object for streaming, limited to the byte range when given.
+    A status code of 304 is returned when the ETag matches if_none_match and
+    416 when the range cannot be satisfied. A cached object is read from the
+    video cache when it was prefetched."""
+    if cached:
+        res = await _open_cached_stream(
+            bucket_name, key, byte_range, if_none_match
+        )
+        if res is not None:
+            return res
+
+    conditions = {}
+    if byte_range:
+        conditions["Range"] = byte_range
+    if if_none_match:
+        conditions["IfNoneMatch"] = if_none_match
+    try:
+        file_object = await asyncio.to_thread(
+            s3_client.get_object, Bucket=bucket_name, Key=key, **conditions
+        )
+    except ClientError as e:
+        metadata = e.response.get("ResponseMetadata", {})
+        status_code = metadata.get("HTTPStatusCode")
+        if status_code in (304, 416):
+            return {
+                "status": False,
+                "status_code": status_code,
+                "etag": metadata.get("HTTPHeaders", {}).get("etag"),
+                "message": f"Range {byte_range} cannot be satisfied",
+            }
+        return {"message": "Invalid bucket name or path", "status": False}
+    except Exception:
+        return {"message": "Invalid bucket name or path", "status": False}
+    return {"file_object": file_object, "status": True}
+
+
+async def iter_file_stream(body):
+    """Yield the streaming body of an object in S3_DOWNLOAD_CHUNK_SIZE chunks"""
+    try:
+        while True:
+            chunk = await asyncio.to_thread(
+                body.read, settings.S3_DOWNLOAD_CHUNK_SIZE
+            )
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+
+async def download_transcoded_file(bucket_name: str, cache_key: str):
+    """Fill the transcode cache from the copy written back to S3"""
+    key = f"{settings.TRANSCODE_CACHE_S3_PREFIX}/{cache_key}.mp4"
+    with transcode_cache.new_temp_file() as temp_file:
+        try:
+            await asyncio.to_thread(
+                s3_client.download_fileobj, bucket_name, key, temp_file
+            )
+        except ClientError:
+            os.remove(temp_file.name)
+            return False
+    await asyncio.to_thread(
+        transcode_cache.put_file, cache_key, temp_file.name
+    )
+    increment_counter("transcode_cache_s3_hits")
+    return True
+
+
+async def upload_transcoded_file(bucket_name: str, cache_key: str):
+    """Write the converted file back to S3, failures are only logged"""
+    key = f"{settings.TRANSCODE_CACHE_S3_PREFIX}/{cache_key}.mp4"
+    try:
+        await asyncio.to_thread(
+            s3_client.upload_file,
+            transcode_cache.path(cache_key),
+            bucket_name,
+            key,
+            ExtraArgs={"ContentType": "video/mp4"},
+        )
+    except Exception:
+        logger.exception(f"Failed to write back the converted file {key}")
+
+
+async def prefetch_file(bucket_name: str, key: str) -> bool:
+    """Download the object into the video cache, returns False when it was
+    cached already"""
+    file_head = await asyncio.to_thread(
+        s3_client.head_object, Bucket=bucket_name, Key=key
+    )
+    cache_key = video_cache.make_key(bucket_name, key, file_head["ETag"])
+    if await asyncio.to_thread(os.path.exists, video_cache.path(cache_key)):
+        return False
+    temp_file = await asyncio.to_thread(video_cache.new_temp_file)
+    try:
+        with temp_file:
+            await asyncio.to_thread(
+                s3_client.download_fileobj, bucket_name, key, temp_file
+            )
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+    await asyncio.to_thread(video_cache.put_file, cache_key, temp_file.name)
+    return True
+
+
+def _open_cached(file):
+    """Stream of a cached file with its size"""
+    return {
+        "stream": iter_file(file),
+        "content_length": os.fstat(file.fileno()).st_size,
+        "status": True,
+    }
+
+
+async def _tee_into_cache(
+    chunks: AsyncIterator[bytes], bucket_name: str, cache_key: str
+):
+    """Yield the chunks while writing them into the transcode cache, the file
+    is only added to the cache when the stream completed"""
+    temp_file = await asyncio.to_thread(transcode_cache.new_temp_file)
+    completed = False
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(temp_file.write, chunk)
+            yield chunk
+        temp_file.close()
+        await asyncio.to_thread(
+            transcode_cache.put_file, cache_key, temp_file.name
+        )
+        completed = True
+        if settings.TRANSCODE_CACHE_S3_PREFIX:
+            task = asyncio.create_task(
+                upload_transcoded_file(bucket_name, cache_key)
+            )
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+    finally:
+        temp_file.close()
+        if not completed and os.path.exists(temp_file.name):
+            os.remove(temp_file.name)
+        await chunks.aclose()
+
+
+async def _prepend(first_chunk: bytes, chunks: AsyncIterator[bytes]):
+    try:
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await chunks.aclose()
+
+
 async def download_convert_file(bucket_name: str, key: str):
-    """Downloading and convert the codecs of the file as byte stream"""
+    """Stream the file with converted codecs. The converted file is served
+    from the transcode cache when it was converted before, otherwise the
+    output of ffmpeg is streamed while it is written into the cache."""
     try:
-        file_object = s3_client.get_object(Bucket=bucket_name, Key=key)
+        file_head = await asyncio.to_thread(
+            s3_client.head_object, Bucket=bucket_name, Key=key
+        )
     except Exception:
         return {"message": "Invalid bucket name or path", "status": False}
-    file_content = file_object["Body"].read()
-    # Convert the file content using FFmpeg
-    conversion_result = convert_file(file_content)
-    if conversion_result["status"]:
-        # Return the converted file data
-        return {"file_content": conversion_result["file_data"], "status": True}
+    cache_key = transcode_cache.make_key(
+        bucket_name, key, file_head["ETag"], TRANSCODE_PROFILE
+    )
+    file = await asyncio.to_thread(transcode_cache.open, cache_key)
+    if file:
+        return _open_cached(file)
+
+    if settings.TRANSCODE_CACHE_S3_PREFIX and await download_transcoded_file(
+        bucket_name, cache_key
+    ):
+        file = await asyncio.to_thread(
+            open, transcode_cache.path(cache_key), "rb"
+        )
+        return _open_cached(file)
+
+    input_url = await generate_download_url(bucket_name, key)
+    stream = _tee_into_cache(transcode(input_url), bucket_name, cache_key)
+    # Wait for the first chunk, so a busy transcoder or an invalid input is
+    # reported before the response starts
+    try:
+        first_chunk = await stream.__anext__()
+    except TranscoderBusy as e:
+        return {"message": str(e), "busy": True, "status": False}
+    except (TranscodeFailed, StopAsyncIteration) as e:
+        return {"message": f"Error converting file: {e}", "status": False}
+    return {
+        "stream": _prepend(first_chunk, stream),
+        "content_length": None,
+        "status": True,
+    }
+
+
+async def upload_stream(
+    file: UploadFile, bucket_name: str, key: str, content_type: str = None
+):
+    """Stream the upload file to S3 in parts of S3_MULTIPART_PART_SIZE,
+    uploading up to S3_MULTIPART_CONCURRENCY parts at the same time. Files
+    smaller than one part are sent with a single PUT."""
+    part_size = max(settings.S3_MULTIPART_PART_SIZE, MIN_PART_SIZE)
+    extra_args = {"ContentType": content_type} if content_type else {}
 
-    return {"file_content": None, "status": False}
+    body = await file.read(part_size)
+    if len(body) < part_size:
+        await asyncio.to_thread(
+            s3_client.put_object,
+            Bucket=bucket_name,
+            Key=key,
+            Body=body,
+            **extra_args,
+        )
+        return
+
+    multipart_upload = await asyncio.to_thread(
+        s3_client.create_multipart_upload,
+        Bucket=bucket_name,
+        Key=key,
+        **extra_args,
+    )
+    upload_id = multipart_upload["UploadId"]
+    # Limits the parts held in memory as well as the parallel part uploads
+    semaphore = asyncio.Semaphore(settings.S3_MULTIPART_CONCURRENCY)
+    etags = {}
+
+    async def upload_part(part_number: int, part_body: bytes):
+        try:
+            response = await asyncio.to_thread(
+                s3_client.upload_part,
+                Bucket=bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=part_body,
+            )
+            etags[part_number] = response["ETag"]
+        finally:
+            semaphore.release()
+
+    tasks = []
+    try:
+        part_number = 1
+        while body:
+            await semaphore.acquire()
+            # Stop reading the file as soon as a part failed
+            for task in tasks:
+                if task.done() and task.exception():
+                    raise task.exception()
+            tasks.append(asyncio.create_task(upload_part(part_number, body)))
+            part_number += 1
+            body = await file.read(part_size)
+        await asyncio.gather(*tasks)
+        await asyncio.to_thread(
+            s3_client.complete_multipart_upload,
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"ETag": etag, "PartNumber": number}
+                    for number, etag in sorted(etags.items())
+                ]
+            },
+        )
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"Abort multipart upload of {key}")
+        await asyncio.to_thread(
+            s3_client.abort_multipart_upload,
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+        )
+        raise
+
+
+def get_upload_key(path: str, type: str, user_id: str, file_name: str) -> str:
+    """Key of an uploaded file of the user"""
+    return f"{path}/{type}/{user_id}/{file_name}"
 
 
 async def upload_file(
-    file, bucket_name: str, path: str, type: str, user_id: str, file_name: str
+    file: UploadFile,
+    bucket_name: str,
+    path: str,
+    type: str,
+    user_id: str,
+    file_name: str,
 ):
     """Uploading the file as byte stream"""
-    key = f"{path}/{type}/{user_id}/{file_name}"
+    key = get_upload_key(path, type, user_id, file_name)
     try:
-        s3_client.upload_fileobj(file, bucket_name, key)
+        await upload_stream(file, bucket_name, key, file.content_type)
         return {"bucket_name": bucket_name, "path": key, "status": True}
     except Exception:
+        logger.exception(f"Failed to upload {key} to {bucket_name}")
         return {
             "message": f"Invalid bucket name {bucket_name} or path {key}",
             "status": False,
         }
+
+
+async def upload_directory(directory: str, bucket_name: str, prefix: str):
+    """Upload all files of the directory under the prefix, keeping their
+    relative paths"""
+    semaphore = asyncio.Semaphore(settings.S3_MULTIPART_CONCURRENCY)
+
+    async def upload(file_path: str):
+        relative_path = os.path.relpath(file_path, directory)
+        key = f"{prefix}/{relative_path.replace(os.sep, '/')}"
+        extension = os.path.splitext(file_path)[1]
+        extra_args = {}
+        if extension in CONTENT_TYPES:
+            extra_args["ContentType"] = CONTENT_TYPES[extension]
+        async with semaphore:
+            await asyncio.to_thread(
+                s3_client.upload_file,
+                file_path,
+                bucket_name,
+                key,
+                ExtraArgs=extra_args,
+            )
+
+    file_paths = [
+        os.path.join(root, file_name)
+        for root, _, file_names in os.walk(directory)
+        for file_name in file_names
+    ]
+    await asyncio.gather(*[upload(file_path) for file_path in file_paths])
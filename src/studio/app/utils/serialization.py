@@ -0,0 +1,74 @@
+import uuid
+from typing import Any, List, Optional, Type
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Fields of the response schemas, built on first use
+_projections: dict = {}
+_missing = object()
+
+
+def _default(value):
+    # asyncpg returns its own subclass of UUID which orjson does not know
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value)}")
+
+
+class JSONResponse(ORJSONResponse):
+    """Response encoded with orjson, also accepting the values of the rows
+    read through asyncpg"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def _projection(schema: Type[BaseModel]) -> list:
+    if schema not in _projections:
+        _projections[schema] = list(schema.__fields__.items())
+    return _projections[schema]
+
+
+def project(row, schema: Type[BaseModel]) -> dict:
+    """Response dict of an ORM row with the fields of the schema. The rows
+    come from the database, so they are not validated again. A field the
+    row lacks takes its default when it is optional in the schema, a
+    missing required field raises AttributeError."""
+    projected = {}
+    for name, field in _projection(schema):
+        value = getattr(row, name, _missing)
+        if value is _missing:
+            if field.required:
+                raise AttributeError(
+                    f"The row has no {name}, required by {schema.__name__}"
+                )
+            value = field.get_default()
+        projected[name] = value
+    return projected
+
+
+def project_fields(row, fields: List[str]) -> dict:
+    """Response dict of a row with only the selected fields"""
+    return {name: getattr(row, name) for name in fields}
+
+
+def page_response(
+    page: dict, schema: Type[BaseModel], fields: Optional[List[str]] = None
+) -> JSONResponse:
+    """Encode a page of rows as the Page[schema] response, trimmed to the
+    fields when given. Returning the response itself skips the validation
+    against the response_model."""
+    if fields:
+        items = [project_fields(row, fields) for row in page["items"]]
+    else:
+        items = [project(row, schema) for row in page["items"]]
+    return JSONResponse(
+        {
+            "items": items,
+            "next_cursor": page["next_cursor"],
+        }
+    )
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator
+
+from ..constants.config import settings
+from .logger import setup_logger
+from .metrics import increment_counter, register_gauge
+
+logger = setup_logger(__name__)
+
+# Codec arguments of the video conversion and the fragmented MP4 output which
+# can be streamed while it is produced. Both are part of the transcode cache
+# key so a change of the arguments does not serve the old conversions
+FFMPEG_CODEC_ARGS = ["-vcodec", "libx264"]
+FFMPEG_STREAM_ARGS = [
+    "-movflags",
+    "frag_keyframe+empty_moov+default_base_moof",
+    "-frag_duration",
+    "1000000",
+    "-f",
+    "mp4",
+]
+TRANSCODE_PROFILE = " ".join(FFMPEG_CODEC_ARGS + FFMPEG_STREAM_ARGS)
+
+# Size in bytes of the chunks read from the ffmpeg output
+CHUNK_SIZE = 256 * 1024
+
+# HLS renditions of the packaged videos, smaller videos are not upscaled
+HLS_RENDITIONS = [
+    {"height": 720, "video_bitrate": "2500k", "audio_bitrate": "128k"},
+    {"height": 360, "video_bitrate": "800k", "audio_bitrate": "96k"},
+]
+HLS_SEGMENT_SECONDS = 4
+HLS_MASTER_PLAYLIST = "master.m3u8"
+
+# Global cap on the ffmpeg processes of this worker
+_slots = asyncio.Semaphore(settings.FFMPEG_MAX_PROCESSES)
+_running = 0
+_waiting = 0
+
+register_gauge("ffmpeg_processes", lambda: _running)
+register_gauge("ffmpeg_waiting", lambda: _waiting)
+
+
+class TranscoderBusy(Exception):
+    pass
+
+
+class TranscodeFailed(Exception):
+    pass
+
+
+async def _acquire_slot(bounded: bool = True):
+    """Wait for a free ffmpeg slot, raises TranscoderBusy when the queue of
+    waiting requests is full. Background work is not bounded by the queue."""
+    global _running, _waiting
+    if bounded and _slots.locked() and _waiting >= settings.FFMPEG_MAX_WAITING:
+        increment_counter("ffmpeg_rejected")
+        raise TranscoderBusy("Too many videos are being converted")
+    _waiting += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _waiting -= 1
+    _running += 1
+
+
+def _release_slot():
+    global _running
+    _running -= 1
+    _slots.release()
+
+
+async def transcode(input_url: str) -> AsyncIterator[bytes]:
+    """Convert the video at the URL with ffmpeg and yield the fragmented MP4
+    output as it is produced. ffmpeg reads the input itself so that it can
+    seek to an index at the end of the file, which a pipe does not allow."""
+    await _acquire_slot()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-i",
+            input_url,
+            *FFMPEG_CODEC_ARGS,
+            *FFMPEG_STREAM_ARGS,
+            "pipe:1",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except BaseException:
+        _release_slot()
+        raise
+
+    # Drain stderr concurrently so a chatty ffmpeg never blocks on it
+    stderr = asyncio.create_task(process.stderr.read())
+    increment_counter("ffmpeg_started")
+    try:
+        while True:
+            chunk = await process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        await process.wait()
+        if process.returncode != 0:
+            increment_counter("ffmpeg_failed")
+            error = (await stderr).decode(errors="replace").strip()
+            raise TranscodeFailed(error[-500:])
+    finally:
+        stderr.cancel()
+        try:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        finally:
+            # Released once the process is reaped so that no other ffmpeg
+            # starts while it runs, and also when a cancelled response
+            # cancels the wait
+            _release_slot()
+
+
+async def _run(*args: str) -> bytes:
+    """Run a ffmpeg tool to completion and return its output"""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    if process.returncode != 0:
+        error = stderr.decode(errors="replace").strip()
+        raise TranscodeFailed(error[-500:])
+    return stdout
+
+
+async def probe(input_url: str) -> dict:
+    """Read the streams and format of a media file with ffprobe"""
+    output = await _run(
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_streams",
+        "-show_format",
+        input_url,
+    )
+    return json.loads(output)
+
+
+async def package_hls(input_url: str, output_dir: str) -> str:
+    """Segment the video at the URL into the HLS_RENDITIONS, written into
+    output_dir as <rendition>/index.m3u8 with their segments. Returns the
+    name of the master playlist."""
+    await _acquire_slot(bounded=False)
+    try:
+        return await _package_hls(input_url, output_dir)
+    finally:
+        _release_slot()
+
+
+async def _package_hls(input_url: str, output_dir: str) -> str:
+    media = await probe(input_url)
+    has_audio = any(
+        stream["codec_type"] == "audio" for stream in media["streams"]
+    )
+
+    count = len(HLS_RENDITIONS)
+    filters = [
+        f"[0:v]split={count}" + "".join(f"[v{i}]" for i in range(count))
+    ]
+    stream_args = []
+    stream_map = []
+    for i, rendition in enumerate(HLS_RENDITIONS):
+        filters.append(
+            f"[v{i}]scale=-2:'min({rendition['height']},ih)'[v{i}out]"
+        )
+        stream_args += [
+            "-map",
+            f"[v{i}out]",
+            f"-c:v:{i}",
+            "libx264",
+            f"-b:v:{i}",
+            rendition["video_bitrate"],
+        ]
+        if has_audio:
+            stream_args += [
+                "-map",
+                "0:a:0",
+                f"-c:a:{i}",
+                "aac",
+                f"-b:a:{i}",
+                rendition["audio_bitrate"],
+            ]
+            stream_map.append(f"v:{i},a:{i}")
+        else:
+            stream_map.append(f"v:{i}")
+
+    await _run(
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        input_url,
+        "-filter_complex",
+        ";".join(filters),
+        *stream_args,
+        "-pix_fmt",
+        "yuv420p",
+        # Aligned keyframes let the player switch between renditions
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-f",
+        "hls",
+        "-hls_time",
+        str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_segment_filename",
+        os.path.join(output_dir, "%v", "segment_%03d.ts"),
+        "-master_pl_name",
+        HLS_MASTER_PLAYLIST,
+        "-var_stream_map",
+        " ".join(stream_map),
+        os.path.join(output_dir, "%v", "index.m3u8"),
+    )
+    return HLS_MASTER_PLAYLIST
@@ -0,0 +1,102 @@
+"""Requests/sec of /question/get_by_interview_session/ and
+/generation/get_by_user/ at growing concurrency.
+
+The app is served in process by default. To compare revisions, run a server
+of each revision on the same database and point --base-url to it, the seeded
+rows are written to the database directly.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from app.api import PREFIX, app
+from app.db.database import AsyncSessionLocal
+from app.models.generation_model import Generation
+from app.models.question_model import Question
+from app.models.user_model import User
+
+
+async def seed(rows: int) -> tuple[str, str]:
+    """A user with generations and an interview session with questions"""
+    user_id = uuid.uuid4()
+    interview_session_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        db.add(User(id=user_id, username=f"bench-{user_id}", password="p"))
+        generations = [
+            Generation(id=uuid.uuid4(), user_id=user_id, type="generated")
+            for _ in range(rows)
+        ]
+        db.add_all(generations)
+        db.add_all(
+            Question(
+                avatar_generation_id=generation.id,
+                cv_id=uuid.uuid4(),
+                jd_id=uuid.uuid4(),
+                question_context=f"Question {index}",
+                topic=index % 3,
+                interview_session_id=interview_session_id,
+            )
+            for index, generation in enumerate(generations)
+        )
+        await db.commit()
+    return str(user_id), str(interview_session_id)
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict,
+    requests: int,
+    concurrency: int,
+) -> float:
+    """Requests/sec of the URL with concurrency requests in flight"""
+
+    async def worker(count: int):
+        for _ in range(count):
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(worker(requests // concurrency) for _ in range(concurrency))
+    )
+    return (
+        requests // concurrency * concurrency / (time.perf_counter() - start)
+    )
+
+
+async def main(args):
+    user_id, interview_session_id = await seed(args.rows)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(app=app, base_url="http://bench")
+
+    endpoints = [
+        (
+            f"{PREFIX}/question/get_by_interview_session/",
+            {"interview_session_id": interview_session_id},
+        ),
+        (f"{PREFIX}/generation/get_by_user/", {"user_id": user_id}),
+    ]
+    async with client:
+        for url, params in endpoints:
+            for concurrency in args.concurrency:
+                rate = await measure(
+                    client, url, params, args.requests, concurrency
+                )
+                print(f"{url} concurrency {concurrency}: {rate:.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 10, 50]
+    )
+    parser.add_argument("--base-url")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""Wall time to persist the questions of one generation job, with their
+ground truths, row by row and in bulk."""
+import argparse
+import asyncio
+import uuid
+
+from app.crud.question_crud import (
+    bulk_create_questions_with_texts,
+    create_question,
+)
+from app.crud.text_crud import create_text
+from app.db.database import AsyncSessionLocal
+from app.models.question_model import Question
+from app.models.text_model import Text
+from benchmarks.common import stopwatch
+
+
+def question_rows(count: int, ground_truths: int) -> list[dict]:
+    interview_session_id = uuid.uuid4()
+    return [
+        {
+            "avatar_generation_id": uuid.uuid4(),
+            "cv_id": uuid.uuid4(),
+            "jd_id": uuid.uuid4(),
+            "question_context": f"Question {index}",
+            "topic": index % 3,
+            "interview_session_id": interview_session_id,
+            "ground_truths": [
+                f"Answer {index}.{number}" for number in range(ground_truths)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+async def create_row_by_row(questions: list[dict], db):
+    """The previous path, one commit and refresh per row"""
+    for question in questions:
+        ground_truths = question.pop("ground_truths")
+        new_question = await create_question(Question(**question), db)
+        for ground_truth in ground_truths:
+            await create_text(
+                Text(parent_id=new_question.id, text=ground_truth), db
+            )
+
+
+async def main(args):
+    for label, create in (
+        ("row by row", create_row_by_row),
+        ("bulk", bulk_create_questions_with_texts),
+    ):
+        questions = question_rows(args.questions, args.ground_truths)
+        async with AsyncSessionLocal() as db:
+            with stopwatch(
+                f"{label}, {args.questions} questions with"
+                f" {args.ground_truths} ground truths"
+            ):
+                await create(questions, db)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--ground-truths", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,63 @@
+"""Latency of /text/delete/{id} as the texts table grows, which previously
+answered with the whole table."""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.api import PREFIX, app
+from app.db.database import AsyncSessionLocal
+from app.models.text_model import Text
+from benchmarks.common import summarize
+
+BATCH_SIZE = 10000
+
+
+async def grow_texts(rows: int) -> list[uuid.UUID]:
+    """Insert rows texts, returns their ids"""
+    ids = [uuid.uuid4() for _ in range(rows)]
+    async with AsyncSessionLocal() as db:
+        for start in range(0, rows, BATCH_SIZE):
+            await db.execute(
+                insert(Text).values(
+                    [
+                        {"id": text_id, "parent_id": text_id, "text": "Text"}
+                        for text_id in ids[start : start + BATCH_SIZE]
+                    ]
+                )
+            )
+        await db.commit()
+    return ids
+
+
+async def count_texts() -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(func.count()).select_from(Text))
+        return result.scalar_one()
+
+
+async def main(args):
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for size in args.sizes:
+            rows = await count_texts()
+            ids = await grow_texts(max(size - rows, args.deletes))
+            rows = await count_texts()
+            timings = []
+            for text_id in ids[: args.deletes]:
+                start = time.perf_counter()
+                response = await client.get(f"{PREFIX}/text/delete/{text_id}")
+                timings.append(time.perf_counter() - start)
+                response.raise_for_status()
+            print(f"delete, {rows} texts: {summarize(timings)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000]
+    )
+    parser.add_argument("--deletes", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
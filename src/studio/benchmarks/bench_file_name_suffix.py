@@ -0,0 +1,98 @@
+"""Latency of allocating the " (n)" suffix of a duplicate image name when the
+table holds --rows images of the name, with the previous regex scan and with
+the file name counter."""
+import argparse
+import asyncio
+import re
+import time
+import uuid
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as upsert
+
+from app.crud.file_name_counter_crud import allocate_file_name
+from app.db.database import AsyncSessionLocal
+from app.models.file_name_counter_model import FileNameCounter
+from app.models.image_model import Image
+from benchmarks.common import summarize
+
+BATCH_SIZE = 5000
+
+
+async def seed(user_id: uuid.UUID, file_name: str, rows: int):
+    """Images named file_name, file_name (1)... and their counter"""
+    async with AsyncSessionLocal() as db:
+        for start in range(0, rows, BATCH_SIZE):
+            await db.execute(
+                insert(Image).values(
+                    [
+                        {
+                            "id": uuid.uuid4(),
+                            "user_id": user_id,
+                            "file_name": f"{file_name} ({count})"
+                            if count
+                            else file_name,
+                            "extension": "png",
+                            "size": 3,
+                        }
+                        for count in range(
+                            start, min(start + BATCH_SIZE, rows)
+                        )
+                    ]
+                )
+            )
+        await db.execute(
+            upsert(FileNameCounter).values(
+                asset_type="image",
+                user_id=user_id,
+                file_name=file_name,
+                count=rows - 1,
+            )
+        )
+        await db.commit()
+
+
+async def scan_file_name(user_id: uuid.UUID, file_name: str, db) -> str:
+    """The previous path, a regex scan of the names parsed in Python"""
+    result = await db.execute(
+        select(Image.file_name).filter(
+            Image.file_name.op("~")(rf"{file_name} \(\d+\)")
+        )
+    )
+    count = max(
+        int(re.search(r"\((\d+)\)", name).group(1))
+        for name in result.scalars()
+    )
+    return f"{file_name} ({count + 1})"
+
+
+async def main(args):
+    user_id = uuid.uuid4()
+    file_name = f"bench-{user_id.hex[:8]}"
+    await seed(user_id, file_name, args.rows)
+
+    for label, allocate in (
+        ("regex scan", scan_file_name),
+        (
+            "counter",
+            lambda user_id, file_name, db: allocate_file_name(
+                "image", user_id, file_name, db
+            ),
+        ),
+    ):
+        timings = []
+        for _ in range(args.allocations):
+            async with AsyncSessionLocal() as db:
+                start = time.perf_counter()
+                await allocate(user_id, file_name, db)
+                timings.append(time.perf_counter() - start)
+                # Keep the counter in line with the rows
+                await db.rollback()
+        print(f"{label}, {args.rows} rows: {summarize(timings)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--allocations", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""p50/p99 latency of sequential and concurrent ML calls, through the shared
+ML client and through a new aiohttp session per call as before.
+
+A stub ML server answering after --delay seconds is served in process unless
+--url points to one.
+"""
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+from aiohttp import web
+
+from app.utils.ml_client import close_ml_client, post_ml, start_ml_client
+from benchmarks.common import summarize
+
+
+async def start_stub(delay: float) -> web.AppRunner:
+    async def select(request):
+        data = await request.json()
+        await asyncio.sleep(delay)
+        return web.json_response(
+            {"question_id": data["question_bank"][0]["question_id"]}
+        )
+
+    app = web.Application()
+    app.add_routes([web.post("/select", select)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def post_with_new_session(url: str, input_data: dict) -> dict:
+    """The previous path, a client session per call"""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=input_data) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+async def timed(post, url: str, input_data: dict) -> Optional[float]:
+    """Latency of the call, None when it failed"""
+    start = time.perf_counter()
+    try:
+        await post(url, input_data)
+    except aiohttp.ClientError:
+        return None
+    return time.perf_counter() - start
+
+
+def report(label: str, timings: list[Optional[float]]):
+    succeeded = [timing for timing in timings if timing is not None]
+    print(
+        f"{label}: {summarize(succeeded)}"
+        f"  failed {len(timings) - len(succeeded)}"
+    )
+
+
+async def main(args):
+    runner = None
+    url = args.url
+    if url is None:
+        runner = await start_stub(args.delay)
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/select"
+    await start_ml_client()
+    input_data = {"question_bank": [{"question_id": "q1"}]}
+
+    for label, post in (
+        ("shared client", post_ml),
+        ("session per call", post_with_new_session),
+    ):
+        sequential = [
+            await timed(post, url, input_data) for _ in range(args.calls)
+        ]
+        report(f"{label}, {args.calls} sequential", sequential)
+        concurrent = await asyncio.gather(
+            *(timed(post, url, input_data) for _ in range(args.calls))
+        )
+        report(f"{label}, {args.calls} concurrent", concurrent)
+
+    await close_ml_client()
+    if runner is not None:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--delay", type=float, default=0.005)
+    parser.add_argument("--url")
+    asyncio.run(main(parser.parse_args()))
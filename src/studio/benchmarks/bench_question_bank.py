@@ -0,0 +1,135 @@
+"""Latency of building the question bank of an interviewer with --generations
+generated avatars, with the previous Python side filter and with the join,
+and of /question/send/question_selection when the bank is not cached."""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import insert, select
+
+from app.api import PREFIX, app
+from app.constants.config import settings
+from app.crud.question_crud import (
+    get_all_questions_by_interviewer_id_and_interview_session_id,
+)
+from app.db.database import AsyncSessionLocal, async_engine
+from app.models.generation_model import Generation
+from app.models.question_model import Question
+from app.services.question_selection import forget_interview_sessions
+from benchmarks.common import summarize
+
+BATCH_SIZE = 10000
+
+
+async def seed(generations: int, questions: int) -> tuple[str, str, list]:
+    """An interviewer with generations and a session asked by the first of
+    them, returns their ids and the question ids"""
+    interviewer_id = uuid.uuid4()
+    interview_session_id = uuid.uuid4()
+    generation_ids = [uuid.uuid4() for _ in range(generations)]
+    question_ids = [uuid.uuid4() for _ in range(questions)]
+    async with AsyncSessionLocal() as db:
+        for start in range(0, generations, BATCH_SIZE):
+            await db.execute(
+                insert(Generation).values(
+                    [
+                        {"id": generation_id, "user_id": interviewer_id}
+                        for generation_id in generation_ids[
+                            start : start + BATCH_SIZE
+                        ]
+                    ]
+                )
+            )
+        await db.execute(
+            insert(Question).values(
+                [
+                    {
+                        "id": question_id,
+                        "avatar_generation_id": generation_id,
+                        "cv_id": uuid.uuid4(),
+                        "jd_id": uuid.uuid4(),
+                        "question_context": f"Question {index}",
+                        "topic": index % 3,
+                        "interview_session_id": interview_session_id,
+                    }
+                    for index, (question_id, generation_id) in enumerate(
+                        zip(question_ids, generation_ids)
+                    )
+                ]
+            )
+        )
+        await db.commit()
+    return str(interviewer_id), str(interview_session_id), question_ids
+
+
+async def filter_in_python(
+    interviewer_id: str, interview_session_id: str, db
+) -> list[Question]:
+    """The previous path, the ids of the generations matched in Python"""
+    result = await db.execute(
+        select(Question).filter(
+            Question.interview_session_id == interview_session_id
+        )
+    )
+    questions = result.scalars().all()
+    result = await db.execute(
+        select(Generation).filter(
+            Generation.user_id == interviewer_id,
+            Generation.type == "generated",
+        )
+    )
+    generation_ids = [generation.id for generation in result.scalars()]
+    return [
+        question
+        for question in questions
+        if question.avatar_generation_id in generation_ids
+    ]
+
+
+async def main(args):
+    interviewer_id, interview_session_id, question_ids = await seed(
+        args.generations, args.questions
+    )
+
+    for label, build in (
+        ("python filter", filter_in_python),
+        ("join", get_all_questions_by_interviewer_id_and_interview_session_id),
+    ):
+        timings = []
+        for _ in range(args.repeats):
+            async with AsyncSessionLocal() as db:
+                start = time.perf_counter()
+                await build(interviewer_id, interview_session_id, db)
+                timings.append(time.perf_counter() - start)
+        print(f"{label}, {args.generations} generations: {summarize(timings)}")
+
+    # The seeded generations have no video to prefetch
+    settings.VIDEO_PREFETCH_COUNT = 0
+    timings = []
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for question_id in question_ids:
+            forget_interview_sessions([interview_session_id])
+            start = time.perf_counter()
+            response = await client.post(
+                f"{PREFIX}/question/send/question_selection",
+                json={
+                    "interviewer_id": interviewer_id,
+                    "interview_session_id": interview_session_id,
+                    "question_id": str(question_id),
+                    "is_answered": True,
+                },
+            )
+            timings.append(time.perf_counter() - start)
+            response.raise_for_status()
+    print(f"question_selection, bank not cached: {summarize(timings)}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--generations", type=int, default=10_000)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
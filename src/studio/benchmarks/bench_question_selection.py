@@ -0,0 +1,96 @@
+"""Latency of /question/send/question_selection over simulated interviews of
+--questions questions, with the selection state kept in memory and with the
+state rebuilt from the database on every answer as before. The ML selector
+is the one of the settings, mocked when QUESTION_SELECTION_URL is not set."""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from app.api import PREFIX, app
+from app.constants.config import settings
+from app.crud.generation_crud import bulk_create_generations
+from app.crud.question_crud import bulk_create_questions_with_texts
+from app.db.database import AsyncSessionLocal, async_engine
+from app.services.question_selection import forget_interview_sessions
+from app.utils.ml_client import close_ml_client, start_ml_client
+from benchmarks.common import summarize
+
+
+async def seed(questions: int) -> tuple[str, str, str]:
+    """An interview session asked by avatars of the interviewer, returns
+    the interviewer id, session id and first question id"""
+    interviewer_id = uuid.uuid4()
+    interview_session_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        generation_ids = await bulk_create_generations(
+            [
+                {"id": uuid.uuid4(), "user_id": interviewer_id}
+                for _ in range(questions)
+            ],
+            db,
+        )
+        question_ids = await bulk_create_questions_with_texts(
+            [
+                {
+                    "avatar_generation_id": generation_id,
+                    "cv_id": uuid.uuid4(),
+                    "jd_id": uuid.uuid4(),
+                    "topic": index % 3,
+                    "question_context": f"Question {index}",
+                    "interview_session_id": interview_session_id,
+                }
+                for index, generation_id in enumerate(generation_ids)
+            ],
+            db,
+        )
+    return str(interviewer_id), str(interview_session_id), question_ids[0]
+
+
+async def interview(client: httpx.AsyncClient, questions: int, cached: bool):
+    """Answer every question of a new session, returns the latencies"""
+    interviewer_id, interview_session_id, question_id = await seed(questions)
+    timings = []
+    for _ in range(questions):
+        if not cached:
+            forget_interview_sessions([interview_session_id])
+        start = time.perf_counter()
+        response = await client.post(
+            f"{PREFIX}/question/send/question_selection",
+            json={
+                "interviewer_id": interviewer_id,
+                "interview_session_id": interview_session_id,
+                "question_id": str(question_id),
+                "is_answered": True,
+            },
+        )
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+        question_id = response.json()["question_id"]
+    return timings
+
+
+async def main(args):
+    # The seeded generations have no video to prefetch
+    settings.VIDEO_PREFETCH_COUNT = 0
+    await start_ml_client()
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for label, cached in (("state in memory", True), ("rebuilt", False)):
+            timings = []
+            for _ in range(args.interviews):
+                timings += await interview(client, args.questions, cached)
+            print(
+                f"{label}, {args.interviews} interviews of"
+                f" {args.questions} questions: {summarize(timings)}"
+            )
+    await close_ml_client()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--interviews", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
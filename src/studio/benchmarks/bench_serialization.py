@@ -0,0 +1,57 @@
+"""Time to serialize a page of --rows QuestionResponse rows, through the
+response_model validation of row.__dict__ as before and through
+page_response."""
+import argparse
+import asyncio
+import uuid
+
+from fastapi.responses import JSONResponse as StarletteJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.question_model import Question
+from app.schemas.page_schema import Page
+from app.schemas.question_schema import QuestionResponse
+from app.utils.serialization import page_response
+from benchmarks.common import stopwatch
+
+
+def questions(rows: int) -> list[Question]:
+    return [
+        Question(
+            id=uuid.uuid4(),
+            avatar_generation_id=uuid.uuid4(),
+            cv_id=uuid.uuid4(),
+            jd_id=uuid.uuid4(),
+            interview_session_id=uuid.uuid4(),
+            topic=index % 3,
+            question_context=f"Question {index}",
+        )
+        for index in range(rows)
+    ]
+
+
+async def main(args):
+    rows = questions(args.rows)
+    field = create_response_field(
+        name="response", type_=Page[QuestionResponse]
+    )
+
+    with stopwatch(f"response_model, {args.rows} rows"):
+        content = await serialize_response(
+            field=field,
+            response_content={
+                "items": [row.__dict__ for row in rows],
+                "next_cursor": None,
+            },
+        )
+        StarletteJSONResponse(content)
+
+    with stopwatch(f"page_response, {args.rows} rows"):
+        page_response({"items": rows, "next_cursor": None}, QuestionResponse)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    asyncio.run(main(parser.parse_args()))
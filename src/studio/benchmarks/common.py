@@ -0,0 +1,34 @@
+"""Helpers shared by the benchmarks.
+
+The benchmarks are run from src/studio against the database and S3 of the
+settings (e.g. the local Postgres container), for example:
+
+    python -m benchmarks.bench_async_db --requests 2000
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Nearest rank percentile of the values"""
+    ordered = sorted(values)
+    rank = max(round(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(timings: list[float]) -> str:
+    """p50/p99/mean of timings in seconds, in milliseconds"""
+    return (
+        f"p50 {percentile(timings, 50) * 1000:.2f}ms"
+        f"  p99 {percentile(timings, 99) * 1000:.2f}ms"
+        f"  mean {statistics.mean(timings) * 1000:.2f}ms"
+    )
+
+
+@contextmanager
+def stopwatch(label: str):
+    """Print the wall time of the block"""
+    start = time.perf_counter()
+    yield
+    print(f"{label}: {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,121 @@
+"""Fixtures shared by the studio tests.
+
+The tests run against the Postgres database given by the POSTGRES_* and
+DATABASE_PORT variables (a dedicated database, alembic brings it up to date)
+and against S3 mocked by moto. They are skipped when the database is not
+reachable.
+"""
+import os
+import tempfile
+import uuid
+
+import pytest
+from moto import mock_s3
+
+# The settings are read when the app is imported, the variables set here take
+# precedence over the .env file so that the tests never reach a real store
+os.environ.setdefault("API_VERSION", "v1")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_DB", "studio_test")
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_HOSTNAME", os.environ["POSTGRES_HOST"])
+os.environ.setdefault("DATABASE_PORT", "5432")
+os.environ.setdefault("ACCESS_KEY", "testing")
+os.environ.setdefault("SECRET_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("HLS_BASE_URL", "https://hls.test")
+os.environ["TRANSCODE_CACHE_DIR"] = tempfile.mkdtemp(prefix="transcode")
+os.environ["VIDEO_CACHE_DIR"] = tempfile.mkdtemp(prefix="video_cache")
+
+BUCKET = "studio-test"
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Bring the test database up to date with the migrations"""
+    from alembic import command
+    from alembic.config import Config
+    from app.db.database import engine
+    from sqlalchemy.exc import OperationalError
+
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as error:
+        pytest.skip(f"The test database is not reachable: {error.orig}")
+
+    command.upgrade(
+        Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")),
+        "head",
+    )
+    return engine
+
+
+@pytest.fixture(scope="session")
+def s3():
+    """S3 mocked by moto with the bucket of the tests"""
+    with mock_s3():
+        from app.utils.s3_client import s3_client
+
+        s3_client.create_bucket(Bucket=BUCKET)
+        yield s3_client
+
+
+@pytest.fixture(scope="session")
+def client(database, s3):
+    """Client of the app, started once for all the tests"""
+    from app.api import app
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def prefix():
+    from app.api import PREFIX
+
+    return PREFIX
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function on the event loop of the app, which owns the
+    connections of the async engine"""
+
+    def run(function, *args):
+        return client.portal.call(function, *args)
+
+    return run
+
+
+@pytest.fixture
+def run_db(run):
+    """Run a coroutine function with an async session as last argument, the
+    way the crud functions take it"""
+    from app.db.database import AsyncSessionLocal
+
+    async def with_session(function, *args):
+        async with AsyncSessionLocal() as db:
+            return await function(*args, db)
+
+    def run_db(function, *args):
+        return run(with_session, function, *args)
+
+    return run_db
+
+
+@pytest.fixture
+def user_id(client, prefix):
+    """Id of a new interviewer"""
+    response = client.post(
+        f"{prefix}/user",
+        json={
+            "username": f"user-{uuid.uuid4().hex[:8]}",
+            "password": "password",
+            "role": "interviewer",
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
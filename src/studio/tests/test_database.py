@@ -0,0 +1,58 @@
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal, get_async_db
+
+
+def test_get_async_db_yields_an_async_session(run):
+    async def session():
+        sessions = get_async_db()
+        db = await anext(sessions)
+        await sessions.aclose()
+        return db
+
+    assert isinstance(run(session), AsyncSession)
+
+
+def test_queries_overlap_on_one_event_loop(run):
+    async def sleep(seconds):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("SELECT pg_sleep(:seconds)"), {"seconds": seconds}
+            )
+
+    async def sleep_concurrently():
+        start = time.perf_counter()
+        await asyncio.gather(*(sleep(0.5) for _ in range(4)))
+        return time.perf_counter() - start
+
+    # Four blocking queries would take 2 seconds
+    assert run(sleep_concurrently) < 1.5
+
+
+def test_list_endpoints_read_through_the_async_session(
+    client, prefix, user_id
+):
+    response = client.post(
+        f"{prefix}/generation/create",
+        params={"user_id": user_id, "type": "base", "video_id": "v1"},
+    )
+    assert response.status_code == 201
+    generation_id = response.json()["id"]
+
+    response = client.get(
+        f"{prefix}/generation/get_by_user/", params={"user_id": user_id}
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [generation_id]
+
+    response = client.get(
+        f"{prefix}/question/get_by_interview_session/",
+        params={"interview_session_id": str(uuid.uuid4())},
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == []
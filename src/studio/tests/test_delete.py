@@ -0,0 +1,119 @@
+import uuid
+
+import pytest
+
+from app.constants.config import settings
+from app.services import media_upload
+
+
+@pytest.fixture
+def text_ids(client, prefix):
+    response = client.post(
+        f"{prefix}/text/create_from_paragraph",
+        json={"text": "first\nsecond\nthird", "parent_id": str(uuid.uuid4())},
+    )
+    assert response.status_code == 201
+    return [text["id"] for text in response.json()]
+
+
+@pytest.fixture
+def generation_id(client, prefix, user_id):
+    response = client.post(
+        f"{prefix}/generation/create",
+        params={"user_id": user_id, "type": "base", "video_id": "v1"},
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_delete_returns_the_id_only(client, prefix, text_ids):
+    response = client.get(f"{prefix}/text/delete/{text_ids[0]}")
+
+    assert response.status_code == 200
+    assert response.json() == {"id": text_ids[0]}
+    response = client.get(f"{prefix}/text/get/{text_ids[0]}")
+    assert response.status_code == 404
+
+
+def test_delete_of_an_unknown_id(client, prefix, generation_id):
+    response = client.get(f"{prefix}/generation/delete/{generation_id}")
+    assert response.json() == {"id": generation_id}
+
+    response = client.get(f"{prefix}/generation/delete/{generation_id}")
+    assert response.status_code == 404
+
+
+def test_bulk_delete_skips_the_unknown_ids(client, prefix, text_ids):
+    unknown_id = str(uuid.uuid4())
+
+    response = client.post(
+        f"{prefix}/text/bulk_delete", json={"ids": text_ids + [unknown_id]}
+    )
+
+    assert response.status_code == 200
+    assert sorted(response.json()["ids"]) == sorted(text_ids)
+    for text_id in text_ids:
+        response = client.get(f"{prefix}/text/get/{text_id}")
+        assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "count", [0, settings.BULK_DELETE_MAX_IDS + 1], ids=["none", "too_many"]
+)
+def test_bulk_delete_limits_the_ids(client, prefix, count):
+    response = client.post(
+        f"{prefix}/generation/bulk_delete",
+        json={"ids": [str(uuid.uuid4()) for _ in range(count)]},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.fixture
+def media_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_upload, "MEDIA_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def upload_image(client, prefix, user_id, media_store):
+    """Upload an image to the local store, returns its id and stored file"""
+
+    def upload_image():
+        response = client.post(
+            f"{prefix}/image/create/",
+            params={"user_id": user_id, "file_name": "photo"},
+            files={"file": ("photo.png", uuid.uuid4().bytes, "image/png")},
+        )
+        assert response.status_code == 201, response.text
+        image = response.json()
+        file_name = f"{image['id']}.{image['extension']}"
+        stored = media_store / "image" / file_name
+        assert stored.exists()
+        return image["id"], stored
+
+    return upload_image
+
+
+def test_delete_removes_the_stored_upload(client, prefix, upload_image):
+    image_id, stored = upload_image()
+
+    response = client.get(f"{prefix}/image/delete/{image_id}")
+
+    assert response.status_code == 200
+    assert not stored.exists()
+
+
+def test_bulk_delete_removes_the_stored_uploads(client, prefix, upload_image):
+    uploads = [upload_image() for _ in range(3)]
+    # A stored upload which is already gone is skipped
+    uploads[0][1].unlink()
+
+    response = client.post(
+        f"{prefix}/image/bulk_delete",
+        json={"ids": [image_id for image_id, _ in uploads]},
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["ids"]) == 3
+    assert not any(stored.exists() for _, stored in uploads)
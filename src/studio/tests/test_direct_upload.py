@@ -0,0 +1,213 @@
+import uuid
+
+import pytest
+import requests
+
+from app.routers import audio_router
+from conftest import BUCKET
+
+PNG = b"\x89PNG image"
+
+
+@pytest.fixture
+def presign(client, prefix):
+    """Presign the upload of a file of the user"""
+
+    def presign(user_id, type, content_type, size):
+        response = client.post(
+            f"{prefix}/s3/presigned_upload/",
+            json={
+                "bucket_name": BUCKET,
+                "path": "tests",
+                "type": type,
+                "user_id": user_id,
+                "content_type": content_type,
+                "size": size,
+            },
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return presign
+
+
+@pytest.fixture
+def uploaded_image(presign, user_id):
+    """An image of the user uploaded with a single PUT, not completed"""
+    upload = presign(user_id, "image", "image/png", len(PNG))
+    # moto intercepts the PUTs of requests to the presigned URLs
+    response = requests.put(
+        upload["url"], data=PNG, headers={"Content-Type": "image/png"}
+    )
+    assert response.status_code == 200
+    return upload
+
+
+def completion(upload, user_id, **values):
+    return {
+        "bucket_name": BUCKET,
+        "path": upload["path"],
+        "user_id": user_id,
+        "file_id": upload["file_id"],
+        **values,
+    }
+
+
+def create_image(client, prefix, user_id, body):
+    return client.post(
+        f"{prefix}/image/create_from_s3/",
+        params={"user_id": user_id, "file_name": "direct"},
+        json=body,
+    )
+
+
+def test_image_is_created_once_from_its_upload(
+    client, prefix, s3, user_id, uploaded_image
+):
+    body = completion(uploaded_image, user_id)
+
+    response = create_image(client, prefix, user_id, body)
+    assert response.status_code == 201, response.text
+    image = response.json()
+    assert image["id"] == uploaded_image["file_id"]
+    assert image["size"] == len(PNG)
+
+    response = create_image(client, prefix, user_id, body)
+    assert response.status_code == 200
+    assert response.json()["id"] == image["id"]
+
+
+def test_audio_is_uploaded_in_parts(
+    client, prefix, s3, monkeypatch, presign, user_id
+):
+    async def no_metadata(bucket_name, key):
+        return {"duration": None, "width": None, "height": None}
+
+    # ffprobe cannot reach the S3 mocked by moto
+    monkeypatch.setattr(
+        audio_router, "read_uploaded_media_metadata", no_metadata
+    )
+    data = b"a" * (8 * 1024 * 1024) + b"b" * (3 * 1024 * 1024)
+    upload = presign(user_id, "audio", "audio/wav", len(data))
+    assert upload["url"] is None
+    assert len(upload["part_urls"]) > 1
+
+    parts = []
+    part_size = upload["part_size"]
+    for index, url in enumerate(upload["part_urls"]):
+        response = requests.put(
+            url, data=data[index * part_size : (index + 1) * part_size]
+        )
+        parts.append(
+            {"part_number": index + 1, "etag": response.headers["ETag"]}
+        )
+    response = client.post(
+        f"{prefix}/audio/create_from_s3",
+        params={
+            "user_id": user_id,
+            "file_name": "direct",
+            "language": "en",
+            "duration": 7,
+        },
+        json=completion(
+            upload, user_id, upload_id=upload["upload_id"], parts=parts
+        ),
+    )
+
+    assert response.status_code == 201, response.text
+    assert response.json()["duration"] == 7
+    body = s3.get_object(Bucket=BUCKET, Key=upload["path"])["Body"].read()
+    assert body == data
+
+
+def test_generic_completion_checks_the_key(
+    client, prefix, user_id, uploaded_image
+):
+    url = f"{prefix}/s3/presigned_upload/complete/"
+
+    response = client.post(
+        url,
+        params={"type": "image"},
+        json=completion(uploaded_image, user_id, path="elsewhere/image.png"),
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        url, params={"type": "image"}, json=completion(uploaded_image, user_id)
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["size"] == len(PNG)
+
+
+@pytest.fixture
+def other_user_id(client, prefix):
+    """Id of another interviewer"""
+    response = client.post(
+        f"{prefix}/user",
+        json={
+            "username": f"user-{uuid.uuid4().hex[:8]}",
+            "password": "password",
+            "role": "interviewer",
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_key_of_another_user_is_rejected(
+    client, prefix, other_user_id, uploaded_image
+):
+    body = completion(uploaded_image, other_user_id)
+
+    response = create_image(client, prefix, other_user_id, body)
+
+    assert response.status_code == 400
+
+
+def test_key_of_another_file_is_rejected(
+    client, prefix, user_id, uploaded_image
+):
+    body = completion(uploaded_image, user_id, file_id=str(uuid.uuid4()))
+
+    response = create_image(client, prefix, user_id, body)
+
+    assert response.status_code == 400
+
+
+def test_key_of_another_type_is_rejected(
+    client, prefix, user_id, uploaded_image
+):
+    path = uploaded_image["path"].replace("/image/", "/video/")
+    body = completion(uploaded_image, user_id, path=path)
+
+    response = create_image(client, prefix, user_id, body)
+
+    assert response.status_code == 400
+
+
+def test_upload_of_another_user_is_rejected(
+    client, prefix, user_id, other_user_id, uploaded_image
+):
+    body = completion(uploaded_image, user_id)
+
+    response = create_image(client, prefix, other_user_id, body)
+
+    assert response.status_code == 406
+
+
+def test_file_id_of_another_user_is_a_conflict(
+    client, prefix, user_id, other_user_id, uploaded_image
+):
+    response = create_image(
+        client, prefix, user_id, completion(uploaded_image, user_id)
+    )
+    assert response.status_code == 201
+
+    response = create_image(
+        client,
+        prefix,
+        other_user_id,
+        completion(uploaded_image, other_user_id),
+    )
+
+    assert response.status_code == 409
@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+
+from app.crud.file_name_counter_crud import allocate_file_name
+from app.crud.image_crud import create_image
+from app.db.database import AsyncSessionLocal
+from app.models.image_model import Image
+
+
+async def allocate(asset_type, user_id, file_name):
+    async with AsyncSessionLocal() as db:
+        allocated = await allocate_file_name(
+            asset_type, user_id, file_name, db
+        )
+        await db.commit()
+        return allocated
+
+
+def test_duplicate_names_are_suffixed_in_order(run):
+    user_id = str(uuid.uuid4())
+
+    names = [run(allocate, "image", user_id, "photo") for _ in range(3)]
+
+    assert names == ["photo", "photo (1)", "photo (2)"]
+
+
+def test_counters_are_per_user_and_asset_type(run):
+    user_id = str(uuid.uuid4())
+    run(allocate, "image", user_id, "photo")
+
+    assert run(allocate, "video", user_id, "photo") == "photo"
+    assert run(allocate, "image", str(uuid.uuid4()), "photo") == "photo"
+
+
+def test_suffixed_names_are_counted_under_their_base_name(run):
+    user_id = str(uuid.uuid4())
+
+    names = [
+        run(allocate, "image", user_id, file_name)
+        for file_name in ["photo", "photo (1)", "photo", "photo (1)"]
+    ]
+
+    assert names == ["photo", "photo (1)", "photo (2)", "photo (3)"]
+
+
+def test_suffixed_name_is_kept_above_the_counter(run):
+    user_id = str(uuid.uuid4())
+
+    names = [
+        run(allocate, "image", user_id, file_name)
+        for file_name in ["photo (5)", "photo", "photo (2)", "photo (9)"]
+    ]
+
+    assert names == ["photo (5)", "photo (6)", "photo (7)", "photo (9)"]
+
+
+def test_concurrent_uploads_get_distinct_names(run):
+    user_id = str(uuid.uuid4())
+
+    async def allocate_concurrently():
+        return await asyncio.gather(
+            *(allocate("image", user_id, "photo") for _ in range(20))
+        )
+
+    names = run(allocate_concurrently)
+
+    assert len(set(names)) == 20
+    assert set(names) == {"photo"} | {
+        f"photo ({count})" for count in range(1, 20)
+    }
+
+
+def test_create_image_allocates_the_name(run_db):
+    user_id = uuid.uuid4()
+
+    def image():
+        return Image(
+            user_id=user_id, file_name="photo", extension="png", size=3
+        )
+
+    first = run_db(create_image, image())
+    second = run_db(create_image, image())
+
+    assert (first.file_name, second.file_name) == ("photo", "photo (1)")
@@ -0,0 +1,45 @@
+import uuid
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import update
+
+from app.constants.config import Settings, settings
+from app.models.generation_model import Generation
+
+
+def test_hls_base_url_is_required_while_packaging(monkeypatch):
+    monkeypatch.delenv("HLS_BASE_URL", raising=False)
+
+    with pytest.raises(ValidationError, match="HLS_BASE_URL"):
+        Settings(HLS_PACKAGING_ENABLED=True, HLS_BASE_URL=None)
+
+    assert Settings(HLS_PACKAGING_ENABLED=False).HLS_BASE_URL is None
+
+
+def test_playlist_is_served_from_the_hls_base_url(
+    client, prefix, run_db, user_id
+):
+    response = client.post(
+        f"{prefix}/generation/create",
+        params={"user_id": user_id, "type": "base", "video_id": "v1"},
+    )
+    generation_id = response.json()["id"]
+    hls_path = f"hls/{uuid.uuid4()}/master.m3u8"
+
+    async def package(db):
+        await db.execute(
+            update(Generation)
+            .where(Generation.id == generation_id)
+            .values(hls_path_s3=hls_path)
+        )
+        await db.commit()
+
+    run_db(package)
+
+    response = client.get(f"{prefix}/generation/hls/{generation_id}")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["playlist_url"] == (
+        f"{settings.HLS_BASE_URL.rstrip('/')}/{hls_path}"
+    )
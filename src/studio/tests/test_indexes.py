@@ -0,0 +1,269 @@
+"""The CRUD lookups run on a seeded dataset are checked with EXPLAIN ANALYZE
+to scan the index meant for them."""
+import hashlib
+import json
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+
+from app.crud.answer_crud import read_answer_by_question_id
+from app.crud.audio_crud import (
+    get_audio_by_content_hash,
+    get_audios_page_by_user,
+)
+from app.crud.cv_crud import get_cvs_page_by_user
+from app.crud.generation_crud import get_generations_page_by_user
+from app.crud.image_crud import (
+    get_image_by_content_hash,
+    get_images_page_by_user,
+)
+from app.crud.interview_session_crud import (
+    get_interview_sessions_page_by_cv_and_jd,
+)
+from app.crud.question_crud import get_questions_page_by_interview_session_id
+from app.crud.text_crud import get_texts_page_by_parent_id
+from app.crud.user_crud import read_user_by_username
+from app.crud.video_crud import (
+    get_video_by_content_hash,
+    get_videos_page_by_user,
+)
+from app.db.database import AsyncSessionLocal, async_engine
+
+# Rows seeded per table, sharing each lookup value with 4 other rows
+ROWS = 5000
+KEYS = ROWS // 5
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+# Lookup values shared by the rows, KEYS values of each name
+KEY_NAMES = ("session", "parent", "user", "question", "cv", "jd")
+
+# Columns of each table, the values are SQL expressions of the row number i
+# where {name} is one of the lookup values of the name
+SEEDS = {
+    "questions": {
+        "avatar_generation_id": "md5(random()::text)::uuid",
+        "cv_id": "md5(random()::text)::uuid",
+        "jd_id": "md5(random()::text)::uuid",
+        "interview_session_id": "{session}",
+    },
+    "texts": {"parent_id": "{parent}", "text": "'Answer'"},
+    "generations": {
+        "user_id": "{user}",
+        "type": "CASE WHEN i % 2 = 0 THEN 'generated' ELSE 'base' END",
+    },
+    "answers": {
+        "question_id": "{question}",
+        "bucket_s3": "'bucket'",
+        "video_url": "'video'",
+        "audio_url": "'audio'",
+        "overall_score": "0",
+        "confidence_score": "0",
+        "text_relevancy_score": "0",
+        "has_bad_words": "false",
+        "professional_score": "0",
+        "emotion_from_text": "'neutral'",
+        "emotion_from_audio": "'neutral'",
+        "emotion_from_video": "'neutral'",
+    },
+    "interview_sessions": {
+        "cv_id": "{cv}",
+        "jd_id": "{jd}",
+        "status": "'completed'",
+    },
+    "users": {
+        "username": "'{seed}-' || i",
+        "password": "'password'",
+        "role": "'interviewer'",
+        "position": "''",
+    },
+    "cvs": {
+        "user_id": "{user}",
+        "full_name": "'Name'",
+        "email": "'name@example.com'",
+        "phone_number": "'0'",
+        "description": "''",
+    },
+    "videos": {
+        "user_id": "{user}",
+        "file_name": "'video'",
+        "language": "'en'",
+        "extension": "'mp4'",
+        "size": "1",
+        "duration": "1",
+        "content_hash": "md5('{seed}' || i)",
+    },
+    "audios": {
+        "user_id": "{user}",
+        "file_name": "'audio'",
+        "language": "'en'",
+        "extension": "'wav'",
+        "size": "1",
+        "duration": "1",
+        "content_hash": "md5('{seed}' || i)",
+    },
+    "images": {
+        "user_id": "{user}",
+        "file_name": "'image'",
+        "extension": "'png'",
+        "size": "1",
+        "content_hash": "md5('{seed}' || i)",
+    },
+}
+
+
+def key(seed, name, number=1):
+    """Lookup value of the name seeded for the row numbers number mod KEYS"""
+    digest = hashlib.md5(f"{seed}-{name}-{number}".encode()).hexdigest()
+    return uuid.UUID(digest)
+
+
+def key_expression(seed, name):
+    return f"md5('{seed}-{name}-' || (i % {KEYS}))::uuid"
+
+
+@pytest.fixture(scope="module")
+def seed(database):
+    seed = uuid.uuid4().hex[:8]
+    keys = {name: key_expression(seed, name) for name in KEY_NAMES}
+    with database.begin() as connection:
+        for table, columns in SEEDS.items():
+            values = [
+                expression.format(seed=seed, **keys)
+                for expression in columns.values()
+            ]
+            connection.execute(
+                text(
+                    f"INSERT INTO {table} (id, {', '.join(columns)}) "
+                    f"SELECT md5('{seed}-{table}-' || i)::uuid, "
+                    f"{', '.join(values)} "
+                    f"FROM generate_series(1, {ROWS}) AS i"
+                )
+            )
+    with database.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+            text(f"ANALYZE {', '.join(SEEDS)}")
+        )
+    return seed
+
+
+def scanned_indexes(plan: dict) -> set[str]:
+    indexes = set()
+    if plan["Node Type"] in INDEX_NODES:
+        indexes.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        indexes |= scanned_indexes(child)
+    return indexes
+
+
+@pytest.fixture
+def explain(run):
+    """Run the CRUD function and EXPLAIN ANALYZE the query it ran"""
+
+    async def explain(function, *args):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, many):
+            statements.append((statement, parameters))
+
+        event.listen(
+            async_engine.sync_engine, "before_cursor_execute", capture
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                await function(*args, db)
+        finally:
+            event.remove(
+                async_engine.sync_engine, "before_cursor_execute", capture
+            )
+
+        statement, parameters = statements[-1]
+        async with async_engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return scanned_indexes(plan[0]["Plan"])
+
+    return lambda function, *args: run(explain, function, *args)
+
+
+LOOKUPS = [
+    (
+        "ix_questions_interview_session_id",
+        get_questions_page_by_interview_session_id,
+        lambda seed: (key(seed, "session"), 50, None),
+    ),
+    (
+        "ix_texts_parent_id",
+        get_texts_page_by_parent_id,
+        lambda seed: (key(seed, "parent"), 50, None),
+    ),
+    (
+        "ix_generations_user_id_type",
+        get_generations_page_by_user,
+        lambda seed: (key(seed, "user"), "generated", 50, None),
+    ),
+    (
+        "ix_answers_question_id",
+        read_answer_by_question_id,
+        lambda seed: (key(seed, "question"),),
+    ),
+    (
+        "ix_interview_sessions_cv_id_jd_id",
+        get_interview_sessions_page_by_cv_and_jd,
+        lambda seed: (key(seed, "cv"), key(seed, "jd"), 50, None),
+    ),
+    (
+        "ix_users_username",
+        read_user_by_username,
+        lambda seed: (f"{seed}-1",),
+    ),
+    (
+        "ix_cvs_user_id",
+        get_cvs_page_by_user,
+        lambda seed: (key(seed, "user"), 50, None),
+    ),
+    (
+        "ix_videos_user_id_content_hash",
+        get_videos_page_by_user,
+        lambda seed: (key(seed, "user"), 50, None),
+    ),
+    (
+        "ix_videos_user_id_content_hash",
+        get_video_by_content_hash,
+        lambda seed: (key(seed, "user"), hashlib.md5(b"x").hexdigest()),
+    ),
+    (
+        "ix_audios_user_id_content_hash",
+        get_audios_page_by_user,
+        lambda seed: (key(seed, "user"), 50, None),
+    ),
+    (
+        "ix_audios_user_id_content_hash",
+        get_audio_by_content_hash,
+        lambda seed: (key(seed, "user"), hashlib.md5(b"x").hexdigest()),
+    ),
+    (
+        "ix_images_user_id_content_hash",
+        get_images_page_by_user,
+        lambda seed: (key(seed, "user"), 50, None),
+    ),
+    (
+        "ix_images_user_id_content_hash",
+        get_image_by_content_hash,
+        lambda seed: (key(seed, "user"), hashlib.md5(b"x").hexdigest()),
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "index, lookup, arguments",
+    LOOKUPS,
+    ids=[lookup.__name__ for _, lookup, _ in LOOKUPS],
+)
+def test_lookup_scans_its_index(seed, explain, index, lookup, arguments):
+    assert index in explain(lookup, *arguments(seed))
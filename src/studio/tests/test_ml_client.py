@@ -0,0 +1,98 @@
+import asyncio
+import datetime
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+from app.constants.config import settings
+from app.models.question_model import Question
+from app.utils.ml_client import _json_default, post_ml
+from app.utils.mlp_api import handle_send_question_selection
+
+
+@pytest.fixture
+def ml_stub(run):
+    """ML selector stub recording the client port of each request"""
+    ports = []
+
+    async def select(request):
+        ports.append(request.transport.get_extra_info("peername")[1])
+        data = await request.json()
+        await asyncio.sleep(0.05)
+        return web.json_response(
+            {"question_id": data["question_bank"][0]["question_id"]}
+        )
+
+    async def start():
+        app = web.Application()
+        app.add_routes([web.post("/select", select)])
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        return runner
+
+    runner = run(start)
+    port = runner.addresses[0][1]
+    yield SimpleNamespace(url=f"http://127.0.0.1:{port}/select", ports=ports)
+    run(runner.cleanup)
+
+
+def selection_input(question_id="q1"):
+    return {"question_bank": [{"question_id": question_id}]}
+
+
+def test_sequential_calls_reuse_one_connection(run, ml_stub):
+    async def call_sequentially():
+        for _ in range(10):
+            await post_ml(ml_stub.url, selection_input())
+
+    run(call_sequentially)
+
+    assert len(ml_stub.ports) == 10
+    assert len(set(ml_stub.ports)) == 1
+
+
+def test_concurrent_calls_are_capped_per_host(run, ml_stub):
+    async def call_concurrently():
+        return await asyncio.gather(
+            *(post_ml(ml_stub.url, selection_input()) for _ in range(60))
+        )
+
+    responses = run(call_concurrently)
+
+    assert responses == [{"question_id": "q1"}] * 60
+    connections = len(set(ml_stub.ports))
+    assert 1 < connections <= settings.ML_CLIENT_MAX_CONNECTIONS_PER_HOST
+
+
+def test_question_selection_goes_through_the_shared_client(
+    run, ml_stub, monkeypatch
+):
+    monkeypatch.setattr(settings, "QUESTION_SELECTION_URL", ml_stub.url)
+
+    response = run(handle_send_question_selection, selection_input("q2"))
+
+    assert response == {"question_id": "q2"}
+    assert len(ml_stub.ports) == 1
+
+
+def test_ml_inputs_encode_the_uuids_and_dates():
+    task_id = uuid.uuid4()
+    created_at = datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+    encoded = json.dumps(
+        {"task_id": task_id, "created_at": created_at}, default=_json_default
+    )
+
+    assert json.loads(encoded) == {
+        "task_id": str(task_id),
+        "created_at": "2024-01-02T03:04:05",
+    }
+
+
+def test_ml_inputs_reject_other_objects():
+    with pytest.raises(TypeError, match="Question"):
+        json.dumps({"question": Question(topic=1)}, default=_json_default)
@@ -0,0 +1,142 @@
+import uuid
+
+from sqlalchemy import func, select
+
+from app.crud.bulk_insert import MAX_BIND_PARAMETERS, chunk_size
+from app.crud.generation_crud import bulk_create_generations
+from app.crud.question_crud import (
+    bulk_create_questions_with_texts,
+    get_all_questions_by_interviewer_id_and_interview_session_id,
+)
+from app.crud.text_crud import bulk_create_texts
+from app.models.question_model import Question
+from app.models.text_model import Text
+
+
+def question_rows(interview_session_id, count, ground_truths=3):
+    return [
+        {
+            "avatar_generation_id": uuid.uuid4(),
+            "cv_id": uuid.uuid4(),
+            "jd_id": uuid.uuid4(),
+            "question_context": f"Question {index}",
+            "topic": index % 3,
+            "interview_session_id": interview_session_id,
+            "ground_truths": [
+                f"Answer {index}.{number}" for number in range(ground_truths)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+async def count_rows(query, db):
+    return (await db.execute(query)).scalar_one()
+
+
+def test_bulk_create_questions_with_texts(run_db):
+    interview_session_id = uuid.uuid4()
+    questions = question_rows(interview_session_id, 20)
+
+    ids = run_db(bulk_create_questions_with_texts, questions)
+
+    assert len(ids) == 20
+    stored = run_db(
+        count_rows,
+        select(func.count()).filter(
+            Question.interview_session_id == interview_session_id
+        ),
+    )
+    assert stored == 20
+    ground_truths = run_db(
+        count_rows, select(func.count()).filter(Text.parent_id.in_(ids))
+    )
+    assert ground_truths == 60
+    texts = run_db(
+        count_rows,
+        select(func.count()).filter(
+            Text.parent_id == ids[5], Text.text.like("Answer 5.%")
+        ),
+    )
+    assert texts == 3
+
+
+def test_bulk_create_questions_without_questions(run_db):
+    assert run_db(bulk_create_questions_with_texts, []) == []
+
+
+def test_bulk_create_texts(run_db):
+    parent_id = uuid.uuid4()
+
+    ids = run_db(
+        bulk_create_texts,
+        [
+            {"parent_id": parent_id, "text": f"CV {index}"}
+            for index in range(5)
+        ],
+    )
+
+    assert len(set(ids)) == 5
+    stored = run_db(
+        count_rows, select(func.count()).filter(Text.parent_id == parent_id)
+    )
+    assert stored == 5
+
+
+def test_bulk_create_texts_over_the_bind_parameter_limit(run_db):
+    parent_id = uuid.uuid4()
+    texts = [
+        {"id": uuid.uuid4(), "parent_id": parent_id, "text": "Text"}
+        for _ in range(chunk_size(Text) * 2 + 1)
+    ]
+    assert len(texts) * len(Text.__table__.columns) > MAX_BIND_PARAMETERS
+
+    ids = run_db(bulk_create_texts, texts)
+
+    assert ids == [text["id"] for text in texts]
+    stored = run_db(
+        count_rows, select(func.count()).filter(Text.parent_id == parent_id)
+    )
+    assert stored == len(texts)
+
+
+def test_question_bank_keeps_the_generated_questions_of_the_interviewer(
+    run_db,
+):
+    interviewer_id = uuid.uuid4()
+    interview_session_id = uuid.uuid4()
+    generations = [
+        {"id": uuid.uuid4(), "user_id": interviewer_id, "type": "generated"}
+        for _ in range(3)
+    ]
+    base_generation = {
+        "id": uuid.uuid4(),
+        "user_id": interviewer_id,
+        "type": "base",
+    }
+    other_generation = {
+        "id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "type": "generated",
+    }
+    run_db(
+        bulk_create_generations,
+        generations + [base_generation, other_generation],
+    )
+    questions = question_rows(interview_session_id, 5, ground_truths=0)
+    for question, generation in zip(
+        questions, generations + [base_generation, other_generation]
+    ):
+        question["avatar_generation_id"] = generation["id"]
+    # A question of another session asked by the interviewer's avatar
+    other_session = question_rows(uuid.uuid4(), 1, ground_truths=0)
+    other_session[0]["avatar_generation_id"] = generations[0]["id"]
+    ids = run_db(bulk_create_questions_with_texts, questions + other_session)
+
+    bank = run_db(
+        get_all_questions_by_interviewer_id_and_interview_session_id,
+        str(interviewer_id),
+        str(interview_session_id),
+    )
+
+    assert [question.id for question in bank] == sorted(ids[:3])
@@ -0,0 +1,175 @@
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from app.crud.generation_crud import bulk_create_generations
+from app.crud.question_crud import bulk_create_questions_with_texts
+from app.models.question_model import Question
+from app.services.question_selection import SelectionState
+from app.utils.metrics import get_metrics
+
+
+def question(topic, is_used=False):
+    return Question(
+        id=uuid.uuid4(),
+        avatar_generation_id=uuid.uuid4(),
+        topic=topic,
+        is_used=is_used,
+    )
+
+
+def test_state_groups_the_unused_questions_by_topic():
+    questions = [question(0), question(1), question(0, is_used=True)]
+
+    state = SelectionState(questions)
+
+    assert dict(state.unused_by_topic) == {
+        0: {str(questions[0].id): None},
+        1: {str(questions[1].id): None},
+    }
+    assert state.asked_by_topic == {0: 1}
+    assert len(state.question_bank) == 3
+
+
+def test_mark_asked_updates_the_bank_in_place():
+    questions = [question(0), question(1)]
+    state = SelectionState(questions)
+    question_id = str(questions[0].id)
+
+    asked = state.mark_asked(question_id, is_answered=True)
+
+    assert asked["is_answered"] is True
+    assert state.question_bank[0]["is_used"] is True
+    assert question_id not in state.unused_by_topic[0]
+    assert state.asked_by_topic == {0: 1}
+
+
+def test_select_locally_rotates_through_the_topics():
+    questions = [question(0), question(0), question(1), question(2)]
+    state = SelectionState(questions)
+
+    state.mark_asked(str(questions[0].id), is_answered=True)
+
+    # Topic 0 was asked, 1 and 2 were not
+    assert state.select_locally() == str(questions[2].id)
+    assert state.likely_next(str(questions[2].id), 2) == [
+        str(questions[3].id),
+        str(questions[1].id),
+    ]
+
+
+def test_select_locally_when_every_question_was_asked():
+    questions = [question(0)]
+    state = SelectionState(questions)
+    state.mark_asked(str(questions[0].id), is_answered=False)
+
+    assert state.select_locally() is None
+
+
+def test_discard_takes_out_an_unused_question():
+    questions = [question(0), question(1)]
+    state = SelectionState(questions)
+
+    assert state.discard(str(questions[1].id)) is True
+    assert state.discard(str(questions[1].id)) is False
+    assert state.select_locally() == str(questions[0].id)
+
+
+@pytest.fixture
+def interview(run_db):
+    """An interview session of 4 questions asked by avatars of the
+    interviewer, returns the interviewer id, session id and question ids"""
+    interviewer_id = uuid.uuid4()
+    interview_session_id = uuid.uuid4()
+    generation_ids = run_db(
+        bulk_create_generations,
+        [{"id": uuid.uuid4(), "user_id": interviewer_id} for _ in range(4)],
+    )
+    question_ids = run_db(
+        bulk_create_questions_with_texts,
+        [
+            {
+                "avatar_generation_id": generation_id,
+                "cv_id": uuid.uuid4(),
+                "jd_id": uuid.uuid4(),
+                "topic": index % 2,
+                "question_context": f"Question {index}",
+                "interview_session_id": interview_session_id,
+            }
+            for index, generation_id in enumerate(generation_ids)
+        ],
+    )
+    return str(interviewer_id), str(interview_session_id), question_ids
+
+
+def counter(name):
+    return get_metrics()["counters"].get(name, 0)
+
+
+def select(client, prefix, interview, question_id):
+    interviewer_id, interview_session_id, _ = interview
+    response = client.post(
+        f"{prefix}/question/send/question_selection",
+        json={
+            "interviewer_id": interviewer_id,
+            "interview_session_id": interview_session_id,
+            "question_id": str(question_id),
+            "is_answered": True,
+        },
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["question_id"]
+
+
+def test_selection_state_is_kept_between_answers(client, prefix, interview):
+    _, _, question_ids = interview
+    misses = counter("question_selection_cache_misses")
+    hits = counter("question_selection_cache_hits")
+
+    asked = [str(question_ids[0])]
+    for _ in range(3):
+        asked.append(select(client, prefix, interview, asked[-1]))
+
+    assert sorted(asked) == sorted(map(str, question_ids))
+    assert counter("question_selection_cache_misses") == misses + 1
+    assert counter("question_selection_cache_hits") == hits + 2
+
+
+def test_deleted_question_drops_the_state(client, prefix, interview):
+    _, _, question_ids = interview
+    next_id = select(client, prefix, interview, question_ids[0])
+    misses = counter("question_selection_cache_misses")
+
+    response = client.get(f"{prefix}/question/delete/{next_id}")
+    assert response.status_code == 200
+    answered_id = next(
+        question_id
+        for question_id in question_ids[1:]
+        if str(question_id) != next_id
+    )
+    picked = select(client, prefix, interview, answered_id)
+
+    assert picked != next_id
+    assert counter("question_selection_cache_misses") == misses + 1
+
+
+def test_question_asked_through_another_worker_is_not_picked(
+    client, prefix, run_db, interview
+):
+    _, _, question_ids = interview
+    select(client, prefix, interview, question_ids[0])
+
+    async def mark_used_elsewhere(db):
+        await db.execute(
+            update(Question)
+            .where(Question.id.in_(question_ids[1:3]))
+            .values(is_used=True)
+        )
+        await db.commit()
+
+    run_db(mark_used_elsewhere)
+
+    assert select(client, prefix, interview, question_ids[0]) == str(
+        question_ids[3]
+    )
@@ -0,0 +1,90 @@
+import io
+import uuid
+
+import pytest
+from fastapi import UploadFile
+
+from app.constants.config import settings
+from app.utils import s3_client
+from app.utils.s3_client import (
+    MIN_PART_SIZE,
+    iter_file_stream,
+    open_file_stream,
+    upload_stream,
+)
+from conftest import BUCKET
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="video.mp4")
+
+
+def read_object(s3, key):
+    return s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+@pytest.fixture
+def part_size(monkeypatch):
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", MIN_PART_SIZE)
+    return MIN_PART_SIZE
+
+
+def test_upload_stream_puts_a_small_file_at_once(run, s3):
+    key = f"tests/{uuid.uuid4()}.mp4"
+
+    run(upload_stream, upload(b"small"), BUCKET, key, "video/mp4")
+
+    assert read_object(s3, key) == b"small"
+    head = s3.head_object(Bucket=BUCKET, Key=key)
+    assert head["ContentType"] == "video/mp4"
+    assert "-" not in head["ETag"]
+
+
+def test_upload_stream_sends_the_parts_of_a_large_file(run, s3, part_size):
+    key = f"tests/{uuid.uuid4()}.mp4"
+    data = b"a" * part_size + b"b" * part_size + b"c" * 1024
+
+    run(upload_stream, upload(data), BUCKET, key, "video/mp4")
+
+    assert read_object(s3, key) == data
+    # The ETag of a multipart object ends with its number of parts
+    assert s3.head_object(Bucket=BUCKET, Key=key)["ETag"].endswith('-3"')
+
+
+def test_upload_stream_aborts_on_a_failed_part(
+    run, s3, part_size, monkeypatch
+):
+    key = f"tests/{uuid.uuid4()}.mp4"
+    upload_part = s3.upload_part
+
+    def fail_second_part(**kwargs):
+        if kwargs["PartNumber"] == 2:
+            raise ConnectionError("The connection was lost")
+        return upload_part(**kwargs)
+
+    monkeypatch.setattr(s3_client.s3_client, "upload_part", fail_second_part)
+
+    with pytest.raises(ConnectionError):
+        run(upload_stream, upload(b"a" * part_size * 3), BUCKET, key)
+
+    uploads = s3.list_multipart_uploads(Bucket=BUCKET, Prefix=key)
+    assert uploads.get("Uploads", []) == []
+    assert s3.list_objects_v2(Bucket=BUCKET, Prefix=key)["KeyCount"] == 0
+
+
+def test_open_file_stream_reads_a_range(run, s3):
+    key = f"tests/{uuid.uuid4()}.mp4"
+    s3.put_object(Bucket=BUCKET, Key=key, Body=b"0123456789")
+
+    async def read_range():
+        res = await open_file_stream(BUCKET, key, "bytes=2-5")
+        body = res["file_object"]["Body"]
+        return b"".join([chunk async for chunk in iter_file_stream(body)])
+
+    assert run(read_range) == b"2345"
+
+
+def test_open_file_stream_of_a_missing_object(run, s3):
+    res = run(open_file_stream, BUCKET, f"tests/{uuid.uuid4()}.mp4")
+
+    assert res["status"] is False
@@ -0,0 +1,125 @@
+import uuid
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from app.crud.question_crud import bulk_create_questions_with_texts
+from app.models.question_model import Question
+from app.schemas.page_schema import Page
+from app.schemas.question_schema import QuestionResponse
+from app.utils.serialization import (
+    JSONResponse,
+    page_response,
+    project,
+    project_fields,
+)
+
+
+class DriverUUID(uuid.UUID):
+    """Stands for the UUID subclass returned by asyncpg"""
+
+
+def question(**values):
+    return Question(
+        id=uuid.uuid4(),
+        avatar_generation_id=uuid.uuid4(),
+        cv_id=uuid.uuid4(),
+        jd_id=uuid.uuid4(),
+        interview_session_id=uuid.uuid4(),
+        **values,
+    )
+
+
+def test_project_keeps_the_fields_of_the_schema():
+    row = question(topic=1, question_context="Why?")
+
+    projected = project(row, QuestionResponse)
+
+    assert list(projected) == list(QuestionResponse.__fields__)
+    assert projected["id"] == row.id
+    assert projected["question_context"] == "Why?"
+
+
+def test_project_defaults_the_missing_optional_fields():
+    row = SimpleNamespace(
+        id=uuid.uuid4(),
+        avatar_generation_id=uuid.uuid4(),
+        cv_id=uuid.uuid4(),
+        jd_id=uuid.uuid4(),
+    )
+
+    projected = project(row, QuestionResponse)
+
+    assert projected["topic"] is None
+    assert projected["question_context"] is None
+
+
+def test_project_raises_on_a_missing_required_field():
+    row = SimpleNamespace(id=uuid.uuid4(), topic=1)
+
+    with pytest.raises(AttributeError, match="avatar_generation_id"):
+        project(row, QuestionResponse)
+
+
+def test_project_fields_keeps_the_selected_fields():
+    row = question(topic=2)
+
+    assert project_fields(row, ["id", "topic"]) == {"id": row.id, "topic": 2}
+
+
+def test_page_response_matches_the_response_model():
+    rows = [question(topic=index, question_context=None) for index in range(3)]
+    page = {"items": rows, "next_cursor": "cursor"}
+
+    body = orjson.loads(page_response(page, QuestionResponse).body)
+
+    expected = Page[QuestionResponse](
+        items=[row.__dict__ for row in rows], next_cursor="cursor"
+    )
+    assert body == orjson.loads(expected.json())
+
+
+def test_json_response_encodes_driver_uuids():
+    value = DriverUUID(str(uuid.uuid4()))
+
+    body = JSONResponse({"id": value, 1: "one"}).body
+
+    assert orjson.loads(body) == {"id": str(value), "1": "one"}
+
+
+def test_list_endpoint_answers_with_the_selected_fields(
+    client, prefix, run_db
+):
+    interview_session_id = uuid.uuid4()
+    run_db(
+        bulk_create_questions_with_texts,
+        [
+            {
+                "avatar_generation_id": uuid.uuid4(),
+                "cv_id": uuid.uuid4(),
+                "jd_id": uuid.uuid4(),
+                "topic": 1,
+                "question_context": "Why?",
+                "interview_session_id": interview_session_id,
+            }
+        ],
+    )
+    url = f"{prefix}/question/get_by_interview_session/"
+
+    response = client.get(
+        url, params={"interview_session_id": str(interview_session_id)}
+    )
+    assert response.headers["content-type"] == "application/json"
+    [item] = response.json()["items"]
+    assert set(item) == set(QuestionResponse.__fields__)
+
+    response = client.get(
+        url,
+        params={
+            "interview_session_id": str(interview_session_id),
+            "fields": "id,topic",
+        },
+    )
+    [item] = response.json()["items"]
+    assert set(item) == {"id", "topic"}
@@ -0,0 +1,38 @@
+import asyncio
+from contextlib import suppress
+
+from app.utils import transcoder
+
+
+def test_slot_is_released_once_the_process_is_reaped(monkeypatch):
+    create_subprocess_exec = asyncio.create_subprocess_exec
+    processes = []
+    released = []
+
+    async def stalled_ffmpeg(*args, **kwargs):
+        process = await create_subprocess_exec("sleep", "30", **kwargs)
+        processes.append(process)
+        return process
+
+    release_slot = transcoder._release_slot
+
+    def record_release():
+        released.append(processes[-1].returncode)
+        release_slot()
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", stalled_ffmpeg)
+    monkeypatch.setattr(transcoder, "_release_slot", record_release)
+
+    async def cancel_transcode():
+        stream = transcoder.transcode("input.mp4")
+        reading = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.1)
+        reading.cancel()
+        with suppress(asyncio.CancelledError):
+            await reading
+
+    asyncio.run(cancel_transcode())
+
+    # The process was killed and reaped before its slot was released
+    assert released == [-9]
+    assert transcoder._running == 0